@@ -22,10 +22,9 @@ import uvicorn
 
 from core.app_context import AppContext
 from core.config_loader import load_system_config
-from core.logger import configure_root_logger
+from core.logger import configure_root_logger, shutdown_logging
 from core.system_orchestrator import SystemOrchestrator
 from api.server import create_api_app
-from weather.weather_service import WeatherService
 
 
 # ---------------------------------------------------------
@@ -89,6 +88,7 @@ def application_context():
         logger.info("Shutting down AppContext...")
         ctx.stop()
         logger.info("AppContext shutdown complete.")
+        shutdown_logging()
 
 
 # ---------------------------------------------------------
@@ -103,6 +103,19 @@ def main():
         # -------------------------------------------------
         orchestrator = SystemOrchestrator(ctx)
 
+        # Opt-in: a shorter GIL switch interval gets the emergency handler
+        # thread onto the interpreter sooner under load. It applies to every
+        # thread in the process, so it is set here and restored on exit.
+        previous_switch_interval = sys.getswitchinterval()
+        switch_interval_ms = ctx.get("safety", "emergency", "switch_interval_ms", default=None)
+        if switch_interval_ms:
+            sys.setswitchinterval(switch_interval_ms / 1000.0)
+            logger.info(
+                "GIL switch interval %.2f ms (was %.2f ms)",
+                switch_interval_ms,
+                previous_switch_interval * 1000.0,
+            )
+
         logger.info("Running startup checks...")
         orchestrator.run_startup_checks()
 
@@ -110,9 +123,9 @@ def main():
         orchestrator.start_background_services()
 
         # -------------------------------------------------
-        # Weather Service
+        # Weather Service (shared with the orchestrator)
         # -------------------------------------------------
-        weather_service = WeatherService(ctx)
+        weather_service = orchestrator.weather_service
 
         # -------------------------------------------------
         # Build FastAPI App
@@ -122,6 +135,8 @@ def main():
             ai_engine=orchestrator.ai_engine,
             irrigation_controller=orchestrator.irrigation_controller,
             weather_service=weather_service,
+            emergency_bus=orchestrator.emergency_bus,
+            journal=orchestrator.journal,
         )
 
         host = ctx.get("api", "host", default="127.0.0.1")
@@ -181,6 +196,7 @@ def main():
             logger.info(">> Shutdown complete.")
 
             orchestrator.shutdown()
+            sys.setswitchinterval(previous_switch_interval)
             sys.exit(0)
 
 
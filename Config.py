@@ -22,6 +22,8 @@ INFERENCE_IOU = float(os.getenv("INFERENCE_IOU", "0.45"))
 SCHEDULE_JSON = ROOT / "schedule.json"
 DEFAULT_START_TIME = os.getenv("DEFAULT_START_TIME", "05:00")  # local time HH:MM
 DEFAULT_DURATION_MIN = int(os.getenv("DEFAULT_DURATION_MIN", "10"))
+# Schedule edits are written back once they stop arriving for this long
+SCHEDULE_WRITE_DELAY_SEC = float(os.getenv("SCHEDULE_WRITE_DELAY_SEC", "1.0"))
 
 # Weather
 WEATHER_CACHE = ROOT / "weather_cache.json"
@@ -29,7 +31,6 @@ WEATHER_TTL_MIN = int(os.getenv("WEATHER_TTL_MIN", "30"))
 
 # Logging
 LOG_DIR.mkdir(exist_ok=True, parents=True)
-WATERING_LOG = LOG_DIR / "watering.log"
 HYDRATION_LOG = LOG_DIR / "hydration_analysis.log"
 
 # CSV data
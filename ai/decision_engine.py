@@ -1,8 +1,11 @@
 from irrigation.hydration_controller import calculate_watering_time
-from irrigation.emergency_shutdown import emergency_check
+from irrigation.emergency_shutdown import emergency_check, get_emergency_bus
 
 def decide(detections, hydration_score):
     if emergency_check(detections):
+        bus = get_emergency_bus()
+        if bus is not None:
+            bus.publish("vision", "water/mud detected")
         return {"action": "shutdown", "duration": 0}
 
     duration = calculate_watering_time(hydration_score)
@@ -1,7 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
 
 from core.app_context import AppContext
+from core.config_snapshot import ConfigSnapshot
+from ai.evaluation_cache import EvaluationCache
+from irrigation.emergency_shutdown import get_emergency_bus
+from utils.clock import SYSTEM_CLOCK, Clock
 
 
 @dataclass
@@ -12,6 +19,9 @@ class ZoneEvaluationResult:
     emergency_detected: bool
     emergency_reason: Optional[str]
     notes: str
+    # Health-adjusted duration before the current-weather factors and the
+    # runtime cap; for callers that apply their own (forecast) weather scale
+    pre_weather_duration_minutes: Optional[float] = None
 
 
 class GardenAIEngine:
@@ -22,10 +32,16 @@ class GardenAIEngine:
     - Fuse sensor data, weather, and vision
     - Detect emergencies (leaks, pressure drops, anomalies)
     - Recommend ideal watering duration per zone
+
+    Evaluations are cached per zone for `ai.evaluation_cache.ttl_seconds`
+    and invalidated when new sensor readings, weather, frames or config
+    arrive (see the on_* hooks). Concurrent requests for one zone share a
+    single computation.
     """
 
-    def __init__(self, app_context: AppContext):
+    def __init__(self, app_context: AppContext, clock: Clock = SYSTEM_CLOCK):
         self.ctx = app_context
+        self.clock = clock
         self.logger = getattr(self.ctx, "logger", None)
 
         self.runtime = self.ctx.get("ai", "runtime", default="onnx")
@@ -34,12 +50,26 @@ class GardenAIEngine:
 
         self.vision_model = None
         self.hydration_model = None
+        self._emergency_zones: set = set()  # zones already reported to the emergency bus
+        self._weather: Optional[Dict[str, Any]] = None  # latest WeatherService snapshot
+
+        self._cache: EvaluationCache[ZoneEvaluationResult] = EvaluationCache(
+            ttl_seconds=self.ctx.get("ai", "evaluation_cache", "ttl_seconds", default=30.0),
+            clock=clock.monotonic,
+        )
+        self._sensor_pool = ThreadPoolExecutor(
+            max_workers=self.ctx.get("ai", "sensor_read_workers", default=64),
+            thread_name_prefix="zone-sensors",
+        )
 
         self._load_models()
+        if hasattr(self.ctx, "subscribe"):
+            self.ctx.subscribe(self.on_config_change, ("ai",), ("zones",))
 
-    def _log(self, level: str, msg: str, *args):
+    def _log(self, level: str, msg: str, *args, **fields):
+        # `fields` become structured log fields (see core.logger.TYPED_FIELDS)
         if self.logger:
-            getattr(self.logger, level)(msg, *args)
+            getattr(self.logger, level)(msg, *args, extra=fields or None)
 
     def _load_models(self):
         vision_path = self.models_config.get("vision_health_model")
@@ -57,17 +87,144 @@ class GardenAIEngine:
             hydration_path,
         )
 
-    def evaluate_zone(self, zone_id: int) -> ZoneEvaluationResult:
+    def evaluate_zone(
+        self,
+        zone_id: int,
+        max_age_seconds: Optional[float] = None,
+    ) -> ZoneEvaluationResult:
+        """
+        Cached evaluation. `max_age_seconds` tightens the TTL for callers
+        that need fresher data (0 forces a recompute).
+        """
+        return self._cache.get_or_compute(
+            zone_id,
+            lambda: self._evaluate_zone_uncached(zone_id),
+            max_age_seconds=max_age_seconds,
+        )
+
+    def evaluate_all_zones(
+        self,
+        zone_ids: Optional[Iterable[int]] = None,
+        max_age_seconds: Optional[float] = None,
+    ) -> Dict[int, ZoneEvaluationResult]:
+        """
+        Evaluate every configured zone (or just `zone_ids`) in one pass.
+
+        Zones not fresh in the cache share one config snapshot and one
+        weather snapshot, their sensors are read concurrently, and vision
+        health runs as a single batch. Zones whose evaluation fails are
+        logged and left out of the returned map.
+        """
+        zones_by_id = self.ctx.snapshot().zones_by_id
+        ids = list(zones_by_id) if zone_ids is None else list(zone_ids)
+        return self._cache.get_many_or_compute(
+            ids,
+            lambda missing: self._evaluate_zones_uncached(missing, zones_by_id),
+            max_age_seconds=max_age_seconds,
+        )
+
+    def estimate_visual_health(self, zone_ids: Iterable[int]) -> Dict[int, float]:
+        """Vision health (0–1) per zone, as used by the duration rules."""
+        return self._estimate_visual_health_batch(list(zone_ids))
+
+    # ------------------------------------------------------------
+    # Cache invalidation hooks
+    # ------------------------------------------------------------
+    def on_sensor_reading(self, zone_id: int):
+        self._cache.invalidate(zone_id)
+
+    def on_frame(self, zone_id: int):
+        self._cache.invalidate(zone_id)
+
+    def on_weather_snapshot(self, snapshot: Optional[Dict[str, Any]] = None):
+        if snapshot is not None:
+            self._weather = snapshot
+        self._cache.invalidate_all()
+
+    def on_config_change(self, changed: FrozenSet[Tuple], snapshot: ConfigSnapshot):
+        """
+        Rebuild only what the edit touched: a zone edit drops that zone's
+        cached evaluation, a threshold or model edit drops them all, and a
+        TTL edit just retunes the cache.
+        """
+        sections = {path[:2] for path in changed}
+        whole_ai = ("ai",) in sections
+
+        if whole_ai or ("ai", "evaluation_cache") in sections:
+            self._cache.ttl_seconds = snapshot.get("ai", "evaluation_cache", "ttl_seconds", default=30.0)
+        if whole_ai or ("ai", "thresholds") in sections:
+            self.thresholds = snapshot.get("ai", "thresholds", default={})
+        if whole_ai or sections & {("ai", "models"), ("ai", "runtime")}:
+            self.runtime = snapshot.get("ai", "runtime", default="onnx")
+            self.models_config = snapshot.get("ai", "models", default={})
+            self._load_models()
+
+        affects_all = whole_ai or ("zones",) in sections or sections & {
+            ("ai", "thresholds"), ("ai", "models"), ("ai", "runtime")
+        }
+        if affects_all:
+            self._cache.invalidate_all()
+        else:
+            for path in changed:
+                if path[0] == "zones":
+                    self._cache.invalidate(path[1])
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+    def shutdown(self):
+        self._sensor_pool.shutdown(wait=False)
+
+    def _evaluate_zone_uncached(self, zone_id: int) -> ZoneEvaluationResult:
         zone_config = self._get_zone_config(zone_id)
         sensor_data = self._read_zone_sensors(zone_id)
         weather_data = self._get_weather_snapshot()
         vision_health_score = self._estimate_visual_health(zone_id)
+        return self._fuse(zone_id, zone_config, sensor_data, weather_data, vision_health_score)
 
+    def _evaluate_zones_uncached(
+        self,
+        zone_ids: List[int],
+        zones_by_id: Dict[int, Dict[str, Any]],
+    ) -> Dict[int, ZoneEvaluationResult]:
+        weather_data = self._get_weather_snapshot()
+        known = [z for z in zone_ids if z in zones_by_id]
+        for zone_id in set(zone_ids) - set(known):
+            self._log("error", "Zone %s not found in config", zone_id)
+
+        sensor_futures = {z: self._sensor_pool.submit(self._read_zone_sensors, z) for z in known}
+        health_scores = self._estimate_visual_health_batch(known)
+
+        results: Dict[int, ZoneEvaluationResult] = {}
+        for zone_id in known:
+            try:
+                sensor_data = sensor_futures[zone_id].result()
+                results[zone_id] = self._fuse(
+                    zone_id,
+                    zones_by_id[zone_id],
+                    sensor_data,
+                    weather_data,
+                    health_scores[zone_id],
+                )
+            except Exception as e:
+                self._log("exception", "Error evaluating zone %s: %s", zone_id, e)
+        return results
+
+    def _fuse(
+        self,
+        zone_id: int,
+        zone_config: Dict[str, Any],
+        sensor_data: Dict[str, Any],
+        weather_data: Dict[str, Any],
+        vision_health_score: float,
+    ) -> ZoneEvaluationResult:
         emergency_detected, emergency_reason = self._detect_emergency(
             sensor_data, vision_health_score
         )
+        self._report_emergency(zone_id, emergency_detected, emergency_reason)
 
         base_duration = zone_config["default_schedule"]["base_duration_minutes"]
+        pre_weather_duration = self._health_adjusted_duration(base_duration, vision_health_score)
         ideal_duration = self._compute_ideal_duration(
             base_duration=base_duration,
             sensor_data=sensor_data,
@@ -81,13 +238,17 @@ class GardenAIEngine:
         )
 
         self._log(
-            "info",
+            "debug",
             "Evaluation → zone=%s ideal=%.1fm health=%.2f emergency=%s reason=%s",
             zone_id,
             ideal_duration,
             vision_health_score,
             emergency_detected,
             emergency_reason,
+            zone_id=zone_id,
+            ideal_duration_minutes=ideal_duration,
+            health_score=vision_health_score,
+            emergency=emergency_detected,
         )
 
         return ZoneEvaluationResult(
@@ -97,14 +258,11 @@ class GardenAIEngine:
             emergency_detected=emergency_detected,
             emergency_reason=emergency_reason,
             notes=notes,
+            pre_weather_duration_minutes=pre_weather_duration,
         )
 
     def _get_zone_config(self, zone_id: int) -> Dict[str, Any]:
-        zones = self.ctx.get("zones", default=[])
-        for z in zones:
-            if z.get("id") == zone_id:
-                return z
-        raise ValueError(f"Zone {zone_id} not found in config")
+        return self.ctx.snapshot().zone(zone_id)
 
     def _read_zone_sensors(self, zone_id: int) -> Dict[str, Any]:
         # TODO: wire real sensors per zone
@@ -116,7 +274,9 @@ class GardenAIEngine:
         }
 
     def _get_weather_snapshot(self) -> Dict[str, Any]:
-        # TODO: integrate real weather provider
+        # Latest snapshot pushed by WeatherService (see on_weather_snapshot)
+        if self._weather is not None:
+            return self._weather
         return {
             "temp_c": 30.0,
             "humidity": 0.6,
@@ -128,6 +288,10 @@ class GardenAIEngine:
         # Placeholder: medium-good health
         return 0.75
 
+    def _estimate_visual_health_batch(self, zone_ids: List[int]) -> Dict[int, float]:
+        # TODO: run the ONNX vision model once on a stacked batch of latest frames
+        return {zone_id: self._estimate_visual_health(zone_id) for zone_id in zone_ids}
+
     def _detect_emergency(
         self, sensor_data: Dict[str, Any], health_score: float
     ) -> tuple[bool, Optional[str]]:
@@ -140,6 +304,25 @@ class GardenAIEngine:
         # TODO: add visual pooling detection, abnormal runtime, etc.
         return False, None
 
+    def _report_emergency(self, zone_id: int, detected: bool, reason: Optional[str]):
+        """Publish a zone's emergency once, when it first appears."""
+        if not detected:
+            self._emergency_zones.discard(zone_id)
+            return
+        if zone_id in self._emergency_zones:
+            return
+        self._emergency_zones.add(zone_id)
+        bus = get_emergency_bus()
+        if bus is not None:
+            bus.publish("pressure", reason or "emergency detected", zone_id=zone_id)
+
+    def _health_adjusted_duration(self, base_duration: float, health_score: float) -> float:
+        if health_score < 0.6:
+            return base_duration * 1.3
+        if health_score > 0.85:
+            return base_duration * 0.9
+        return base_duration
+
     def _compute_ideal_duration(
         self,
         base_duration: float,
@@ -147,13 +330,7 @@ class GardenAIEngine:
         weather_data: Dict[str, Any],
         health_score: float,
     ) -> float:
-        duration = base_duration
-
-        # Health-based adjustment
-        if health_score < 0.6:
-            duration *= 1.3
-        elif health_score > 0.85:
-            duration *= 0.9
+        duration = self._health_adjusted_duration(base_duration, health_score)
 
         # Temperature-based adjustment
         temp_c = weather_data.get("temp_c", 25.0)
@@ -173,3 +350,28 @@ class GardenAIEngine:
         duration = max(0.0, min(duration, max_runtime))
 
         return duration
+
+
+def ideal_duration_array(
+    base_duration: np.ndarray,
+    health_score: np.ndarray,
+    temp_c: np.ndarray,
+    rain_probability: np.ndarray,
+    max_runtime: float,
+) -> np.ndarray:
+    """
+    Broadcast version of GardenAIEngine._compute_ideal_duration.
+    Inputs may have any mutually broadcastable shapes; keep the two in sync.
+    """
+    duration = np.asarray(base_duration, dtype=np.float64)
+
+    health = np.asarray(health_score, dtype=np.float64)
+    duration = duration * np.where(health < 0.6, 1.3, np.where(health > 0.85, 0.9, 1.0))
+
+    temp = np.asarray(temp_c, dtype=np.float64)
+    duration = duration * np.where(temp > 32, 1.2, np.where(temp < 10, 0.7, 1.0))
+
+    rain = np.asarray(rain_probability, dtype=np.float64)
+    duration = duration * np.where(rain > 0.6, 0.3, np.where(rain > 0.3, 0.7, 1.0))
+
+    return np.maximum(0.0, np.minimum(duration, max_runtime))
@@ -0,0 +1,185 @@
+"""
+TTL cache with request coalescing for per-zone evaluations.
+
+- Entries expire after `ttl_seconds`
+- Concurrent misses for the same key share one computation
+- invalidate() / invalidate_all() drop entries when new inputs arrive;
+  a computation that started before an invalidation is not stored
+- stats() reports hit rate and compute timings
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generic, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    invalidations: int = 0
+    computations: int = 0
+    errors: int = 0
+    compute_seconds_total: float = 0.0
+    compute_seconds_max: float = 0.0
+    compute_seconds_last: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "computations": self.computations,
+            "errors": self.errors,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "compute_ms_avg": (
+                self.compute_seconds_total / self.computations * 1000 if self.computations else 0.0
+            ),
+            "compute_ms_max": self.compute_seconds_max * 1000,
+            "compute_ms_last": self.compute_seconds_last * 1000,
+        }
+
+
+class EvaluationCache(Generic[T]):
+    def __init__(self, ttl_seconds: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (value, stored_at)
+        self._entries: Dict[Hashable, Tuple[T, float]] = {}
+        self._inflight: Dict[Hashable, Future] = {}
+        # Bumped on invalidation so in-flight results computed from old inputs are discarded
+        self._generation: Dict[Hashable, int] = {}
+        self._global_generation = 0
+        self._stats = CacheStats()
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], T],
+        max_age_seconds: Optional[float] = None,
+    ) -> T:
+        results, errors = self._lookup(
+            [key], lambda keys: {key: compute()}, max_age_seconds
+        )
+        if key in errors:
+            raise errors[key]
+        return results[key]
+
+    def get_many_or_compute(
+        self,
+        keys: Iterable[Hashable],
+        compute_many: Callable[[List[Hashable]], Dict[Hashable, T]],
+        max_age_seconds: Optional[float] = None,
+    ) -> Dict[Hashable, T]:
+        """
+        Fresh entries are returned from the cache, keys already being
+        computed are awaited, and all remaining keys are computed together
+        in one compute_many() call. Keys that compute_many leaves out, or
+        whose coalesced computation failed, are missing from the result.
+        """
+        return self._lookup(keys, compute_many, max_age_seconds)[0]
+
+    def _lookup(
+        self,
+        keys: Iterable[Hashable],
+        compute_many: Callable[[List[Hashable]], Dict[Hashable, T]],
+        max_age_seconds: Optional[float],
+    ) -> Tuple[Dict[Hashable, T], Dict[Hashable, BaseException]]:
+        ttl = self.ttl_seconds if max_age_seconds is None else max_age_seconds
+        results: Dict[Hashable, T] = {}
+        errors: Dict[Hashable, BaseException] = {}
+        waiting: Dict[Hashable, Future] = {}
+        owned: Dict[Hashable, Future] = {}
+
+        with self._lock:
+            now = self._clock()
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and now - entry[1] < ttl:
+                    self._stats.hits += 1
+                    results[key] = entry[0]
+                elif key in self._inflight:
+                    self._stats.coalesced += 1
+                    waiting[key] = self._inflight[key]
+                elif key not in owned:
+                    self._stats.misses += 1
+                    owned[key] = self._inflight[key] = Future()
+            generations = {k: self._generation_of(k) for k in owned}
+
+        if owned:
+            started = time.perf_counter()
+            try:
+                values = compute_many(list(owned))
+            except BaseException as e:
+                with self._lock:
+                    self._stats.errors += 1
+                    for key in owned:
+                        self._inflight.pop(key, None)
+                for future in owned.values():
+                    future.set_exception(e)
+                raise
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                stats = self._stats
+                stats.computations += 1
+                stats.compute_seconds_total += elapsed
+                stats.compute_seconds_last = elapsed
+                stats.compute_seconds_max = max(stats.compute_seconds_max, elapsed)
+                stored_at = self._clock()
+                for key in owned:
+                    self._inflight.pop(key, None)
+                    if key in values and generations[key] == self._generation_of(key):
+                        self._entries[key] = (values[key], stored_at)
+
+            for key, future in owned.items():
+                if key in values:
+                    results[key] = values[key]
+                    future.set_result(values[key])
+                else:
+                    errors[key] = KeyError(key)
+                    future.set_exception(errors[key])
+
+        for key, future in waiting.items():
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                errors[key] = e
+        return results, errors
+
+    def _generation_of(self, key: Hashable) -> Tuple[int, int]:
+        return self._global_generation, self._generation.get(key, 0)
+
+    def peek(self, key: Hashable) -> Optional[T]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() - entry[1] < self.ttl_seconds:
+                return entry[0]
+        return None
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation[key] = self._generation.get(key, 0) + 1
+            self._stats.invalidations += 1
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._global_generation += 1
+            self._stats.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = self._stats.to_dict()
+            data["entries"] = len(self._entries)
+            data["ttl_seconds"] = self.ttl_seconds
+        return data
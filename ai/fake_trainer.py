@@ -0,0 +1,65 @@
+"""
+Stand-in for `yolo train` used when exercising the training job manager.
+
+Accepts the same `key=value` arguments and prints ultralytics-style
+epoch and validation lines. mAP is a deterministic function of `lr0`
+(best near 0.01), so sweeps and early stopping behave predictably.
+
+Environment:
+- FAKE_TRAINER_EPOCH_SECONDS: sleep per epoch (default 0.01)
+- FAKE_TRAINER_FAIL: exit non-zero after the first epoch when set
+"""
+
+import math
+import os
+import sys
+import time
+
+
+def _parse_args(argv):
+    args = {}
+    for item in argv:
+        if "=" in item:
+            key, value = item.split("=", 1)
+            args[key] = value
+    return args
+
+
+def main(argv=None) -> int:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    epochs = int(args.get("epochs", 10))
+    lr0 = float(args.get("lr0", 0.01))
+    epoch_seconds = float(os.getenv("FAKE_TRAINER_EPOCH_SECONDS", "0.01"))
+
+    # Quality peaks at lr0=0.01 and falls off per decade away from it
+    quality = math.exp(-((math.log10(lr0) + 2.0) ** 2))
+    final_map50 = 0.2 + 0.7 * quality
+
+    print("      Epoch    GPU_mem   box_loss   cls_loss   dfl_loss  Instances       Size", flush=True)
+    for epoch in range(1, epochs + 1):
+        progress = 1.0 - math.exp(-epoch / max(1.0, epochs / 4.0))
+        box = 2.0 - 1.2 * progress * quality
+        cls_ = 2.5 - 1.5 * progress * quality
+        dfl = 1.6 - 0.5 * progress * quality
+        map50 = final_map50 * progress
+
+        time.sleep(epoch_seconds)
+        print(
+            f"{epoch:>11}/{epochs:<6} {'0G':>8} {box:>10.4f} {cls_:>10.4f} {dfl:>10.4f} "
+            f"{42:>10} {int(args.get('imgsz', 640)):>10}: 100%",
+            flush=True,
+        )
+        print(
+            f"{'all':>22} {128:>10} {929:>10} {map50 * 1.05:>10.3f} {map50 * 0.9:>10.3f} "
+            f"{map50:>10.3f} {map50 * 0.7:>10.3f}",
+            flush=True,
+        )
+        if os.getenv("FAKE_TRAINER_FAIL"):
+            print("RuntimeError: simulated training failure", flush=True)
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Plant / sun / soil profile registry for hydration scoring.
+
+Profiles are loaded from the `ai.hydration_profiles` config section and
+compiled per zone into a single coefficient: the zone's adjusted ideal
+moisture (ideal moisture x sun modifier x soil modifier). Scoring a
+configured zone then needs no string handling at all.
+
+On config reload, only zones whose plant / sun / soil fields changed are
+recompiled; a change to the profile tables themselves recompiles every zone.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_IDEAL_MOISTURE: Dict[str, float] = {
+    "turf": 55.0,
+    "vegetable": 60.0,
+    "shrub": 50.0,
+    "succulent": 30.0,
+}
+DEFAULT_SUN_MODIFIERS: Dict[str, float] = {
+    "full_sun": 1.1,
+    "partial_shade": 1.0,
+    "shade": 0.9,
+}
+DEFAULT_SOIL_MODIFIERS: Dict[str, float] = {
+    "sandy": 1.1,  # drains faster
+    "loam": 1.0,
+    "clay": 0.9,  # holds water
+}
+DEFAULT_FALLBACKS: Dict[str, Any] = {
+    "ideal_moisture": 50.0,
+    "sun_modifier": 1.0,
+    "soil_modifier": 1.0,
+    "sun_exposure": "partial_shade",
+}
+
+
+@dataclass(frozen=True)
+class CompiledZoneProfile:
+    zone_id: int
+    plant_type: str
+    sun_exposure: str
+    soil_type: str
+    adjusted_ideal_moisture: float
+
+
+class HydrationProfileRegistry:
+    """
+    Profile tables plus one compiled coefficient per configured zone.
+
+    Tables are keyed by lowercase category name. Zones take their plant from
+    `plant_type` (or `grass_type`), plus `sun_exposure` and `soil_type`.
+    """
+
+    def __init__(
+        self,
+        profiles_cfg: Optional[Dict[str, Any]] = None,
+        zones: Iterable[Dict[str, Any]] = (),
+    ):
+        self._lock = threading.Lock()
+        self._tables_cfg: Optional[Dict[str, Any]] = None
+        self._profiles: Dict[int, CompiledZoneProfile] = {}
+        self._zone_keys: Dict[int, Tuple[str, str, str]] = {}
+        # (zone_id -> row, coefficients); one tuple so readers see a matching pair
+        self._index: Tuple[Dict[int, int], np.ndarray] = ({}, np.empty(0))
+
+        self._set_tables(profiles_cfg or {})
+        self._compile_zones(list(zones), force=True)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "HydrationProfileRegistry":
+        return cls(
+            profiles_cfg=config.get("ai", {}).get("hydration_profiles", {}),
+            zones=config.get("zones", []),
+        )
+
+    # ------------------------------------------------------------
+    # Profile tables
+    # ------------------------------------------------------------
+    def _set_tables(self, profiles_cfg: Dict[str, Any]) -> None:
+        def table(key: str, default: Dict[str, float]) -> Dict[str, float]:
+            merged = dict(default)
+            merged.update(profiles_cfg.get(key, {}))
+            return {k.lower(): float(v) for k, v in merged.items()}
+
+        self.ideal_moisture = table("ideal_moisture", DEFAULT_IDEAL_MOISTURE)
+        self.sun_modifiers = table("sun_modifiers", DEFAULT_SUN_MODIFIERS)
+        self.soil_modifiers = table("soil_modifiers", DEFAULT_SOIL_MODIFIERS)
+
+        fallbacks = dict(DEFAULT_FALLBACKS)
+        fallbacks.update(profiles_cfg.get("defaults", {}))
+        self.default_ideal_moisture = float(fallbacks["ideal_moisture"])
+        self.default_sun_modifier = float(fallbacks["sun_modifier"])
+        self.default_soil_modifier = float(fallbacks["soil_modifier"])
+        self.default_sun_exposure = str(fallbacks["sun_exposure"])
+
+        self._tables_cfg = profiles_cfg
+
+    @property
+    def plant_types(self) -> Tuple[str, ...]:
+        return tuple(self.ideal_moisture)
+
+    @property
+    def sun_exposures(self) -> Tuple[str, ...]:
+        return tuple(self.sun_modifiers)
+
+    @property
+    def soil_types(self) -> Tuple[str, ...]:
+        return tuple(self.soil_modifiers)
+
+    def ideal_moisture_table(self) -> np.ndarray:
+        """Indexed by plant code; the last entry is the unknown fallback."""
+        return np.array(list(self.ideal_moisture.values()) + [self.default_ideal_moisture])
+
+    def sun_modifier_table(self) -> np.ndarray:
+        return np.array(list(self.sun_modifiers.values()) + [self.default_sun_modifier])
+
+    def soil_modifier_table(self) -> np.ndarray:
+        return np.array(list(self.soil_modifiers.values()) + [self.default_soil_modifier])
+
+    def adjusted_ideal(self, plant_type: str, sun_exposure: str, soil_type: str) -> float:
+        ideal = self.ideal_moisture.get(plant_type.lower(), self.default_ideal_moisture)
+        sun_mod = self.sun_modifiers.get(sun_exposure.lower(), self.default_sun_modifier)
+        soil_mod = self.soil_modifiers.get(soil_type.lower(), self.default_soil_modifier)
+        return ideal * sun_mod * soil_mod
+
+    # ------------------------------------------------------------
+    # Zone compilation
+    # ------------------------------------------------------------
+    def _zone_key(self, zone_cfg: Dict[str, Any]) -> Tuple[str, str, str]:
+        plant = zone_cfg.get("plant_type") or zone_cfg.get("grass_type") or ""
+        sun = zone_cfg.get("sun_exposure") or self.default_sun_exposure
+        soil = zone_cfg.get("soil_type") or ""
+        return plant.lower(), sun.lower(), soil.lower()
+
+    def _compile_zones(self, zones: List[Dict[str, Any]], force: bool) -> List[int]:
+        """Recompile zones whose key changed (or all if `force`). Returns changed ids."""
+        profiles = dict(self._profiles) if not force else {}
+        keys = dict(self._zone_keys) if not force else {}
+        seen = set()
+        changed: List[int] = []
+
+        for zone_cfg in zones:
+            zone_id = zone_cfg.get("id")
+            if zone_id is None:
+                continue
+            seen.add(zone_id)
+            key = self._zone_key(zone_cfg)
+            if keys.get(zone_id) == key and zone_id in profiles:
+                continue
+            plant, sun, soil = key
+            profiles[zone_id] = CompiledZoneProfile(
+                zone_id=zone_id,
+                plant_type=plant,
+                sun_exposure=sun,
+                soil_type=soil,
+                adjusted_ideal_moisture=self.adjusted_ideal(plant, sun, soil),
+            )
+            keys[zone_id] = key
+            changed.append(zone_id)
+
+        for zone_id in set(profiles) - seen:
+            del profiles[zone_id]
+            del keys[zone_id]
+            changed.append(zone_id)
+
+        rows = {zone_id: row for row, zone_id in enumerate(profiles)}
+        coefficients = np.array([p.adjusted_ideal_moisture for p in profiles.values()])
+
+        # Swap in together so readers never see a half-updated registry
+        self._profiles, self._zone_keys = profiles, keys
+        self._index = (rows, coefficients)
+        return changed
+
+    def update(self, config: Dict[str, Any]) -> List[int]:
+        """
+        Apply a (re)loaded config. Returns the zone ids that were recompiled
+        or removed.
+        """
+        profiles_cfg = config.get("ai", {}).get("hydration_profiles", {})
+        zones = config.get("zones", [])
+        with self._lock:
+            tables_changed = profiles_cfg != self._tables_cfg
+            if tables_changed:
+                self._set_tables(profiles_cfg)
+            return self._compile_zones(zones, force=tables_changed)
+
+    # ------------------------------------------------------------
+    # Hot-path lookups
+    # ------------------------------------------------------------
+    def get(self, zone_id: int) -> CompiledZoneProfile:
+        try:
+            return self._profiles[zone_id]
+        except KeyError:
+            raise ValueError(f"Zone {zone_id} has no compiled hydration profile") from None
+
+    def coefficient(self, zone_id: int) -> float:
+        return self.get(zone_id).adjusted_ideal_moisture
+
+    def coefficients_for(self, zone_ids: Iterable[int]) -> np.ndarray:
+        rows, coefficients = self._index
+        try:
+            idx = np.fromiter((rows[z] for z in zone_ids), dtype=np.intp)
+        except KeyError as e:
+            raise ValueError(f"Zone {e.args[0]} has no compiled hydration profile") from None
+        return coefficients[idx]
+
+    def zone_ids(self) -> List[int]:
+        return list(self._profiles)
@@ -8,11 +8,32 @@ Combines:
 To produce:
 - Hydration score (0–100)
 - Recommendation (WATER_NOW, HOLD, MONITOR)
+
+`score_zone` scores a single zone; `score_zones` scores many zones at once
+from NumPy arrays with categories pre-encoded to integer codes, and gives
+the same scores and recommendations as the scalar path.
+
+Plant / sun / soil profiles come from a HydrationProfileRegistry. Zones
+configured in system_config.json are precompiled there, so
+`score_configured_zone(s)` skip all string handling.
 """
 
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.config_loader import load_system_config
+from ai.hydration_profiles import (
+    DEFAULT_IDEAL_MOISTURE,
+    DEFAULT_SOIL_MODIFIERS,
+    DEFAULT_SUN_MODIFIERS,
+    HydrationProfileRegistry,
+)
+
+if TYPE_CHECKING:
+    from core.app_context import AppContext
 
 
 class HydrationRecommendation(str, Enum):
@@ -51,36 +72,102 @@ class HydrationScoreResult:
     reason: str
 
 
+# Default category vocabularies for the batch path. A category's integer code
+# is its index in the vocabulary; any other value is encoded as
+# len(vocabulary) ("unknown"). Configured profiles may extend these, so
+# prefer HydrationScorer.encode_zones over encoding by hand.
+PLANT_TYPES = tuple(DEFAULT_IDEAL_MOISTURE)
+SUN_EXPOSURES = tuple(DEFAULT_SUN_MODIFIERS)
+SOIL_TYPES = tuple(DEFAULT_SOIL_MODIFIERS)
+
+# Batch recommendation codes index into these
+RECOMMENDATIONS = (
+    HydrationRecommendation.WATER_NOW,
+    HydrationRecommendation.MONITOR,
+    HydrationRecommendation.HOLD,
+)
+RECOMMENDATION_REASONS = (
+    "Soil significantly drier than ideal for this plant and conditions.",
+    "Soil slightly below ideal; monitor based on upcoming weather and usage.",
+    "Soil within or above ideal range; no immediate watering needed.",
+)
+
+
+def encode_categories(values: Sequence[str], vocabulary: Sequence[str]) -> np.ndarray:
+    """
+    Map category strings to integer codes (case-insensitive).
+    Unknown values get code len(vocabulary).
+    """
+    index = {name: code for code, name in enumerate(vocabulary)}
+    unknown = len(vocabulary)
+    return np.fromiter(
+        (index.get(v.lower(), unknown) for v in values),
+        dtype=np.int16,
+        count=len(values),
+    )
+
+
+@dataclass
+class HydrationBatchResult:
+    zone_ids: np.ndarray
+    scores: np.ndarray  # float64, rounded to 0.1 like the scalar path
+    recommendation_codes: np.ndarray  # int8 index into RECOMMENDATIONS
+
+    def recommendations(self) -> List[HydrationRecommendation]:
+        return [RECOMMENDATIONS[c] for c in self.recommendation_codes]
+
+    def to_results(self) -> List[HydrationScoreResult]:
+        return [
+            HydrationScoreResult(
+                zone_id=int(zone_id),
+                score=float(score),
+                recommendation=RECOMMENDATIONS[code],
+                reason=RECOMMENDATION_REASONS[code],
+            )
+            for zone_id, score, code in zip(
+                self.zone_ids.tolist(),
+                self.scores.tolist(),
+                self.recommendation_codes.tolist(),
+            )
+        ]
+
+
+def round_like_python(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    np.round scales and rounds in binary, which can disagree with Python's
+    round() on values sitting exactly at a half step. Redo those few with
+    round() so batch scores match the scalar path bit for bit.
+    """
+    rounded = np.round(values, ndigits)
+    scaled = values * 10.0**ndigits
+    ambiguous = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for i in ambiguous.tolist():
+        rounded.flat[i] = round(float(values.flat[i]), ndigits)
+    return rounded
+
+
 class HydrationScorer:
-    def __init__(self) -> None:
-        # Future: load herbology profiles from config or DB
-        self.base_ideal_moisture = {
-            "turf": 55.0,
-            "vegetable": 60.0,
-            "shrub": 50.0,
-            "succulent": 30.0,
-        }
+    def __init__(self, profiles: Optional[HydrationProfileRegistry] = None) -> None:
+        self.profiles = profiles or HydrationProfileRegistry()
+
+    @property
+    def base_ideal_moisture(self) -> Dict[str, float]:
+        return self.profiles.ideal_moisture
 
     def _get_ideal_moisture(self, plant_type: str) -> float:
-        return self.base_ideal_moisture.get(plant_type.lower(), 50.0)
+        return self.profiles.ideal_moisture.get(
+            plant_type.lower(), self.profiles.default_ideal_moisture
+        )
 
     def _sun_exposure_modifier(self, sun_exposure: str) -> float:
-        exposure = sun_exposure.lower()
-        if exposure == "full_sun":
-            return 1.1
-        if exposure == "partial_shade":
-            return 1.0
-        if exposure == "shade":
-            return 0.9
-        return 1.0
+        return self.profiles.sun_modifiers.get(
+            sun_exposure.lower(), self.profiles.default_sun_modifier
+        )
 
     def _soil_type_modifier(self, soil_type: str) -> float:
-        soil = soil_type.lower()
-        if soil == "sandy":
-            return 1.1  # drains faster
-        if soil == "clay":
-            return 0.9  # holds water
-        return 1.0  # loam / unknown
+        return self.profiles.soil_modifiers.get(
+            soil_type.lower(), self.profiles.default_soil_modifier
+        )
 
     def _weather_dryness_factor(self, weather: WeatherSnapshot) -> float:
         # Higher temp + lower humidity + little rain => higher dryness factor
@@ -91,6 +178,131 @@ class HydrationScorer:
         dryness = 0.4 * temp_factor + 0.4 * humidity_factor + 0.2 * rain_factor
         return max(0.0, min(1.5, dryness))
 
+    def encode_zones(
+        self,
+        plant_types: Sequence[str],
+        sun_exposures: Sequence[str],
+        soil_types: Sequence[str],
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Integer codes for score_zones, using this scorer's profile vocabularies."""
+        return (
+            encode_categories(plant_types, self.profiles.plant_types),
+            encode_categories(sun_exposures, self.profiles.sun_exposures),
+            encode_categories(soil_types, self.profiles.soil_types),
+        )
+
+    def score_zones(
+        self,
+        zone_ids: np.ndarray,
+        soil_moisture: np.ndarray,
+        plant_codes: np.ndarray,
+        sun_codes: np.ndarray,
+        soil_codes: np.ndarray,
+        temperature_c: np.ndarray,
+        humidity: np.ndarray,
+        recent_rain_mm_24h: np.ndarray,
+        forecast_rain_mm_24h: np.ndarray,
+    ) -> HydrationBatchResult:
+        """
+        Vectorized score_zone over N zones.
+
+        Category arguments are integer codes (see encode_zones).
+        Weather arguments may be length-N arrays or scalars shared by all zones.
+        Follows score_zone operation for operation so results are identical.
+        """
+        ideal = self.profiles.ideal_moisture_table()[plant_codes]
+        sun_mod = self.profiles.sun_modifier_table()[sun_codes]
+        soil_mod = self.profiles.soil_modifier_table()[soil_codes]
+
+        return self._score_batch(
+            zone_ids,
+            ideal * sun_mod * soil_mod,
+            soil_moisture,
+            temperature_c,
+            humidity,
+            recent_rain_mm_24h,
+            forecast_rain_mm_24h,
+        )
+
+    def score_configured_zones(
+        self,
+        zone_ids: Sequence[int],
+        soil_moisture: np.ndarray,
+        temperature_c: np.ndarray,
+        humidity: np.ndarray,
+        recent_rain_mm_24h: np.ndarray,
+        forecast_rain_mm_24h: np.ndarray,
+    ) -> HydrationBatchResult:
+        """score_zones for configured zones, using their compiled coefficients."""
+        return self._score_batch(
+            np.asarray(zone_ids),
+            self.profiles.coefficients_for(zone_ids),
+            soil_moisture,
+            temperature_c,
+            humidity,
+            recent_rain_mm_24h,
+            forecast_rain_mm_24h,
+        )
+
+    def _score_batch(
+        self,
+        zone_ids: np.ndarray,
+        adjusted_ideal: np.ndarray,
+        soil_moisture: np.ndarray,
+        temperature_c: np.ndarray,
+        humidity: np.ndarray,
+        recent_rain_mm_24h: np.ndarray,
+        forecast_rain_mm_24h: np.ndarray,
+    ) -> HydrationBatchResult:
+        moisture = np.asarray(soil_moisture, dtype=np.float64)
+        rain = np.asarray(recent_rain_mm_24h, dtype=np.float64) + np.asarray(
+            forecast_rain_mm_24h, dtype=np.float64
+        )
+        weather_dryness = self.weather_dryness_array(temperature_c, humidity, rain)
+        score = self.moisture_score_array(moisture - adjusted_ideal)
+        score = self.apply_dryness(score, weather_dryness)
+        codes = self.recommendation_codes(score)
+
+        return HydrationBatchResult(
+            zone_ids=np.asarray(zone_ids),
+            scores=round_like_python(score, 1),
+            recommendation_codes=codes,
+        )
+
+    # Array building blocks shared by the batch and scenario paths. Together
+    # they follow score_zone / _score operation for operation.
+    @staticmethod
+    def weather_dryness_array(
+        temperature_c: np.ndarray, humidity: np.ndarray, total_rain_mm: np.ndarray
+    ) -> np.ndarray:
+        temp = np.asarray(temperature_c, dtype=np.float64)
+        hum = np.asarray(humidity, dtype=np.float64)
+        temp_factor = (temp - 15) / 20
+        humidity_factor = (50 - hum) / 50
+        rain_factor = np.maximum(0.0, 1.0 - np.asarray(total_rain_mm, dtype=np.float64) / 10)
+        dryness = 0.4 * temp_factor + 0.4 * humidity_factor + 0.2 * rain_factor
+        return np.maximum(0.0, np.minimum(1.5, dryness))
+
+    @staticmethod
+    def moisture_score_array(diff: np.ndarray) -> np.ndarray:
+        return np.where(
+            diff >= 0,
+            100 - np.minimum(diff, 40) * 0.8,
+            100 + np.maximum(diff, -60) * 1.2,
+        )
+
+    @staticmethod
+    def apply_dryness(score: np.ndarray, weather_dryness: np.ndarray) -> np.ndarray:
+        score = score - weather_dryness * 10
+        return np.maximum(0.0, np.minimum(100.0, score))
+
+    @staticmethod
+    def recommendation_codes(score: np.ndarray) -> np.ndarray:
+        codes = np.full(np.shape(score), 2, dtype=np.int8)
+        codes[score < 70] = 1
+        codes[score < 40] = 0
+        return codes
+
     def score_zone(
         self,
         zone: ZoneContext,
@@ -100,9 +312,27 @@ class HydrationScorer:
         ideal = self._get_ideal_moisture(zone.plant_type)
         sun_mod = self._sun_exposure_modifier(zone.sun_exposure)
         soil_mod = self._soil_type_modifier(zone.soil_type)
-        weather_dryness = self._weather_dryness_factor(weather)
 
         adjusted_ideal = ideal * sun_mod * soil_mod
+        return self._score(zone.zone_id, adjusted_ideal, sensor, weather)
+
+    def score_configured_zone(
+        self,
+        zone_id: int,
+        sensor: SensorSnapshot,
+        weather: WeatherSnapshot,
+    ) -> HydrationScoreResult:
+        """score_zone for a configured zone, using its compiled coefficient."""
+        return self._score(zone_id, self.profiles.coefficient(zone_id), sensor, weather)
+
+    def _score(
+        self,
+        zone_id: int,
+        adjusted_ideal: float,
+        sensor: SensorSnapshot,
+        weather: WeatherSnapshot,
+    ) -> HydrationScoreResult:
+        weather_dryness = self._weather_dryness_factor(weather)
 
         # Difference between current and ideal
         diff = sensor.soil_moisture - adjusted_ideal
@@ -131,7 +361,7 @@ class HydrationScorer:
             reason = "Soil within or above ideal range; no immediate watering needed."
 
         return HydrationScoreResult(
-            zone_id=zone.zone_id,
+            zone_id=zone_id,
             score=round(score, 1),
             recommendation=recommendation,
             reason=reason,
@@ -142,8 +372,24 @@ class HydrationScorer:
 _hydration_scorer: Optional[HydrationScorer] = None
 
 
-def get_hydration_scorer() -> HydrationScorer:
+def get_hydration_scorer(ctx: Optional["AppContext"] = None) -> HydrationScorer:
+    """
+    Profiles come from the app context when one is given (and follow its
+    config reloads), otherwise from config/system_config.json.
+    """
     global _hydration_scorer
     if _hydration_scorer is None:
-        _hydration_scorer = HydrationScorer()
+        if ctx is not None:
+            profiles = HydrationProfileRegistry.from_config(ctx.config)
+            ctx.subscribe(
+                lambda changed, snapshot: profiles.update(snapshot.data),
+                ("zones",),
+                ("ai", "hydration_profiles"),
+            )
+        else:
+            try:
+                profiles = HydrationProfileRegistry.from_config(load_system_config())
+            except FileNotFoundError:
+                profiles = HydrationProfileRegistry()
+        _hydration_scorer = HydrationScorer(profiles)
     return _hydration_scorer
@@ -0,0 +1,231 @@
+"""
+What-if forecast scenarios.
+
+Evaluates the watering-duration rules (GardenAIEngine) and the hydration
+scoring rules (HydrationScorer) over the cartesian product of
+temperature x humidity x rain grids for every zone, as broadcast NumPy
+operations instead of per-scenario Python calls.
+
+The result is a compact cube:
+- duration_minutes: (zones, temps, rains) float32, since duration ignores humidity
+- score_tenths:     (zones, temps, humidities, rains) int16, score x 10
+- recommendation:   (zones, temps, humidities, rains) int8 codes
+
+    "ai": {"scenarios": {"max_cells": 32000000, "max_cache_mb": 256}}
+
+`max_cells` caps one cube (zones x temps x humidities x rains, about 3
+bytes a cell); the default covers 200 zones at 50 points per axis.
+Cached cubes are evicted oldest first past `max_cache_mb`.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from core.app_context import AppContext
+from ai.engine import GardenAIEngine, ideal_duration_array
+from ai.hydration_scorer import RECOMMENDATIONS, HydrationScorer, round_like_python
+
+# Forecast rain (mm) treated as certain rain when mapping onto the
+# rain-probability rule of the duration engine
+RAIN_MM_CERTAIN = 10.0
+DEFAULT_SOIL_MOISTURE = 50.0
+# Cells scored per broadcast pass (at least one zone); bounds the
+# float64 temporaries on big grids
+CHUNK_CELLS = 1_000_000
+MAX_CELLS = 32_000_000
+MAX_CACHE_MB = 256.0
+
+_RECOMMENDATION_VALUES = np.array([r.value for r in RECOMMENDATIONS])
+
+
+@dataclass
+class ScenarioCube:
+    zone_ids: np.ndarray
+    temperatures_c: np.ndarray
+    humidities: np.ndarray  # percent, 0–100
+    rain_mm: np.ndarray
+    duration_minutes: np.ndarray
+    score_tenths: np.ndarray
+    recommendation_codes: np.ndarray
+    elapsed_seconds: float = 0.0
+    scenario_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+
+    @property
+    def shape(self) -> tuple:
+        return self.score_tenths.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.duration_minutes.nbytes + self.score_tenths.nbytes + self.recommendation_codes.nbytes
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "scenario_id": self.scenario_id,
+            "zone_ids": self.zone_ids.tolist(),
+            "temperatures_c": self.temperatures_c.tolist(),
+            "humidities": self.humidities.tolist(),
+            "rain_mm": self.rain_mm.tolist(),
+            "shape": list(self.shape),
+            "nbytes": self.nbytes,
+            "elapsed_ms": round(self.elapsed_seconds * 1000, 1),
+        }
+
+    def _axis_index(self, axis: np.ndarray, value: Optional[float]):
+        if value is None:
+            return slice(None)
+        return int(np.abs(axis - value).argmin())
+
+    def slice(
+        self,
+        zone_id: Optional[int] = None,
+        temperature_c: Optional[float] = None,
+        humidity: Optional[float] = None,
+        rain_mm: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Select along any subset of axes (nearest grid value); omitted axes
+        are returned in full. Values come back as nested lists.
+        """
+        if zone_id is None:
+            zi = slice(None)
+        else:
+            matches = np.flatnonzero(self.zone_ids == zone_id)
+            if matches.size == 0:
+                raise KeyError(zone_id)
+            zi = int(matches[0])
+        ti = self._axis_index(self.temperatures_c, temperature_c)
+        hi = self._axis_index(self.humidities, humidity)
+        ri = self._axis_index(self.rain_mm, rain_mm)
+
+        return {
+            "zone_ids": np.atleast_1d(self.zone_ids[zi]).tolist(),
+            "temperatures_c": np.atleast_1d(self.temperatures_c[ti]).tolist(),
+            "humidities": np.atleast_1d(self.humidities[hi]).tolist(),
+            "rain_mm": np.atleast_1d(self.rain_mm[ri]).tolist(),
+            "duration_minutes": np.round(self.duration_minutes[zi, ti, ri].astype(np.float64), 2).tolist(),
+            "score": (self.score_tenths[zi, ti, hi, ri] / 10.0).tolist(),
+            "recommendation": _RECOMMENDATION_VALUES[self.recommendation_codes[zi, ti, hi, ri]].tolist(),
+        }
+
+
+class ScenarioEngine:
+    """
+    Builds ScenarioCubes for configured zones and keeps the most recent
+    ones so the API can slice them after the fact.
+    """
+
+    def __init__(
+        self,
+        ctx: AppContext,
+        ai_engine: GardenAIEngine,
+        scorer: HydrationScorer,
+        max_cached_cubes: int = 8,
+    ):
+        self.ctx = ctx
+        self.ai_engine = ai_engine
+        self.scorer = scorer
+        self.max_cached_cubes = max_cached_cubes
+
+        self._cubes: "OrderedDict[str, ScenarioCube]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def evaluate(
+        self,
+        temperatures_c: Sequence[float],
+        humidities: Sequence[float],
+        rain_mm: Sequence[float],
+        zone_ids: Optional[Iterable[int]] = None,
+        soil_moisture: Optional[Dict[int, float]] = None,
+        recent_rain_mm: float = 0.0,
+    ) -> ScenarioCube:
+        started = time.perf_counter()
+
+        zones = self.ctx.get("zones", default=[])
+        if zone_ids is not None:
+            wanted = set(zone_ids)
+            zones = [z for z in zones if z.get("id") in wanted]
+        ids = np.array([z["id"] for z in zones], dtype=np.int64)
+
+        temps = np.asarray(temperatures_c, dtype=np.float64)
+        hums = np.asarray(humidities, dtype=np.float64)
+        rains = np.asarray(rain_mm, dtype=np.float64)
+        if min(temps.size, hums.size, rains.size) == 0:
+            raise ValueError("every axis needs at least one value")
+        cells = len(ids) * temps.size * hums.size * rains.size
+        max_cells = self.ctx.get("ai", "scenarios", "max_cells", default=MAX_CELLS)
+        if cells > max_cells:
+            raise ValueError(f"scenario has {cells} cells, limit is {max_cells} (ai.scenarios.max_cells)")
+
+        # Duration rules: (zones, temps, rains)
+        base = np.array([z["default_schedule"]["base_duration_minutes"] for z in zones], dtype=np.float64)
+        health_by_zone = self.ai_engine.estimate_visual_health(ids.tolist())
+        health = np.array([health_by_zone[int(z)] for z in ids], dtype=np.float64)
+        max_runtime = self.ai_engine.thresholds.get("max_continuous_runtime_minutes", 60)
+        duration = ideal_duration_array(
+            base[:, None, None],
+            health[:, None, None],
+            temps[None, :, None],
+            np.clip(rains / RAIN_MM_CERTAIN, 0.0, 1.0)[None, None, :],
+            max_runtime,
+        ).astype(np.float32)
+
+        # Scoring rules: per-zone moisture score minus a shared (temps, hums, rains) dryness grid
+        dryness = self.scorer.weather_dryness_array(
+            temps[:, None, None], hums[None, :, None], recent_rain_mm + rains[None, None, :]
+        )
+        moisture_map = soil_moisture or {}
+        moisture = np.array([moisture_map.get(int(z), DEFAULT_SOIL_MOISTURE) for z in ids])
+        adjusted_ideal = self.scorer.profiles.coefficients_for(ids.tolist())
+        zone_score = self.scorer.moisture_score_array(moisture - adjusted_ideal)
+
+        shape = (len(ids), len(temps), len(hums), len(rains))
+        score_tenths = np.empty(shape, dtype=np.int16)
+        codes = np.empty(shape, dtype=np.int8)
+        zone_chunk = max(1, CHUNK_CELLS // dryness.size)
+        for start in range(0, len(ids), zone_chunk):
+            chunk = slice(start, start + zone_chunk)
+            score = self.scorer.apply_dryness(zone_score[chunk, None, None, None], dryness[None])
+            codes[chunk] = self.scorer.recommendation_codes(score)
+            score_tenths[chunk] = np.rint(round_like_python(score, 1) * 10)
+
+        cube = ScenarioCube(
+            zone_ids=ids,
+            temperatures_c=temps,
+            humidities=hums,
+            rain_mm=rains,
+            duration_minutes=duration,
+            score_tenths=score_tenths,
+            recommendation_codes=codes,
+            elapsed_seconds=time.perf_counter() - started,
+        )
+        self._store(cube)
+        return cube
+
+    def _store(self, cube: ScenarioCube) -> None:
+        max_bytes = self.ctx.get("ai", "scenarios", "max_cache_mb", default=MAX_CACHE_MB) * 1024 * 1024
+        with self._lock:
+            self._cubes[cube.scenario_id] = cube
+            total = sum(c.nbytes for c in self._cubes.values())
+            # The newest cube is always kept, even when it alone is over the budget
+            while len(self._cubes) > 1 and (len(self._cubes) > self.max_cached_cubes or total > max_bytes):
+                _, evicted = self._cubes.popitem(last=False)
+                total -= evicted.nbytes
+
+    def get(self, scenario_id: str) -> Optional[ScenarioCube]:
+        with self._lock:
+            return self._cubes.get(scenario_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [c.describe() for c in self._cubes.values()]
+
+
+def grid(start: float, stop: float, steps: int) -> np.ndarray:
+    """Inclusive evenly spaced grid, e.g. grid(10, 40, 50)."""
+    return np.linspace(start, stop, steps)
@@ -1,4 +1,437 @@
+"""
+Training job manager for YOLO model runs.
+
+Responsibilities:
+- Launch `yolo train` runs as non-blocking subprocesses
+- Parse console progress into structured per-epoch metrics
+- Run grid / random hyperparameter sweeps with a concurrency cap
+- Cache completed configurations so sweeps can be resumed
+- Stop hopeless runs early based on intermediate metrics
+
+The trainer command is pluggable, so `ai/fake_trainer.py` can stand in
+for ultralytics when exercising the manager without a GPU.
+"""
+
+import hashlib
+import itertools
+import json
+import logging
 import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+YOLO_TRAIN_COMMAND: List[str] = ["yolo", "train"]
+FAKE_TRAIN_COMMAND: List[str] = [sys.executable, str(Path(__file__).with_name("fake_trainer.py"))]
+
+# "  3/100   1.93G   1.216   1.626   1.143   155   640: 100%|..."
+_EPOCH_LINE = re.compile(
+    r"^\s*(\d+)/(\d+)\s+\S+\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)\s+\d+\s+\d+"
+)
+# "   all   128   929   0.673   0.531   0.614   0.453"
+_VAL_LINE = re.compile(
+    r"^\s*all\s+\d+\s+\d+\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)\s*$"
+)
+
+
+@dataclass
+class TrainingConfig:
+    model: str = "yolov8n.pt"
+    data: str = "data.yaml"
+    epochs: int = 100
+    imgsz: int = 640
+    # Any other `yolo train` argument, e.g. {"lr0": 0.01, "batch": 16}
+    overrides: Dict[str, Any] = field(default_factory=dict)
+
+    def to_args(self) -> List[str]:
+        args = {
+            "model": self.model,
+            "data": self.data,
+            "epochs": self.epochs,
+            "imgsz": self.imgsz,
+        }
+        args.update(self.overrides)
+        return [f"{k}={v}" for k, v in args.items()]
+
+    def cache_key(self) -> str:
+        payload = json.dumps(asdict(self), sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class EpochMetrics:
+    epoch: int
+    total_epochs: int
+    box_loss: float
+    cls_loss: float
+    dfl_loss: float
+    precision: float = 0.0
+    recall: float = 0.0
+    map50: float = 0.0
+    map50_95: float = 0.0
+
+
+@dataclass
+class TrainingResult:
+    config: TrainingConfig
+    status: str  # "completed", "stopped_early", "failed", "cancelled", "cached"
+    return_code: Optional[int]
+    history: List[EpochMetrics]
+    duration_seconds: float
+    log_tail: List[str] = field(default_factory=list)
+
+    @property
+    def best_map50(self) -> float:
+        return max((m.map50 for m in self.history), default=0.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["best_map50"] = self.best_map50
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TrainingResult":
+        return cls(
+            config=TrainingConfig(**data["config"]),
+            status=data["status"],
+            return_code=data.get("return_code"),
+            history=[EpochMetrics(**m) for m in data.get("history", [])],
+            duration_seconds=data.get("duration_seconds", 0.0),
+            log_tail=data.get("log_tail", []),
+        )
+
+
+class ProgressParser:
+    """
+    Incremental parser for ultralytics console output.
+
+    An epoch is emitted once its validation ("all ...") line arrives,
+    so every EpochMetrics carries both losses and mAP.
+    """
+
+    def __init__(self) -> None:
+        self._pending: Optional[EpochMetrics] = None
+
+    def feed(self, line: str) -> Optional[EpochMetrics]:
+        match = _EPOCH_LINE.match(line)
+        if match:
+            epoch, total, box, cls_, dfl = match.groups()
+            self._pending = EpochMetrics(
+                epoch=int(epoch),
+                total_epochs=int(total),
+                box_loss=float(box),
+                cls_loss=float(cls_),
+                dfl_loss=float(dfl),
+            )
+            return None
+
+        match = _VAL_LINE.match(line)
+        if match and self._pending is not None:
+            p, r, m50, m5095 = (float(v) for v in match.groups())
+            metrics = self._pending
+            metrics.precision = p
+            metrics.recall = r
+            metrics.map50 = m50
+            metrics.map50_95 = m5095
+            self._pending = None
+            return metrics
+
+        return None
+
+
+@dataclass
+class EarlyStopPolicy:
+    """
+    Stop a run when it cannot plausibly win the sweep.
+
+    - patience: epochs without map50 improvement before stopping
+    - min_fraction_of_best: after `min_epochs`, stop if this run's best map50
+      is below this fraction of the best map50 any run reached by the same epoch
+    """
+
+    min_epochs: int = 3
+    patience: int = 10
+    min_fraction_of_best: float = 0.5
+
+
+class TrainingCache:
+    """JSON file cache of finished runs keyed by TrainingConfig.cache_key()."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+
+    def get(self, config: TrainingConfig) -> Optional[TrainingResult]:
+        with self._lock:
+            entry = self._entries.get(config.cache_key())
+        return TrainingResult.from_dict(entry) if entry else None
+
+    def put(self, result: TrainingResult) -> None:
+        with self._lock:
+            self._entries[result.config.cache_key()] = result.to_dict()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=2)
+            os.replace(tmp, self.path)
+
+
+class TrainingJob:
+    """
+    A single training subprocess.
+
+    `wait()` blocks until the run finishes; `cancel()` terminates it.
+    Metrics are available through `history` while the run is in progress.
+    """
+
+    def __init__(
+        self,
+        config: TrainingConfig,
+        command: Sequence[str] = YOLO_TRAIN_COMMAND,
+        env: Optional[Dict[str, str]] = None,
+        on_epoch: Optional[Callable[["TrainingJob", EpochMetrics], bool]] = None,
+        log_tail_lines: int = 50,
+    ):
+        self.config = config
+        self.command = list(command) + config.to_args()
+        self.env = env
+        self.on_epoch = on_epoch
+
+        self.history: List[EpochMetrics] = []
+        self._log_tail: deque = deque(maxlen=log_tail_lines)
+        self._proc: Optional[subprocess.Popen] = None
+        self._stop_reason: Optional[str] = None
+        self._done = threading.Event()
+        self._result: Optional[TrainingResult] = None
+
+    def run(self) -> TrainingResult:
+        started = time.monotonic()
+        if self._stop_reason is not None:
+            # Cancelled while still queued: never start the trainer
+            return self._finish(self._stop_reason, None, started)
+        env = dict(os.environ, **self.env) if self.env else None
+        try:
+            self._proc = subprocess.Popen(
+                self.command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+                env=env,
+            )
+        except OSError as e:
+            self._log_tail.append(str(e))
+            return self._finish("failed", None, started)
+        if self._stop_reason is not None:
+            # cancel() raced with the launch
+            self._proc.terminate()
+
+        parser = ProgressParser()
+        assert self._proc.stdout is not None
+        for line in self._proc.stdout:
+            line = line.rstrip("\n")
+            if line:
+                self._log_tail.append(line)
+            metrics = parser.feed(line)
+            if metrics is None:
+                continue
+            self.history.append(metrics)
+            if self.on_epoch is not None and self._stop_reason is None:
+                if not self.on_epoch(self, metrics):
+                    self._terminate("stopped_early")
+
+        return_code = self._proc.wait()
+        if self._stop_reason is not None:
+            status = self._stop_reason
+        else:
+            status = "completed" if return_code == 0 else "failed"
+        return self._finish(status, return_code, started)
+
+    def _finish(self, status: str, return_code: Optional[int], started: float) -> TrainingResult:
+        self._result = TrainingResult(
+            config=self.config,
+            status=status,
+            return_code=return_code,
+            history=list(self.history),
+            duration_seconds=time.monotonic() - started,
+            log_tail=list(self._log_tail),
+        )
+        self._done.set()
+        return self._result
+
+    def _terminate(self, reason: str) -> None:
+        self._stop_reason = reason
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.terminate()
+
+    def cancel(self) -> None:
+        self._terminate("cancelled")
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[TrainingResult]:
+        self._done.wait(timeout)
+        return self._result
+
+
+def grid_sweep(base: TrainingConfig, space: Dict[str, Iterable[Any]]) -> List[TrainingConfig]:
+    """Every combination of the values in `space`, applied as overrides to `base`."""
+    keys = list(space.keys())
+    configs = []
+    for values in itertools.product(*(list(space[k]) for k in keys)):
+        configs.append(_with_params(base, dict(zip(keys, values))))
+    return configs
+
+
+def random_sweep(
+    base: TrainingConfig,
+    space: Dict[str, Iterable[Any]],
+    n_trials: int,
+    seed: Optional[int] = None,
+) -> List[TrainingConfig]:
+    """`n_trials` distinct random combinations drawn from `space`."""
+    grid = grid_sweep(base, space)
+    rng = random.Random(seed)
+    return rng.sample(grid, min(n_trials, len(grid)))
+
+
+def _with_params(base: TrainingConfig, params: Dict[str, Any]) -> TrainingConfig:
+    fields = {"model", "data", "epochs", "imgsz"}
+    direct = {k: v for k, v in params.items() if k in fields}
+    overrides = dict(base.overrides)
+    overrides.update({k: v for k, v in params.items() if k not in fields})
+    return TrainingConfig(
+        model=direct.get("model", base.model),
+        data=direct.get("data", base.data),
+        epochs=direct.get("epochs", base.epochs),
+        imgsz=direct.get("imgsz", base.imgsz),
+        overrides=overrides,
+    )
+
+
+class TrainingJobManager:
+    """
+    Runs training jobs in the background with a concurrency cap.
+
+    - submit() returns a Future immediately
+    - run_sweep() blocks until every configuration is finished
+    - Completed configurations are served from the cache
+    - Runs that fall behind the sweep are terminated early
+    """
+
+    def __init__(
+        self,
+        command: Sequence[str] = YOLO_TRAIN_COMMAND,
+        max_concurrent: Optional[int] = None,
+        cache_path: Optional[Path] = Path("runs/sweep_cache.json"),
+        early_stop: Optional[EarlyStopPolicy] = None,
+        env: Optional[Dict[str, str]] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.command = list(command)
+        self.max_concurrent = max_concurrent or os.cpu_count() or 1
+        self.cache = TrainingCache(cache_path) if cache_path else None
+        self.early_stop = early_stop if early_stop is not None else EarlyStopPolicy()
+        self.env = env
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent, thread_name_prefix="training-job"
+        )
+        self._lock = threading.Lock()
+        self._best_by_epoch: Dict[int, float] = {}
+        self._jobs: Dict[str, TrainingJob] = {}
+
+    def submit(self, config: TrainingConfig) -> "Future[TrainingResult]":
+        cached = self.cache.get(config) if self.cache else None
+        if cached is not None:
+            cached.status = "cached"
+            self._record_history(cached.history)
+            future: "Future[TrainingResult]" = Future()
+            future.set_result(cached)
+            return future
+
+        job = TrainingJob(config, command=self.command, env=self.env, on_epoch=self._on_epoch)
+        with self._lock:
+            self._jobs[config.cache_key()] = job
+        return self._executor.submit(self._run_job, job)
+
+    def run_sweep(self, configs: Iterable[TrainingConfig]) -> List[TrainingResult]:
+        futures = [self.submit(c) for c in configs]
+        return [f.result() for f in futures]
+
+    def best(self, results: Iterable[TrainingResult]) -> Optional[TrainingResult]:
+        return max(results, key=lambda r: r.best_map50, default=None)
+
+    def cancel_all(self) -> None:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel()
+
+    def shutdown(self, cancel: bool = False) -> None:
+        if cancel:
+            self.cancel_all()
+        self._executor.shutdown(wait=True)
+
+    def _run_job(self, job: TrainingJob) -> TrainingResult:
+        self.logger.info("Training started: %s", " ".join(job.command))
+        result = job.run()
+        with self._lock:
+            self._jobs.pop(job.config.cache_key(), None)
+
+        self.logger.info(
+            "Training %s: epochs=%d best_map50=%.3f duration=%.1fs",
+            result.status,
+            len(result.history),
+            result.best_map50,
+            result.duration_seconds,
+        )
+        # Early-stopped runs are still final for this config; failures are retried.
+        if self.cache and result.status in ("completed", "stopped_early"):
+            self.cache.put(result)
+        return result
+
+    def _record_history(self, history: Iterable[EpochMetrics]) -> None:
+        with self._lock:
+            for m in history:
+                if m.map50 > self._best_by_epoch.get(m.epoch, 0.0):
+                    self._best_by_epoch[m.epoch] = m.map50
+
+    def _on_epoch(self, job: TrainingJob, metrics: EpochMetrics) -> bool:
+        """Return False to stop the job."""
+        self._record_history([metrics])
+        policy = self.early_stop
+        if policy is None or metrics.epoch < policy.min_epochs:
+            return True
+
+        best_epoch = max(range(len(job.history)), key=lambda i: job.history[i].map50)
+        if len(job.history) - 1 - best_epoch >= policy.patience:
+            return False
+
+        own_best = job.history[best_epoch].map50
+        with self._lock:
+            sweep_best = self._best_by_epoch.get(metrics.epoch, 0.0)
+        return own_best >= policy.min_fraction_of_best * sweep_best
+
 
-def train(model="yolov8n.pt", data="data.yaml"):
-    os.system(f"yolo train model={model} data={data} epochs=100 imgsz=640")
+def train(
+    model: str = "yolov8n.pt",
+    data: str = "data.yaml",
+    epochs: int = 100,
+    imgsz: int = 640,
+    **overrides: Any,
+) -> TrainingResult:
+    """Run a single training job to completion and return its metrics."""
+    config = TrainingConfig(model=model, data=data, epochs=epochs, imgsz=imgsz, overrides=overrides)
+    return TrainingJob(config).run()
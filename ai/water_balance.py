@@ -0,0 +1,324 @@
+"""
+Daily soil water balance simulator (FAO-56 style root-zone depletion).
+
+For every zone and day:
+    depletion = depletion - effective_rain - irrigation + ETc * Ks
+clamped to [0, TAW], where
+- ET0 comes from Hargreaves (tmin / tmax / latitude) unless supplied directly
+- ETc = ET0 * crop coefficient of the zone's plant
+- TAW = available water per metre of soil x root depth
+- Ks reduces ET once depletion passes the readily available water (RAW)
+
+State is a (zones,) array stepped over days, so a full year for 10k zones
+is a few hundred vectorized updates. Weather and irrigation history are
+read from CSV files so backtests run fully offline.
+
+Weather CSV columns:    date, tmin_c, tmax_c, rain_mm[, et0_mm]
+Irrigation CSV columns: date, zone_id, minutes
+"""
+
+import csv
+import datetime as dt
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+# Available water capacity (mm of water per m of soil) and allowed depletion fraction
+DEFAULT_SOILS: Dict[str, Dict[str, float]] = {
+    "sandy": {"available_water_mm_per_m": 70.0, "allowed_depletion": 0.4},
+    "loam": {"available_water_mm_per_m": 150.0, "allowed_depletion": 0.5},
+    "clay": {"available_water_mm_per_m": 190.0, "allowed_depletion": 0.55},
+}
+DEFAULT_CROP_COEFFICIENTS: Dict[str, float] = {
+    "turf": 0.8,
+    "bermuda": 0.75,
+    "st_augustine": 0.8,
+    "vegetable": 1.0,
+    "shrub": 0.6,
+    "succulent": 0.3,
+}
+DEFAULT_ROOT_DEPTH_M: Dict[str, float] = {
+    "turf": 0.15,
+    "bermuda": 0.2,
+    "st_augustine": 0.15,
+    "vegetable": 0.3,
+    "shrub": 0.45,
+    "succulent": 0.2,
+}
+FALLBACK_SOIL = "loam"
+FALLBACK_CROP_COEFFICIENT = 0.8
+FALLBACK_ROOT_DEPTH_M = 0.2
+# Fraction of daily rain that reaches the root zone
+EFFECTIVE_RAIN_FRACTION = 0.8
+
+
+@dataclass
+class ZoneSoilParams:
+    """Per-zone parameter arrays, all shaped (zones,)."""
+
+    zone_ids: np.ndarray
+    taw_mm: np.ndarray  # total available water in the root zone
+    raw_mm: np.ndarray  # readily available water (depletion before stress)
+    crop_coefficient: np.ndarray
+    precip_rate_mm_per_hour: np.ndarray
+
+    @classmethod
+    def from_zones(
+        cls,
+        zones: Iterable[Dict[str, Any]],
+        balance_cfg: Optional[Dict[str, Any]] = None,
+    ) -> "ZoneSoilParams":
+        """
+        Build parameters from `zones` config entries (soil_type, plant_type /
+        grass_type, optional precip_rate_mm_per_hour) and the optional
+        `ai.water_balance` config section.
+        """
+        cfg = balance_cfg or {}
+        soils = dict(DEFAULT_SOILS, **cfg.get("soils", {}))
+        kc = dict(DEFAULT_CROP_COEFFICIENTS, **cfg.get("crop_coefficients", {}))
+        roots = dict(DEFAULT_ROOT_DEPTH_M, **cfg.get("root_depth_m", {}))
+        default_rate = float(cfg.get("precip_rate_mm_per_hour", 12.0))
+
+        ids, taw, raw, crop, rate = [], [], [], [], []
+        for z in zones:
+            plant = (z.get("plant_type") or z.get("grass_type") or "").lower()
+            soil = soils.get((z.get("soil_type") or "").lower(), soils[FALLBACK_SOIL])
+            zone_taw = soil["available_water_mm_per_m"] * roots.get(plant, FALLBACK_ROOT_DEPTH_M)
+            ids.append(z["id"])
+            taw.append(zone_taw)
+            raw.append(zone_taw * soil["allowed_depletion"])
+            crop.append(kc.get(plant, FALLBACK_CROP_COEFFICIENT))
+            rate.append(float(z.get("precip_rate_mm_per_hour", default_rate)))
+
+        return cls(
+            zone_ids=np.asarray(ids),
+            taw_mm=np.asarray(taw, dtype=np.float64),
+            raw_mm=np.asarray(raw, dtype=np.float64),
+            crop_coefficient=np.asarray(crop, dtype=np.float64),
+            precip_rate_mm_per_hour=np.asarray(rate, dtype=np.float64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.zone_ids)
+
+
+@dataclass
+class WeatherSeries:
+    """
+    Daily weather, shaped (days,) for one location shared by all zones or
+    (days, zones) for per-zone weather.
+    """
+
+    dates: List[dt.date]
+    tmin_c: np.ndarray
+    tmax_c: np.ndarray
+    rain_mm: np.ndarray
+    et0_mm: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_csv(cls, path: Union[str, Path]) -> "WeatherSeries":
+        dates, tmin, tmax, rain, et0 = [], [], [], [], []
+        with Path(path).open("r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                dates.append(dt.date.fromisoformat(row["date"]))
+                tmin.append(float(row["tmin_c"]))
+                tmax.append(float(row["tmax_c"]))
+                rain.append(float(row.get("rain_mm") or 0.0))
+                if row.get("et0_mm"):
+                    et0.append(float(row["et0_mm"]))
+        return cls(
+            dates=dates,
+            tmin_c=np.asarray(tmin),
+            tmax_c=np.asarray(tmax),
+            rain_mm=np.asarray(rain),
+            et0_mm=np.asarray(et0) if len(et0) == len(dates) else None,
+        )
+
+    def reference_et(self, latitude_deg: float) -> np.ndarray:
+        if self.et0_mm is not None:
+            return self.et0_mm
+        doy = np.array([d.timetuple().tm_yday for d in self.dates], dtype=np.float64)
+        if self.tmin_c.ndim == 2:
+            doy = doy[:, None]
+        return hargreaves_et0(self.tmin_c, self.tmax_c, doy, latitude_deg)
+
+
+def hargreaves_et0(
+    tmin_c: np.ndarray,
+    tmax_c: np.ndarray,
+    day_of_year: np.ndarray,
+    latitude_deg: float,
+) -> np.ndarray:
+    """Hargreaves reference evapotranspiration (mm/day), FAO-56 eq. 52."""
+    lat = np.deg2rad(latitude_deg)
+    dr = 1 + 0.033 * np.cos(2 * np.pi * day_of_year / 365)
+    decl = 0.409 * np.sin(2 * np.pi * day_of_year / 365 - 1.39)
+    ws = np.arccos(np.clip(-np.tan(lat) * np.tan(decl), -1.0, 1.0))
+    # Extraterrestrial radiation (MJ m-2 day-1), then as equivalent evaporation (mm)
+    ra = (24 * 60 / np.pi) * 0.0820 * dr * (
+        ws * np.sin(lat) * np.sin(decl) + np.cos(lat) * np.cos(decl) * np.sin(ws)
+    )
+    tmean = (tmin_c + tmax_c) / 2
+    trange = np.maximum(tmax_c - tmin_c, 0.0)
+    return np.maximum(0.0, 0.0023 * 0.408 * ra * (tmean + 17.8) * np.sqrt(trange))
+
+
+def load_irrigation_history(
+    path: Union[str, Path],
+    dates: Sequence[dt.date],
+    zone_ids: Sequence[int],
+) -> np.ndarray:
+    """Irrigation CSV → (days, zones) array of minutes; unknown dates/zones are ignored."""
+    day_index = {d: i for i, d in enumerate(dates)}
+    zone_index = {z: i for i, z in enumerate(zone_ids)}
+    minutes = np.zeros((len(dates), len(zone_ids)))
+    with Path(path).open("r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            day = day_index.get(dt.date.fromisoformat(row["date"]))
+            zone = zone_index.get(int(row["zone_id"]))
+            if day is not None and zone is not None:
+                minutes[day, zone] += float(row["minutes"])
+    return minutes
+
+
+# A policy sees the day index, current depletion and zone params and returns
+# the irrigation minutes to apply that day, shaped (zones,).
+SchedulePolicy = Callable[[int, np.ndarray, ZoneSoilParams], np.ndarray]
+
+
+def fixed_interval_policy(minutes: float, every_x_days: int = 1) -> SchedulePolicy:
+    """Water every zone `minutes` every `every_x_days` days (like default_schedule)."""
+
+    def policy(day: int, depletion: np.ndarray, params: ZoneSoilParams) -> np.ndarray:
+        if day % max(1, every_x_days):
+            return np.zeros_like(depletion)
+        return np.full_like(depletion, minutes)
+
+    return policy
+
+
+def depletion_triggered_policy(max_minutes: float = 60.0) -> SchedulePolicy:
+    """Refill the root zone whenever depletion passes RAW."""
+
+    def policy(day: int, depletion: np.ndarray, params: ZoneSoilParams) -> np.ndarray:
+        needed_mm = np.where(depletion > params.raw_mm, depletion, 0.0)
+        minutes = needed_mm / params.precip_rate_mm_per_hour * 60.0
+        return np.minimum(minutes, max_minutes)
+
+    return policy
+
+
+@dataclass
+class WaterBalanceResult:
+    zone_ids: np.ndarray
+    dates: List[dt.date]
+    depletion_mm: np.ndarray  # (days, zones), end of day
+    et_actual_mm: np.ndarray  # (days, zones)
+    irrigation_mm: np.ndarray  # (days, zones)
+    deep_percolation_mm: np.ndarray  # (days, zones)
+    stress_days: np.ndarray  # (zones,) days ending with depletion above RAW
+
+    def summary(self) -> Dict[int, Dict[str, float]]:
+        irrigation = self.irrigation_mm.sum(axis=0)
+        percolation = self.deep_percolation_mm.sum(axis=0)
+        et = self.et_actual_mm.sum(axis=0)
+        return {
+            int(z): {
+                "irrigation_mm": float(irrigation[i]),
+                "deep_percolation_mm": float(percolation[i]),
+                "et_actual_mm": float(et[i]),
+                "stress_days": int(self.stress_days[i]),
+            }
+            for i, z in enumerate(self.zone_ids.tolist())
+        }
+
+
+def simulate(
+    params: ZoneSoilParams,
+    weather: WeatherSeries,
+    latitude_deg: float,
+    irrigation_minutes: Optional[np.ndarray] = None,
+    policy: Optional[SchedulePolicy] = None,
+    initial_depletion_mm: Optional[np.ndarray] = None,
+) -> WaterBalanceResult:
+    """
+    Run the daily balance for every zone over every day in `weather`.
+
+    Irrigation comes from `irrigation_minutes` (days, zones) history,
+    from `policy` (evaluated each morning on the previous day's depletion),
+    or both (summed).
+    """
+    n_days, n_zones = len(weather.dates), len(params)
+    shape = (n_days, n_zones)
+
+    etc = np.broadcast_to(
+        np.asarray(weather.reference_et(latitude_deg)).reshape(n_days, -1), shape
+    ) * params.crop_coefficient
+    rain = np.broadcast_to(np.asarray(weather.rain_mm).reshape(n_days, -1), shape)
+    effective_rain = rain * EFFECTIVE_RAIN_FRACTION
+    history_mm = None
+    if irrigation_minutes is not None:
+        history_mm = irrigation_minutes * params.precip_rate_mm_per_hour / 60.0
+
+    taw, raw = params.taw_mm, params.raw_mm
+    stress_span = np.maximum(taw - raw, 1e-9)
+
+    depletion_out = np.empty(shape)
+    et_out = np.empty(shape)
+    irrigation_out = np.zeros(shape)
+    percolation_out = np.empty(shape)
+
+    depletion = (
+        np.zeros(n_zones) if initial_depletion_mm is None else np.asarray(initial_depletion_mm, float).copy()
+    )
+    for day in range(n_days):
+        irrigation = irrigation_out[day]
+        if history_mm is not None:
+            irrigation += history_mm[day]
+        if policy is not None:
+            irrigation += policy(day, depletion, params) * params.precip_rate_mm_per_hour / 60.0
+
+        ks = np.clip((taw - depletion) / stress_span, 0.0, 1.0)
+        et_actual = etc[day] * ks
+
+        depletion = depletion - effective_rain[day] - irrigation + et_actual
+        percolation = np.maximum(0.0, -depletion)
+        depletion = np.clip(depletion, 0.0, taw)
+
+        depletion_out[day] = depletion
+        et_out[day] = et_actual
+        percolation_out[day] = percolation
+
+    return WaterBalanceResult(
+        zone_ids=params.zone_ids,
+        dates=list(weather.dates),
+        depletion_mm=depletion_out,
+        et_actual_mm=et_out,
+        irrigation_mm=irrigation_out,
+        deep_percolation_mm=percolation_out,
+        stress_days=(depletion_out > raw).sum(axis=0),
+    )
+
+
+def simulate_from_files(
+    config: Dict[str, Any],
+    weather_csv: Union[str, Path],
+    irrigation_csv: Optional[Union[str, Path]] = None,
+    policy: Optional[SchedulePolicy] = None,
+) -> WaterBalanceResult:
+    """Offline backtest for the zones in `config` using recorded weather / irrigation."""
+    balance_cfg = config.get("ai", {}).get("water_balance", {})
+    params = ZoneSoilParams.from_zones(config.get("zones", []), balance_cfg)
+    weather = WeatherSeries.from_csv(weather_csv)
+    history = None
+    if irrigation_csv is not None:
+        history = load_irrigation_history(irrigation_csv, weather.dates, params.zone_ids.tolist())
+    return simulate(
+        params,
+        weather,
+        latitude_deg=float(balance_cfg.get("latitude_deg", 30.0)),
+        irrigation_minutes=history,
+        policy=policy,
+    )
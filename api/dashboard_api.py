@@ -3,7 +3,7 @@ from fastapi import APIRouter
 from core.app_context import AppContext
 from ai.engine import GardenAIEngine
 from irrigation.controller import IrrigationController
-from weather.weather_service import WeatherService
+from weather_service import WeatherService
 
 
 def create_dashboard_router(
@@ -16,12 +16,16 @@ def create_dashboard_router(
 
     @router.get("/summary")
     def get_summary():
-        zones = ctx.get("zones", default=[])
+        snapshot = ctx.snapshot()
+        zones = snapshot.zones
         zone_summaries = []
+        results = ai_engine.evaluate_all_zones()
 
         for zone in zones:
             zone_id = zone.get("id")
-            eval_result = ai_engine.evaluate_zone(zone_id)
+            eval_result = results.get(zone_id)
+            if eval_result is None:
+                continue
             zone_summaries.append(
                 {
                     "zone_id": zone_id,
@@ -36,8 +40,8 @@ def create_dashboard_router(
         weather_snapshot = weather_service.get_last_snapshot()
 
         return {
-            "system_name": ctx.get("system", "name", default="Ingenious Irrigation"),
-            "simulation_mode": ctx.simulation_mode,
+            "system_name": snapshot.get("system", "name", default="Ingenious Irrigation"),
+            "simulation_mode": snapshot.simulation_mode,
             "zones": zone_summaries,
             "weather": weather_snapshot,
         }
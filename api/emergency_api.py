@@ -0,0 +1,47 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from irrigation.controller import IrrigationController
+from irrigation.emergency_shutdown import EmergencyBus
+
+
+class EmergencyRequest(BaseModel):
+    reason: str = "manual emergency stop"
+    zone_id: Optional[int] = None
+
+
+def create_emergency_router(bus: EmergencyBus, irrigation_controller: IrrigationController) -> APIRouter:
+    """
+    Operator access to the emergency bus: trigger a stop, inspect reaction
+    times, and re-enable watering once the cause is fixed.
+    """
+    router = APIRouter(prefix="/system/emergency", tags=["system"])
+
+    def _state():
+        latched = irrigation_controller.emergency
+        return {
+            "latched": latched.to_dict() if latched is not None else None,
+            "handler_priority": bus.priority,
+            "stats": bus.stats.to_dict(),
+            "recent": bus.history(),
+        }
+
+    @router.get("")
+    def emergency_state():
+        return _state()
+
+    @router.post("", status_code=202)
+    def trigger_emergency(req: EmergencyRequest):
+        """Close every relay now; watering stays blocked until cleared."""
+        event = bus.publish("api", req.reason, zone_id=req.zone_id)
+        return {"event_id": event.event_id}
+
+    @router.post("/clear")
+    def clear_emergency():
+        if irrigation_controller.clear_emergency() is None:
+            raise HTTPException(status_code=409, detail="No emergency is latched")
+        return _state()
+
+    return router
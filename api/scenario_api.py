@@ -0,0 +1,88 @@
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from ai.scenario_engine import ScenarioEngine, grid
+
+# Points per axis; the engine also caps the whole cube (ai.scenarios.max_cells)
+MAX_AXIS_STEPS = 500
+
+
+class AxisSpec(BaseModel):
+    """Either explicit `values`, or an inclusive `start`/`stop` grid with `steps` points."""
+    values: Optional[List[float]] = Field(None, min_length=1, max_length=MAX_AXIS_STEPS)
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    steps: int = Field(10, ge=1, le=MAX_AXIS_STEPS)
+
+    def to_values(self) -> List[float]:
+        if self.values is not None:
+            return self.values
+        if self.start is None or self.stop is None:
+            raise HTTPException(status_code=422, detail="Axis needs `values` or `start`/`stop`.")
+        return grid(self.start, self.stop, self.steps).tolist()
+
+
+class ScenarioRequest(BaseModel):
+    temperature_c: AxisSpec
+    humidity: AxisSpec  # percent, 0–100
+    rain_mm: AxisSpec
+    zone_ids: Optional[List[int]] = None
+    soil_moisture: Optional[Dict[int, float]] = None
+    recent_rain_mm: float = 0.0
+
+
+def create_scenario_router(scenario_engine: ScenarioEngine) -> APIRouter:
+    router = APIRouter(prefix="/scenarios", tags=["scenarios"])
+
+    @router.post("")
+    def create_scenario(req: ScenarioRequest):
+        """
+        Evaluate durations and hydration scores for every zone over the
+        temperature x humidity x rain grid. Returns the cube's id and axes;
+        fetch values with GET /scenarios/{scenario_id}.
+        """
+        try:
+            cube = scenario_engine.evaluate(
+                temperatures_c=req.temperature_c.to_values(),
+                humidities=req.humidity.to_values(),
+                rain_mm=req.rain_mm.to_values(),
+                zone_ids=req.zone_ids,
+                soil_moisture=req.soil_moisture,
+                recent_rain_mm=req.recent_rain_mm,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return cube.describe()
+
+    @router.get("")
+    def list_scenarios():
+        return scenario_engine.list()
+
+    @router.get("/{scenario_id}")
+    def slice_scenario(
+        scenario_id: str,
+        zone_id: Optional[int] = None,
+        temperature_c: Optional[float] = None,
+        humidity: Optional[float] = None,
+        rain_mm: Optional[float] = None,
+    ):
+        """
+        Slice a cube. Each given axis value snaps to the nearest grid point;
+        omitted axes are returned in full.
+        """
+        cube = scenario_engine.get(scenario_id)
+        if cube is None:
+            raise HTTPException(status_code=404, detail="Scenario not found")
+        try:
+            return cube.slice(
+                zone_id=zone_id,
+                temperature_c=temperature_c,
+                humidity=humidity,
+                rain_mm=rain_mm,
+            )
+        except KeyError:
+            raise HTTPException(status_code=404, detail="Zone not in scenario")
+
+    return router
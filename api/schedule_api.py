@@ -0,0 +1,95 @@
+from datetime import date
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from core.app_context import AppContext, ConfigConflictError
+from ai.engine import GardenAIEngine
+from irrigation.sequencer import HydraulicLimits
+from scheduler.start_time_optimizer import (
+    HourlyWeather,
+    OptimizerSettings,
+    apply_start_times,
+    optimize_start_times,
+    zone_requests_from_config,
+)
+from weather_service import WeatherService
+
+
+class HourlyForecast(BaseModel):
+    temperature_c: List[float]  # 24 values, hour 0 = 00:00-01:00
+    humidity: List[float]  # 0-1
+    wind_mps: Optional[List[float]] = None
+
+
+class OptimizeRequest(BaseModel):
+    day: Optional[date] = None
+    zone_ids: Optional[List[int]] = None
+    durations_minutes: Optional[Dict[int, float]] = None
+    use_ideal_durations: bool = False
+    forecast: Optional[HourlyForecast] = None
+    apply: bool = False
+
+
+def create_schedule_router(
+    ctx: AppContext,
+    ai_engine: GardenAIEngine,
+    weather_service: WeatherService,
+) -> APIRouter:
+    router = APIRouter(prefix="/schedules", tags=["schedules"])
+
+    @router.post("/optimize")
+    def optimize(req: OptimizeRequest):
+        """
+        Start times that keep runs inside the allowed windows and days and
+        under the hydraulic limits while losing the least water to
+        evaporation. Without a forecast, a diurnal curve is built around
+        the current weather. `apply` writes the start times into the
+        running config (the scheduler picks them up; the file is unchanged),
+        unless the config changed while planning (409).
+        """
+        snapshot = ctx.snapshot()
+        durations = dict(req.durations_minutes or {})
+        if req.use_ideal_durations:
+            ids = req.zone_ids or [z["id"] for z in snapshot.data.get("zones", [])]
+            for zone_id, result in ai_engine.evaluate_all_zones(ids).items():
+                durations.setdefault(zone_id, result.ideal_duration_minutes)
+
+        if req.forecast is not None:
+            try:
+                weather = HourlyWeather(
+                    temperature_c=req.forecast.temperature_c,
+                    humidity=req.forecast.humidity,
+                    wind_mps=req.forecast.wind_mps if req.forecast.wind_mps is not None else 0.0,
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=str(e))
+        else:
+            weather = HourlyWeather.from_snapshot(weather_service.get_weather())
+
+        try:
+            plan = optimize_start_times(
+                zone_requests_from_config(snapshot.data, durations, req.zone_ids),
+                weather,
+                HydraulicLimits.from_config(snapshot.data),
+                OptimizerSettings.from_config(snapshot.data),
+                day=req.day,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+        result = plan.to_dict()
+        result["applied"] = False
+        if req.apply:
+            if plan.unplaced:
+                raise HTTPException(status_code=409, detail=f"Zones {plan.unplaced} do not fit; not applied")
+            try:
+                ctx.replace_config(apply_start_times(snapshot.data, plan), based_on=snapshot)
+            except ConfigConflictError:
+                # A reload or zone edit landed while planning; the plan may not fit it
+                raise HTTPException(status_code=409, detail="Config changed while optimizing; not applied, retry")
+            result["applied"] = True
+        return result
+
+    return router
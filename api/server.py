@@ -1,13 +1,27 @@
+from typing import Optional
+
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 from pydantic import BaseModel
 
 from core.app_context import AppContext
+from core.logger import logging_stats
 from ai.engine import GardenAIEngine, ZoneEvaluationResult
 from irrigation.controller import IrrigationController
-from weather.weather_service import WeatherService
+from irrigation.emergency_shutdown import EmergencyActiveError, EmergencyBus
+from irrigation.valve_jobs import ZoneBusyError
+from irrigation.watering_journal import WateringJournal
+from weather_service import WeatherService
 from api.dashboard_api import create_dashboard_router
+from api.emergency_api import create_emergency_router
+from api.scenario_api import create_scenario_router
+from api.schedule_api import create_schedule_router
+from api.watering_api import create_watering_router
+from api.weather_api import create_weather_router
+from ai.hydration_scorer import get_hydration_scorer
+from ai.scenario_engine import ScenarioEngine
+from routers.hydration import router as hydration_router
 
 
 class ZoneEvaluationResponse(BaseModel):
@@ -24,6 +38,7 @@ class WaterZoneResponse(BaseModel):
     used_duration_minutes: float
     simulation: bool
     message: str
+    job_id: str | None = None
 
 
 def _to_eval_response(result: ZoneEvaluationResult) -> ZoneEvaluationResponse:
@@ -42,6 +57,8 @@ def create_api_app(
     ai_engine: GardenAIEngine,
     irrigation_controller: IrrigationController,
     weather_service: WeatherService,
+    emergency_bus: Optional[EmergencyBus] = None,
+    journal: Optional[WateringJournal] = None,
 ) -> FastAPI:
 
     app = FastAPI(
@@ -72,11 +89,23 @@ def create_api_app(
             "simulation_mode": ctx.simulation_mode,
             "system_name": ctx.get("system", "name", default="Ingenious Irrigation"),
         }
-    
-NBC
 
-    play = ctx.shared.pop("play_greeting", False)
-    return {"play": play}
+    @app.get("/system/evaluation-cache", tags=["system"])
+    def evaluation_cache_stats():
+        return ai_engine.cache_stats()
+
+    @app.get("/system/relays", tags=["system"])
+    def relay_stats():
+        return irrigation_controller.relay_stats()
+
+    @app.get("/system/logging", tags=["system"])
+    def logging_pipeline_stats():
+        return logging_stats()
+
+    @app.get("/system/greeting", tags=["system"])
+    def greeting():
+        play = ctx.shared.pop("play_greeting", False)
+        return {"play": play}
 
     @app.get(
         "/zones/{zone_id}/evaluate",
@@ -84,8 +113,7 @@ NBC
         tags=["zones"],
     )
     def evaluate_zone(zone_id: int):
-        zones = ctx.get("zones", default=[])
-        if not any(z.get("id") == zone_id for z in zones):
+        if zone_id not in ctx.snapshot().zones_by_id:
             raise HTTPException(status_code=404, detail="Zone not found")
 
         result = ai_engine.evaluate_zone(zone_id)
@@ -97,8 +125,7 @@ NBC
         tags=["zones"],
     )
     def water_zone(zone_id: int):
-        zones = ctx.get("zones", default=[])
-        if not any(z.get("id") == zone_id for z in zones):
+        if zone_id not in ctx.snapshot().zones_by_id:
             raise HTTPException(status_code=404, detail="Zone not found")
 
         eval_result = ai_engine.evaluate_zone(zone_id)
@@ -109,20 +136,33 @@ NBC
                 detail=f"Emergency detected: {eval_result.emergency_reason}",
             )
 
-        irrigation_controller.water_zone(
-            zone_id=zone_id,
-            duration_minutes=eval_result.ideal_duration_minutes,
-        )
+        try:
+            job = irrigation_controller.water_zone(
+                zone_id=zone_id,
+                duration_minutes=eval_result.ideal_duration_minutes,
+            )
+        except (ZoneBusyError, EmergencyActiveError) as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+        if job is None:
+            return WaterZoneResponse(
+                zone_id=zone_id,
+                used_duration_minutes=0.0,
+                simulation=ctx.simulation_mode,
+                message="Nothing to water (no relay pin or zero duration)",
+            )
 
+        # Returns as soon as the valve is open; track it under /watering/jobs
         return WaterZoneResponse(
             zone_id=zone_id,
-            used_duration_minutes=eval_result.ideal_duration_minutes,
+            used_duration_minutes=job.duration_seconds / 60.0,
             simulation=ctx.simulation_mode,
             message=(
-                "Simulated watering run executed"
+                "Simulated watering run started"
                 if ctx.simulation_mode
-                else "Watering command executed on hardware"
+                else "Watering started on hardware"
             ),
+            job_id=job.job_id,
         )
 
     # Dashboard JSON API
@@ -134,4 +174,25 @@ NBC
     )
     app.include_router(dashboard_router)
 
+    # Running watering jobs and run history
+    app.include_router(create_watering_router(irrigation_controller, journal))
+
+    # Emergency stop
+    if emergency_bus is not None:
+        app.include_router(create_emergency_router(emergency_bus, irrigation_controller))
+
+    # Start-time optimization
+    app.include_router(create_schedule_router(ctx, ai_engine, weather_service))
+
+    # Forecast and weather skip/scale decisions
+    app.include_router(create_weather_router(weather_service))
+
+    # What-if forecast scenarios
+    scenario_engine = ScenarioEngine(ctx, ai_engine, get_hydration_scorer(ctx))
+    app.include_router(create_scenario_router(scenario_engine))
+
+    # Hydration scoring (single zone and vectorized batch); the scorer
+    # above already follows this context's config
+    app.include_router(hydration_router)
+
     return app
@@ -0,0 +1,97 @@
+from datetime import date
+from typing import Dict, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from irrigation.controller import IrrigationController
+from irrigation.emergency_shutdown import EmergencyActiveError
+from irrigation.valve_jobs import ZoneBusyError
+from irrigation.watering_journal import WateringJournal
+
+
+class ExtendRequest(BaseModel):
+    minutes: float
+
+
+class SequenceRequest(BaseModel):
+    durations_minutes: Dict[int, float]
+    dry_run: bool = False
+
+
+def create_watering_router(
+    irrigation_controller: IrrigationController,
+    journal: Optional[WateringJournal] = None,
+) -> APIRouter:
+    """
+    Status and control of running watering jobs, as started by
+    POST /zones/{zone_id}/water or POST /watering/sequence, and (with a
+    journal) the history of finished runs.
+    """
+    router = APIRouter(prefix="/watering", tags=["watering"])
+
+    def _status_or_404(job_id: str):
+        status = irrigation_controller.watering_status(job_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return status
+
+    @router.get("/jobs")
+    def list_jobs(include_finished: bool = False):
+        return irrigation_controller.watering_jobs(include_finished=include_finished)
+
+    @router.get("/jobs/{job_id}")
+    def job_status(job_id: str):
+        return _status_or_404(job_id)
+
+    @router.post("/jobs/{job_id}/cancel")
+    def cancel_job(job_id: str):
+        if irrigation_controller.cancel_watering(job_id) is None:
+            _status_or_404(job_id)  # 404 if unknown
+            raise HTTPException(status_code=409, detail="Job already finished")
+        return _status_or_404(job_id)
+
+    @router.post("/jobs/{job_id}/extend")
+    def extend_job(job_id: str, req: ExtendRequest):
+        """Add (or, if negative, remove) minutes; capped at the max runtime."""
+        if irrigation_controller.extend_watering(job_id, req.minutes) is None:
+            _status_or_404(job_id)
+            raise HTTPException(status_code=409, detail="Job already finished")
+        return _status_or_404(job_id)
+
+    @router.post("/sequence")
+    def sequence(req: SequenceRequest):
+        """
+        Pack several zone runs under the site's hydraulic limits and start
+        them as scheduled jobs (or only return the plan with `dry_run`).
+        """
+        try:
+            if req.dry_run:
+                return {"plan": irrigation_controller.plan_sequence(req.durations_minutes).to_dict(), "jobs": []}
+            plan, jobs = irrigation_controller.run_sequence(req.durations_minutes)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except (ZoneBusyError, EmergencyActiveError) as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return {"plan": plan.to_dict(), "jobs": [irrigation_controller.watering_status(j.job_id) for j in jobs]}
+
+    if journal is not None:
+
+        @router.get("/history")
+        def history(start: Optional[date] = None, end: Optional[date] = None, zone_id: Optional[int] = None):
+            """Runs and total seconds per zone between two dates (inclusive)."""
+            totals = journal.runtime_totals(start, end, zone_id)
+            return {
+                "start": start,
+                "end": end,
+                "zones": {
+                    zid: {**t, "last_run_date": journal.last_run_date(zid)} for zid, t in sorted(totals.items())
+                },
+            }
+
+        @router.get("/history/{day}")
+        def history_day(day: date, zone_id: Optional[int] = None):
+            """Individual runs on one day (until the day is compacted)."""
+            return journal.runs(day, zone_id)
+
+    return router
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException, Query
+
+from weather_client import WeatherUnavailable
+from weather_service import WeatherService
+
+
+def create_weather_router(weather_service: WeatherService) -> APIRouter:
+    """
+    The hourly/daily forecast and the per-zone skip/scale decisions
+    derived from it (see weather_forecast).
+    """
+    router = APIRouter(prefix="/weather", tags=["weather"])
+
+    def _forecast():
+        try:
+            return weather_service.get_forecast()
+        except WeatherUnavailable as e:
+            raise HTTPException(status_code=503, detail=str(e))
+
+    @router.get("/forecast")
+    def forecast(hours: int = Query(48, ge=1, le=240)):
+        return _forecast().to_dict(hours=hours)
+
+    @router.get("/decisions")
+    def decisions(hours: int = Query(48, ge=1, le=240)):
+        """Skip reason ("rain", "cold" or null) and duration scale per zone, from the current hour."""
+        _forecast()
+        result = weather_service.forecast_decisions().to_dict(start=weather_service.clock.time(), hours=hours)
+        result["cache"] = dict(weather_service.decision_stats)
+        return result
+
+    return router
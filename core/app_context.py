@@ -1,41 +1,35 @@
 import json
 import threading
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
 
+from core.config_schema import ConfigValidationError, validate_config
+from core.config_snapshot import MISSING, ConfigSnapshot, diff_paths
+from core.config_watcher import ConfigWatcher
 
-class ConfigReloader(threading.Thread):
-    """
-    Background thread that watches the config file for changes
-    and triggers a reload callback when it detects modifications.
-    """
+# Callback(changed key paths, new snapshot); see AppContext.subscribe
+ConfigSubscriber = Callable[[FrozenSet[Tuple], ConfigSnapshot], Any]
 
-    def __init__(self, config_path: Path, callback, interval_seconds: float = 2.0):
-        super().__init__(daemon=True)
-        self.config_path = config_path
-        self.callback = callback
-        self.interval_seconds = interval_seconds
-        self._stop_event = threading.Event()
-        self._last_mtime: Optional[float] = None
 
-    def run(self):
-        try:
-            self._last_mtime = self.config_path.stat().st_mtime
-        except FileNotFoundError:
-            self._last_mtime = None
+class ConfigConflictError(RuntimeError):
+    """The config changed since the snapshot an update was derived from."""
 
-        while not self._stop_event.is_set():
-            try:
-                mtime = self.config_path.stat().st_mtime
-                if self._last_mtime is None or mtime != self._last_mtime:
-                    self._last_mtime = mtime
-                    self.callback()
-                self._stop_event.wait(self.interval_seconds)
-            except FileNotFoundError:
-                self._stop_event.wait(self.interval_seconds)
 
-    def stop(self):
-        self._stop_event.set()
+def _matches(path: Tuple, prefixes: Tuple[Tuple, ...]) -> bool:
+    # A path matches a prefix below it, and also one above it (a whole
+    # section added or removed covers every key inside it)
+    return any(path[: len(p)] == p or p[: len(path)] == path for p in prefixes)
+
+
+class ConfigSubscription:
+    def __init__(self, callback: ConfigSubscriber, prefixes: Tuple[Tuple, ...]):
+        self.callback = callback
+        self.prefixes = prefixes
+
+    def select(self, changed: FrozenSet[Tuple]) -> FrozenSet[Tuple]:
+        if not self.prefixes:
+            return changed
+        return frozenset(p for p in changed if _matches(p, self.prefixes))
 
 
 class AppContext:
@@ -45,44 +39,157 @@ class AppContext:
     - Loads and exposes configuration
     - Tracks simulation mode
     - Holds shared resources (logger, db, AI engine, etc.)
-    - Supports live config reload via ConfigReloader
+    - Supports live config reload via ConfigWatcher
+
+    Config is held as an immutable ConfigSnapshot. Reloads build a new
+    snapshot and swap the reference, so get() and snapshot() never lock.
+    A reloaded file is validated first; if it does not parse or validate,
+    the previous config stays in effect.
     """
 
     def __init__(self, config_path: str = "config/system_config.json"):
         self.config_path = Path(config_path)
-        self.config: Dict[str, Any] = {}
-        self.simulation_mode: bool = True
+        self._snapshot = ConfigSnapshot.build({})
 
+        # Serializes writers only; readers go through the current snapshot
         self._config_lock = threading.Lock()
-        self._reloader: Optional[ConfigReloader] = None
+        self._reloader: Optional[ConfigWatcher] = None
+        self._reload_listeners: List[Callable[[Dict[str, Any]], Any]] = []
+        self._subscriptions: List[ConfigSubscription] = []
 
         # Shared resources (wired by app.py)
         self.logger = None
         self.db = None
         self.ai_engine = None
+        self.shared: Dict[str, Any] = {}
 
         self._load_config()
         self._start_auto_reload()
 
     def _load_config(self):
-        with self._config_lock:
-            if not self.config_path.exists():
-                raise FileNotFoundError(f"Config file not found: {self.config_path}")
+        if not self.config_path.exists():
+            raise FileNotFoundError(f"Config file not found: {self.config_path}")
+
+        with self.config_path.open("r", encoding="utf-8") as f:
+            raw = json.load(f)
 
-            with self.config_path.open("r", encoding="utf-8") as f:
-                self.config = json.load(f)
+        changed = self._swap_config(raw)
 
-            system_cfg = self.config.get("system", {})
-            self.simulation_mode = bool(system_cfg.get("simulation_mode", True))
+        if self.logger and changed:
+            self.logger.info(
+                "Configuration reloaded (%d changed keys). Simulation mode: %s",
+                len(changed),
+                self.simulation_mode,
+            )
 
+    def _reload_from_file(self):
+        """Watcher callback: a bad edit is logged and the old config kept."""
+        try:
+            self._load_config()
+        except (OSError, json.JSONDecodeError, ConfigValidationError) as e:
             if self.logger:
-                self.logger.info(
-                    "Configuration reloaded. Simulation mode: %s",
-                    self.simulation_mode,
+                self.logger.error("Config reload rejected, keeping previous config: %s", e)
+
+    def _swap_config(self, raw: Dict[str, Any], expected_version: Optional[int] = None) -> FrozenSet[Tuple]:
+        """
+        Validate `raw`, swap it in and notify listeners. Returns the changed
+        key paths (empty if the new config is identical to the current one).
+        With `expected_version`, raises ConfigConflictError instead if
+        another swap happened since that snapshot version.
+        """
+        validate_config(raw)
+
+        with self._config_lock:
+            previous = self._snapshot
+            if expected_version is not None and previous.version != expected_version:
+                raise ConfigConflictError(
+                    f"config changed (version {previous.version}, expected {expected_version})"
                 )
+            snapshot = ConfigSnapshot.build(raw, version=previous.version + 1)
+            changed = diff_paths(previous.data, snapshot.data)
+            if not changed and snapshot.data == previous.data:
+                return changed
+            self._snapshot = snapshot
+
+        for listener in list(self._reload_listeners):
+            try:
+                listener(snapshot.data)
+            except Exception as e:
+                if self.logger:
+                    self.logger.exception("Config reload listener failed: %s", e)
+
+        for subscription in list(self._subscriptions):
+            selected = subscription.select(changed)
+            if not selected:
+                continue
+            try:
+                subscription.callback(selected, snapshot)
+            except Exception as e:
+                if self.logger:
+                    self.logger.exception("Config subscriber failed: %s", e)
+        return changed
+
+    def snapshot(self) -> ConfigSnapshot:
+        """
+        The current config snapshot. It never changes, so hold on to it for
+        a consistent view across an entire operation.
+        """
+        return self._snapshot
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return self._snapshot.data
+
+    @config.setter
+    def config(self, raw: Dict[str, Any]):
+        self._swap_config(raw)
+
+    def replace_config(self, raw: Dict[str, Any], based_on: ConfigSnapshot) -> FrozenSet[Tuple]:
+        """
+        Swap in `raw`, derived from `based_on`, unless a reload or another
+        edit landed in between (ConfigConflictError): no lost updates.
+        """
+        return self._swap_config(raw, expected_version=based_on.version)
+
+    @property
+    def simulation_mode(self) -> bool:
+        return self._snapshot.simulation_mode
+
+    def on_reload(self, listener: Callable[[Dict[str, Any]], Any]):
+        """
+        Register a callback invoked with the new config after every reload.
+        """
+        self._reload_listeners.append(listener)
+
+    def subscribe(self, callback: ConfigSubscriber, *prefixes: Tuple) -> Callable[[], None]:
+        """
+        Call `callback(changed_paths, snapshot)` after a reload that touches
+        any of the given key-path prefixes (every reload if none are given).
+        Only the matching paths are passed, e.g.
+
+            ctx.subscribe(on_change, ("ai", "thresholds"), ("zones",))
+
+        receives {("zones", 2, "default_schedule", "base_duration_minutes")}
+        when zone 2's duration is edited. Returns an unsubscribe function.
+        """
+        subscription = ConfigSubscription(callback, tuple(tuple(p) for p in prefixes))
+        self._subscriptions.append(subscription)
+
+        def unsubscribe():
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+        return unsubscribe
 
     def _start_auto_reload(self):
-        self._reloader = ConfigReloader(self.config_path, self._load_config)
+        reload_cfg = self.get("config_reload", default={})
+        self._reloader = ConfigWatcher(
+            self.config_path,
+            self._reload_from_file,
+            debounce_seconds=reload_cfg.get("debounce_seconds", 0.25),
+            poll_interval_seconds=reload_cfg.get("poll_interval_seconds", 2.0),
+            backend=reload_cfg.get("backend", "auto"),
+        )
         self._reloader.start()
 
     def get(self, *keys, default=None):
@@ -92,13 +199,11 @@ class AppContext:
         Example:
             ctx.get("hardware", "relay", "type", default="active_low")
         """
-        with self._config_lock:
-            node: Any = self.config
-            for key in keys:
-                if not isinstance(node, dict) or key not in node:
-                    return default
-                node = node[key]
-            return node
+        snapshot = self._snapshot
+        value = snapshot._memo.get(keys, MISSING)
+        if value is MISSING:
+            return snapshot.lookup(keys, default)
+        return value
 
     def stop(self):
         if self._reloader:
@@ -0,0 +1,247 @@
+"""
+Schema for system_config.json.
+
+validate_config() checks a freshly parsed config before AppContext swaps it
+in, so a typo in the file is rejected (and the old config kept) instead of
+surfacing later as a KeyError deep inside a subsystem. Only the fields the
+code actually relies on are typed; unknown keys are allowed everywhere.
+"""
+
+from datetime import date, datetime
+from typing import Annotated, Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+
+class ConfigValidationError(ValueError):
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__("Invalid config: " + "; ".join(errors))
+
+
+class _Section(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+
+class SystemSection(_Section):
+    name: str = "Ingenious Irrigation"
+    simulation_mode: bool = True
+    log_level: str = "INFO"
+
+
+class RelaySection(_Section):
+    type: Literal["active_low", "active_high"] = "active_low"
+    backend: Literal["rpi_gpio", "expander", "fake"] = "rpi_gpio"
+    in_pins: Dict[str, int] = Field(default_factory=dict)
+    fake_write_latency_ms: float = Field(default=0.0, ge=0)
+
+
+class HydraulicsSection(_Section):
+    supply_capacity_lpm: float = Field(default=float("inf"), gt=0)
+    max_concurrent_valves: int = Field(default=1, ge=1)
+    default_zone_flow_lpm: float = Field(default=20.0, gt=0)
+
+
+class HardwareSection(_Section):
+    relay: RelaySection = Field(default_factory=RelaySection)
+    hydraulics: HydraulicsSection = Field(default_factory=HydraulicsSection)
+
+
+_HHMM = r"^([01]\d|2[0-3]):[0-5]\d$"
+_WINDOW = r"^(([01]\d|2[0-3]):[0-5]\d|24:00)\s*-\s*(([01]\d|2[0-3]):[0-5]\d|24:00)$"
+_WATERING_DAY = Literal["mon", "tue", "wed", "thu", "fri", "sat", "sun", "odd", "even"]
+
+
+class DefaultSchedule(_Section):
+    enabled: bool = True
+    start_time: str = Field(default="05:00", pattern=_HHMM)
+    start_times: Optional[List[Annotated[str, Field(pattern=_HHMM)]]] = None
+    frequency: Literal["daily", "every_x_days"] = "daily"
+    every_x_days: int = Field(default=1, ge=1)
+    anchor_date: Optional[date] = None
+    base_duration_minutes: float = Field(ge=0)
+    watering_windows: Optional[List[Annotated[str, Field(pattern=_WINDOW)]]] = None
+    watering_days: Optional[List[_WATERING_DAY]] = None
+
+
+class ZoneSection(_Section):
+    id: int
+    name: str = ""
+    flow_rate_lpm: Optional[float] = Field(default=None, gt=0)
+    default_schedule: DefaultSchedule
+
+
+class ThresholdsSection(_Section):
+    emergency_pressure_drop: float = Field(default=0.3, ge=0)
+    max_continuous_runtime_minutes: float = Field(default=60, gt=0)
+    min_health_score: float = Field(default=0.6, ge=0, le=1)
+
+
+class EvaluationCacheSection(_Section):
+    ttl_seconds: float = Field(default=30.0, ge=0)
+
+
+class ScenariosSection(_Section):
+    max_cells: int = Field(default=32_000_000, gt=0)
+    max_cache_mb: float = Field(default=256.0, gt=0)
+
+
+class AISection(_Section):
+    thresholds: ThresholdsSection = Field(default_factory=ThresholdsSection)
+    evaluation_cache: EvaluationCacheSection = Field(default_factory=EvaluationCacheSection)
+    scenarios: ScenariosSection = Field(default_factory=ScenariosSection)
+    sensor_read_workers: int = Field(default=64, gt=0)
+
+
+class WeatherAdjustmentSection(_Section):
+    rain_skip_enabled: bool = True
+    rain_probability_threshold: float = Field(default=0.6, ge=0, le=1)
+    high_temp_threshold_c: float = 35
+    low_temp_threshold_c: float = 5
+    rain_lookahead_hours: int = Field(default=12, ge=1, le=48)
+    rain_scale: float = Field(default=0.7, ge=0)
+    heat_scale: float = Field(default=1.2, ge=0)
+
+
+class WeatherClientSection(_Section):
+    timeout_seconds: float = Field(default=5.0, gt=0)
+    connect_timeout_seconds: float = Field(default=2.0, gt=0)
+    deadline_seconds: float = Field(default=8.0, gt=0)  # all attempts of one call
+    max_connections: int = Field(default=10, ge=1)
+    max_keepalive_connections: int = Field(default=5, ge=0)
+    keepalive_expiry_seconds: float = Field(default=30.0, ge=0)
+    retries: int = Field(default=2, ge=0)
+    backoff_base_seconds: float = Field(default=0.25, ge=0)
+    backoff_max_seconds: float = Field(default=2.0, ge=0)
+    breaker_failure_threshold: int = Field(default=5, ge=1)
+    breaker_reset_seconds: float = Field(default=60.0, ge=0)
+
+
+class WeatherFallbackSection(_Section):
+    temp_c: float
+    humidity: float = Field(ge=0, le=1)
+    rain_probability: float = Field(ge=0, le=1)
+
+
+class WeatherRecordSection(_Section):
+    enabled: bool = False
+    directory: str = "data/weather_recordings"
+
+
+class WeatherReplaySection(_Section):
+    archive: Optional[str] = None  # built by scripts/build_weather_archive.py
+    speed: float = Field(default=1.0, gt=0)
+    start_at: Optional[datetime] = None  # recorded time to start from; default the first record
+    shift_timestamps: bool = True
+
+
+class WeatherSection(_Section):
+    provider: Literal["openweather", "simulated", "replay"] = "openweather"
+    cache_ttl_minutes: float = Field(default=30, ge=0)
+    cache_path: Optional[str] = None  # default Config.WEATHER_CACHE
+    # Stale snapshots are served (while refreshing) for at most this long
+    cache_max_stale_minutes: float = Field(default=360, ge=0)
+    client: WeatherClientSection = Field(default_factory=WeatherClientSection)
+    fallback: Optional[WeatherFallbackSection] = None
+    record: WeatherRecordSection = Field(default_factory=WeatherRecordSection)
+    replay: WeatherReplaySection = Field(default_factory=WeatherReplaySection, validate_default=True)
+    adjustment: WeatherAdjustmentSection = Field(default_factory=WeatherAdjustmentSection)
+
+    @field_validator("replay")
+    @classmethod
+    def _replay_needs_archive(cls, replay: WeatherReplaySection, info) -> WeatherReplaySection:
+        if info.data.get("provider") == "replay" and not replay.archive:
+            raise ValueError("provider 'replay' needs replay.archive")
+        return replay
+
+
+class EmergencySection(_Section):
+    max_reaction_ms: float = Field(default=50, gt=0)
+    realtime_priority: bool = True
+    # Process-wide GIL switch interval set by App at startup; None keeps
+    # Python's default (5 ms)
+    switch_interval_ms: Optional[float] = Field(default=None, gt=0)
+
+
+class SafetySection(_Section):
+    emergency: EmergencySection = Field(default_factory=EmergencySection)
+
+
+class EvaporationSection(_Section):
+    vpd_coefficient: float = Field(default=0.06, ge=0)
+    sun_coefficient: float = Field(default=0.12, ge=0)
+    wind_coefficient: float = Field(default=0.05, ge=0)
+    max_loss: float = Field(default=0.6, gt=0, le=1)
+
+
+class OptimizerSection(_Section):
+    slot_minutes: Literal[1, 2, 3, 4, 5, 6, 10, 12, 15, 20, 30, 60] = 5
+    windows: List[Annotated[str, Field(pattern=_WINDOW)]] = Field(
+        default_factory=lambda: ["03:00-09:00", "19:00-23:00"]
+    )
+    evaporation: EvaporationSection = Field(default_factory=EvaporationSection)
+
+
+class SchedulerSection(_Section):
+    backend: Literal["sqlite", "memory"] = "sqlite"
+    database_path: str = "data/scheduler.db"
+    tick_interval_seconds: float = Field(default=60, gt=0)
+    catch_up_window_minutes: float = Field(default=120, ge=0)
+    watering_days: Optional[List[_WATERING_DAY]] = None  # municipal restriction, site-wide
+    optimizer: OptimizerSection = Field(default_factory=OptimizerSection)
+
+
+class JournalSection(_Section):
+    directory: str = "data/journal"
+    flush_interval_seconds: float = Field(default=5.0, gt=0)
+    max_buffered: int = Field(default=500, ge=1)
+    fsync: bool = True
+    compact_after_days: Optional[int] = Field(default=30, ge=1)
+
+
+class MonitoringSection(_Section):
+    health_interval_seconds: float = Field(default=300, gt=0)
+
+
+class ConfigReloadSection(_Section):
+    backend: Literal["auto", "inotify", "poll"] = "auto"
+    debounce_seconds: float = Field(default=0.25, ge=0)
+    poll_interval_seconds: float = Field(default=2.0, gt=0)
+
+
+class SystemConfig(_Section):
+    system: SystemSection = Field(default_factory=SystemSection)
+    hardware: HardwareSection = Field(default_factory=HardwareSection)
+    zones: List[ZoneSection] = Field(default_factory=list)
+    ai: AISection = Field(default_factory=AISection)
+    weather: WeatherSection = Field(default_factory=WeatherSection)
+    safety: SafetySection = Field(default_factory=SafetySection)
+    monitoring: MonitoringSection = Field(default_factory=MonitoringSection)
+    scheduler: SchedulerSection = Field(default_factory=SchedulerSection)
+    journal: JournalSection = Field(default_factory=JournalSection)
+    config_reload: ConfigReloadSection = Field(default_factory=ConfigReloadSection)
+
+    @field_validator("zones")
+    @classmethod
+    def _unique_zone_ids(cls, zones: List[ZoneSection]) -> List[ZoneSection]:
+        seen = set()
+        for zone in zones:
+            if zone.id in seen:
+                raise ValueError(f"duplicate zone id {zone.id}")
+            seen.add(zone.id)
+        return zones
+
+
+def validate_config(raw: Any) -> None:
+    """Raise ConfigValidationError listing every problem found in `raw`."""
+    if not isinstance(raw, dict):
+        raise ConfigValidationError(["config root must be a JSON object"])
+    try:
+        SystemConfig.model_validate(raw)
+    except ValidationError as e:
+        raise ConfigValidationError(
+            [
+                f"{'.'.join(str(p) for p in err['loc']) or '<root>'}: {err['msg']}"
+                for err in e.errors()
+            ]
+        ) from None
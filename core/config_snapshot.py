@@ -0,0 +1,138 @@
+"""
+Immutable configuration snapshots.
+
+A reload builds a brand-new ConfigSnapshot and AppContext swaps it in with
+a single reference assignment, so readers never take a lock and never see
+a half-applied reload. Hold on to one snapshot for a whole operation to get
+a consistent view of the config.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Mapping, Tuple
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict. Still a dict (so isinstance checks and json.dumps work),
+    but every mutator raises TypeError.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("config snapshots are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    # Copies are for editing, so they come back mutable
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+def freeze(value: Any) -> Any:
+    """Recursively convert dicts to FrozenDict and lists to tuples."""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Mutable deep copy of a frozen structure (for building a new config)."""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+
+MISSING = object()
+
+
+def _keyed_by_id(items: Tuple) -> Any:
+    """{id: item} if every item is a dict with a unique "id", else None."""
+    if not all(isinstance(i, dict) and "id" in i for i in items):
+        return None
+    keyed = {i["id"]: i for i in items}
+    return keyed if len(keyed) == len(items) else None
+
+
+def diff_paths(old: Any, new: Any, prefix: Tuple = ()) -> FrozenSet[Tuple]:
+    """
+    Key paths whose value differs between two configs.
+
+    Paths stop at the deepest key present on both sides, e.g.
+    ("ai", "thresholds", "min_health_score"). Lists of dicts that carry an
+    "id" (zones) are matched by id rather than position, so a change to
+    zone 2 shows up as ("zones", 2, ...) wherever zone 2 sits in the list;
+    other lists are compared as a whole.
+    """
+    if old is new:
+        return frozenset()
+    if isinstance(old, dict) and isinstance(new, dict):
+        paths = set()
+        for key in old.keys() | new.keys():
+            if key not in old or key not in new:
+                paths.add(prefix + (key,))
+            else:
+                paths |= diff_paths(old[key], new[key], prefix + (key,))
+        return frozenset(paths)
+    if isinstance(old, tuple) and isinstance(new, tuple):
+        old_by_id, new_by_id = _keyed_by_id(old), _keyed_by_id(new)
+        if old_by_id is not None and new_by_id is not None:
+            return diff_paths(old_by_id, new_by_id, prefix)
+    return frozenset() if old == new else frozenset([prefix])
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    data: FrozenDict
+    version: int = 0
+    simulation_mode: bool = True
+    zones_by_id: Mapping[int, FrozenDict] = field(default_factory=FrozenDict)
+    # keys tuple -> resolved value (or MISSING); safe because data never changes
+    _memo: Dict[Tuple, Any] = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def build(cls, raw: Dict[str, Any], version: int = 0) -> "ConfigSnapshot":
+        data = freeze(raw)
+        zones = data.get("zones", ())
+        return cls(
+            data=data,
+            version=version,
+            simulation_mode=bool(data.get("system", {}).get("simulation_mode", True)),
+            zones_by_id=FrozenDict((z["id"], z) for z in zones if "id" in z),
+        )
+
+    def get(self, *keys, default=None):
+        return self.lookup(keys, default)
+
+    def lookup(self, keys: Tuple, default=None):
+        value = self._memo.get(keys, MISSING)
+        if value is MISSING:
+            value = self._walk(keys)
+            self._memo[keys] = value
+        return default if value is MISSING else value
+
+    def _walk(self, keys: Tuple) -> Any:
+        node: Any = self.data
+        for key in keys:
+            if not isinstance(node, dict):
+                return MISSING
+            node = node.get(key, MISSING)
+            if node is MISSING:
+                return MISSING
+        return node
+
+    @property
+    def zones(self) -> Tuple[FrozenDict, ...]:
+        return self.data.get("zones", ())
+
+    def zone(self, zone_id: int) -> FrozenDict:
+        try:
+            return self.zones_by_id[zone_id]
+        except KeyError:
+            raise ValueError(f"Zone {zone_id} not found in config") from None
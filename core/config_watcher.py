@@ -0,0 +1,177 @@
+"""
+Config file watching.
+
+ConfigWatcher waits for the config file to change and calls back once the
+writes have settled:
+
+- On Linux it uses inotify on the parent directory, so in-place saves,
+  editor rename-over saves and re-creation are all seen immediately
+- Elsewhere (or if inotify is unavailable) it polls stat() instead
+- Bursts of events are debounced: the callback runs only after the file
+  has been quiet for `debounce_seconds`
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def _load_inotify():
+    """libc handle with inotify symbols, or None if not supported here."""
+    if not hasattr(os, "O_NONBLOCK"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class ConfigWatcher(threading.Thread):
+    """
+    Background thread that watches one file and invokes `callback` after
+    it changes. `backend` is "auto", "inotify" or "poll".
+    """
+
+    def __init__(
+        self,
+        config_path: Path,
+        callback: Callable[[], None],
+        debounce_seconds: float = 0.25,
+        poll_interval_seconds: float = 2.0,
+        backend: str = "auto",
+    ):
+        super().__init__(daemon=True, name="config-watcher")
+        self.config_path = Path(config_path)
+        self.callback = callback
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.requested_backend = backend
+        self.backend: Optional[str] = None  # resolved in run()
+
+        self._stop_event = threading.Event()
+        # Writing to this pipe wakes the inotify select() on stop()
+        self._wake_r, self._wake_w = os.pipe()
+
+    def run(self):
+        inotify_fd = None
+        if self.requested_backend in ("auto", "inotify"):
+            inotify_fd = self._open_inotify()
+
+        try:
+            if inotify_fd is not None:
+                self.backend = "inotify"
+                self._run_inotify(inotify_fd)
+            else:
+                self.backend = "poll"
+                self._run_poll()
+        finally:
+            if inotify_fd is not None:
+                os.close(inotify_fd)
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+
+    def stop(self):
+        self._stop_event.set()
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+
+    def _fire(self):
+        try:
+            self.callback()
+        except Exception:
+            # The callback owns error reporting; never let it kill the watcher
+            pass
+
+    # ------------------------------------------------------------
+    # inotify
+    # ------------------------------------------------------------
+    def _open_inotify(self) -> Optional[int]:
+        libc = _load_inotify()
+        if libc is None:
+            return None
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        directory = str(self.config_path.parent.resolve()).encode()
+        if libc.inotify_add_watch(fd, directory, _WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    def _read_events(self, fd: int) -> bool:
+        """Drain pending events; True if any concern the watched file."""
+        name = self.config_path.name.encode()
+        relevant = False
+        while True:
+            try:
+                buf = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                return relevant
+            offset = 0
+            while offset < len(buf):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(buf, offset)
+                offset += _EVENT_HEADER.size
+                event_name = buf[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_Q_OVERFLOW or event_name == name:
+                    relevant = True
+
+    def _run_inotify(self, fd: int):
+        deadline: Optional[float] = None
+        while not self._stop_event.is_set():
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([fd, self._wake_r], [], [], timeout)
+            if self._stop_event.is_set():
+                return
+            if fd in ready and self._read_events(fd):
+                deadline = time.monotonic() + self.debounce_seconds
+            elif deadline is not None and time.monotonic() >= deadline:
+                deadline = None
+                self._fire()
+
+    # ------------------------------------------------------------
+    # Polling fallback
+    # ------------------------------------------------------------
+    def _signature(self) -> Optional[Tuple[float, int, int]]:
+        try:
+            st = self.config_path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _run_poll(self):
+        last = self._signature()
+        while not self._stop_event.wait(self.poll_interval_seconds):
+            current = self._signature()
+            if current is None or current == last:
+                continue
+            # Wait until the file stops changing
+            while not self._stop_event.wait(self.debounce_seconds):
+                settled = self._signature()
+                if settled == current:
+                    break
+                current = settled
+            if self._stop_event.is_set():
+                return
+            last = current
+            self._fire()
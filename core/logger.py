@@ -1,17 +1,333 @@
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 
 
 LOG_FORMAT = "[%(asctime)s] [%(levelname)s] %(name)s: %(message)s"
 
+OVERFLOW_POLICIES = ("drop", "block")
+LOG_FORMATS = ("text", "json")
+
+# Structured fields callers pass via `extra=`, with the JSON type they are
+# emitted as. Other extras are passed through as-is (or str() if needed).
+TYPED_FIELDS = {
+    "zone_id": int,
+    "pin": int,
+    "state": str,
+    "duration_seconds": float,
+    "duration_minutes": float,
+    "ideal_duration_minutes": float,
+    "health_score": float,
+    "emergency": bool,
+    "suppressed": int,
+    "source": str,
+    "reaction_ms": float,
+}
+
+# App.py decorates level names with ANSI colors for the terminal; files
+# and JSON always get the plain names
+_PLAIN_LEVELS = {
+    logging.DEBUG: "DEBUG",
+    logging.INFO: "INFO",
+    logging.WARNING: "WARNING",
+    logging.ERROR: "ERROR",
+    logging.CRITICAL: "CRITICAL",
+}
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+def _plain_level(levelno: int) -> str:
+    return _PLAIN_LEVELS.get(levelno, f"LEVEL{levelno}")
+
+
+class TextFormatter(logging.Formatter):
+    """
+    The classic LOG_FORMAT line. With `plain_levels` the ANSI-colored
+    level names are replaced by plain ones (for files). Rate-limited
+    records note how many similar lines were suppressed before them.
+    """
+
+    def __init__(self, fmt: str = LOG_FORMAT, plain_levels: bool = False):
+        super().__init__(fmt)
+        self.plain_levels = plain_levels
+
+    def format(self, record: logging.LogRecord) -> str:
+        if self.plain_levels:
+            record = logging.makeLogRecord(record.__dict__)
+            record.levelname = _plain_level(record.levelno)
+        line = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            line += f" [+{suppressed} similar suppressed]"
+        return line
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    One JSON object per line:
+
+        {"ts": "...Z", "level": "INFO", "logger": "...", "msg": "...",
+         "template": "Set relay pin %s → %s", "pin": 17, "state": "on"}
+
+    `template` is the unformatted message, handy for grouping. Extras
+    listed in TYPED_FIELDS are coerced to their declared type.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        ts = datetime.fromtimestamp(record.created, timezone.utc)
+        entry: Dict[str, Any] = {
+            "ts": ts.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            "level": _plain_level(record.levelno),
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "template": str(record.msg),
+        }
+        for key, value in record.__dict__.items():
+            if key in _RECORD_ATTRS or key.startswith("_"):
+                continue
+            entry[key] = self._field(key, value)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+    @staticmethod
+    def _field(key: str, value: Any) -> Any:
+        cast = TYPED_FIELDS.get(key)
+        if cast is None or value is None:
+            return value
+        try:
+            return cast(value)
+        except (TypeError, ValueError):
+            return str(value)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Per-template rate limiting with sampling.
+
+    Records are keyed on (logger, unformatted message), so "Set relay pin
+    %s" is one key whatever the pin. In each `interval_seconds` window the
+    first `burst` records of a key pass; after that only every
+    `sample_every`-th does (0 = none). The first record that passes after
+    some were dropped carries `suppressed=<count>`. Records above
+    `max_level` (warnings and errors by default) are never limited.
+    """
+
+    MAX_KEYS = 10000
+
+    def __init__(
+        self,
+        interval_seconds: float = 60.0,
+        burst: int = 20,
+        sample_every: int = 0,
+        max_level: int = logging.INFO,
+        clock=time.monotonic,
+    ):
+        super().__init__()
+        self.interval_seconds = interval_seconds
+        self.burst = burst
+        self.sample_every = sample_every
+        self.max_level = max_level
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> [window_start, count_in_window, suppressed_since_last_pass]
+        self._windows: Dict[Tuple[str, str], List[float]] = {}
+        self.suppressed_total = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+
+        key = (record.name, str(record.msg))
+        now = self._clock()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval_seconds:
+                if window is None and len(self._windows) >= self.MAX_KEYS:
+                    self._prune(now)
+                suppressed = int(window[2]) if window else 0
+                window = self._windows[key] = [now, 0, suppressed]
+            window[1] += 1
+            count = window[1]
+
+            allowed = count <= self.burst or (
+                self.sample_every > 0 and (count - self.burst) % self.sample_every == 0
+            )
+            if not allowed:
+                window[2] += 1
+                self.suppressed_total += 1
+                return False
+
+            if window[2]:
+                record.suppressed = int(window[2])
+                window[2] = 0
+        return True
+
+    def _prune(self, now: float):
+        expired = [k for k, w in self._windows.items() if now - w[0] >= self.interval_seconds]
+        for k in expired:
+            del self._windows[k]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"suppressed_total": self.suppressed_total, "tracked_templates": len(self._windows)}
+
+
+def build_formatter(kind: str, console: bool = False) -> logging.Formatter:
+    if kind not in LOG_FORMATS:
+        raise ValueError(f"log format must be one of {LOG_FORMATS}, got {kind!r}")
+    if kind == "json":
+        return JsonLinesFormatter()
+    return TextFormatter(plain_levels=not console)
+
+
+def build_rate_limit_filter(rate_cfg: Dict[str, Any]) -> Optional[RateLimitFilter]:
+    if not rate_cfg.get("enabled", False):
+        return None
+    max_level = rate_cfg.get("max_level", "INFO")
+    return RateLimitFilter(
+        interval_seconds=rate_cfg.get("interval_seconds", 60.0),
+        burst=rate_cfg.get("burst", 20),
+        sample_every=rate_cfg.get("sample_every", 0),
+        max_level=getattr(logging, str(max_level).upper(), logging.INFO),
+    )
+
 
 def _ensure_log_dir(path: Path):
     path.mkdir(parents=True, exist_ok=True)
 
 
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler over a bounded queue.
+
+    The calling thread only enqueues the record; formatting and console /
+    file I/O happen on the QueueListener thread. When the queue is full,
+    `overflow="drop"` discards the record and counts it, `overflow="block"`
+    waits up to `block_timeout_seconds` for space (then drops).
+
+    Records are formatted later on the listener thread, so objects passed
+    as log arguments should not be mutated after the call.
+    """
+
+    def __init__(
+        self,
+        log_queue: "queue.Queue[logging.LogRecord]",
+        overflow: str = "drop",
+        block_timeout_seconds: Optional[float] = 1.0,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, got {overflow!r}")
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.block_timeout_seconds = block_timeout_seconds
+
+        self._stats_lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Same process, so no pickling: hand the record over unformatted
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self.overflow == "block":
+                self.queue.put(record, timeout=self.block_timeout_seconds)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+            return
+
+        depth = self.queue.qsize()
+        with self._stats_lock:
+            self.enqueued += 1
+            if depth > self.max_depth:
+                self.max_depth = depth
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "queue_depth": self.queue.qsize(),
+                "queue_max_size": self.queue.maxsize,
+                "max_depth": self.max_depth,
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "overflow": self.overflow,
+            }
+
+
+class _FlushingQueueListener(QueueListener):
+    def enqueue_sentinel(self):
+        # Blocking put: on a full queue the sentinel must still go in, after
+        # the records already waiting, so stop() drains everything
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        super().stop()
+        for handler in self.handlers:
+            handler.flush()
+
+
+_queue_handler: Optional[BoundedQueueHandler] = None
+_listener: Optional[_FlushingQueueListener] = None
+_rate_limit: Optional[RateLimitFilter] = None
+_listener_lock = threading.Lock()
+
+
+def _build_output_handlers(
+    level: int,
+    log_file: Path,
+    rotation_cfg: Dict[str, Any],
+    format_cfg: Dict[str, Any],
+) -> List[logging.Handler]:
+    # Console handler
+    ch = logging.StreamHandler()
+    ch.setLevel(level)
+    ch.setFormatter(build_formatter(format_cfg.get("console", "text"), console=True))
+
+    # File handler with rotation
+    if rotation_cfg.get("enabled", True):
+        fh: logging.Handler = RotatingFileHandler(
+            log_file,
+            maxBytes=rotation_cfg.get("max_size_mb", 10) * 1024 * 1024,
+            backupCount=rotation_cfg.get("backup_count", 5),
+        )
+    else:
+        fh = logging.FileHandler(log_file)
+
+    fh.setLevel(level)
+    fh.setFormatter(build_formatter(format_cfg.get("file", "text")))
+    return [ch, fh]
+
+
 def configure_root_logger(config: Dict[str, Any]) -> logging.Logger:
+    """
+    Console + rotating file logging for the "ingenious_irrigation" logger.
+
+    With `logging.queue.enabled` (the default) the output handlers sit
+    behind a bounded queue drained by a background QueueListener, so log
+    calls on hot paths never wait on console or SD-card I/O. Call
+    shutdown_logging() (also registered with atexit) to flush it.
+
+    `logging.format.console` / `logging.format.file` pick "text" or "json"
+    (JSON lines), and `logging.rate_limit` enables a RateLimitFilter ahead
+    of the queue.
+    """
+    global _queue_handler, _listener, _rate_limit
+
     system_cfg = config.get("system", {})
     logging_cfg = config.get("logging", {})
 
@@ -20,38 +336,81 @@ def configure_root_logger(config: Dict[str, Any]) -> logging.Logger:
 
     log_dir = Path(logging_cfg.get("directory", "data/logs"))
     rotation_cfg = logging_cfg.get("rotation", {})
-    rotation_enabled = rotation_cfg.get("enabled", True)
-    max_size_mb = rotation_cfg.get("max_size_mb", 10)
-    backup_count = rotation_cfg.get("backup_count", 5)
+    queue_cfg = logging_cfg.get("queue", {})
+    format_cfg = logging_cfg.get("format", {})
 
     _ensure_log_dir(log_dir)
     log_file = log_dir / "ingenious_irrigation.log"
 
     logger = logging.getLogger("ingenious_irrigation")
     logger.setLevel(level)
-    logger.handlers.clear()
 
-    formatter = logging.Formatter(LOG_FORMAT)
+    # Reconfiguring: drain and close the previous pipeline first
+    shutdown_logging()
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+        handler.close()
+    if _rate_limit is not None:
+        logger.removeFilter(_rate_limit)
 
-    # Console handler
-    ch = logging.StreamHandler()
-    ch.setLevel(level)
-    ch.setFormatter(formatter)
-    logger.addHandler(ch)
+    output_handlers = _build_output_handlers(level, log_file, rotation_cfg, format_cfg)
+    _rate_limit = build_rate_limit_filter(logging_cfg.get("rate_limit", {}))
 
-    # File handler with rotation
-    if rotation_enabled:
-        fh = RotatingFileHandler(
-            log_file,
-            maxBytes=max_size_mb * 1024 * 1024,
-            backupCount=backup_count,
-        )
+    if queue_cfg.get("enabled", True):
+        with _listener_lock:
+            _queue_handler = BoundedQueueHandler(
+                queue.Queue(maxsize=queue_cfg.get("max_size", 10000)),
+                overflow=queue_cfg.get("overflow", "drop"),
+                block_timeout_seconds=queue_cfg.get("block_timeout_seconds", 1.0),
+            )
+            _queue_handler.setLevel(level)
+            if _rate_limit is not None:
+                _queue_handler.addFilter(_rate_limit)
+            _listener = _FlushingQueueListener(
+                _queue_handler.queue, *output_handlers, respect_handler_level=True
+            )
+            _listener.start()
+        logger.addHandler(_queue_handler)
     else:
-        fh = logging.FileHandler(log_file)
-
-    fh.setLevel(level)
-    fh.setFormatter(formatter)
-    logger.addHandler(fh)
+        # On the logger, not each handler: one verdict per record whatever
+        # the number of outputs
+        if _rate_limit is not None:
+            logger.addFilter(_rate_limit)
+        for handler in output_handlers:
+            logger.addHandler(handler)
 
-    logger.info("Logger initialized. Level=%s, file=%s", log_level_str, log_file)
+    logger.info(
+        "Logger initialized. Level=%s, file=%s, queued=%s",
+        log_level_str,
+        log_file,
+        _queue_handler is not None,
+    )
     return logger
+
+
+def logging_stats() -> Dict[str, Any]:
+    """Queue depth / dropped-record counters and rate-limit suppressions."""
+    handler, rate_limit = _queue_handler, _rate_limit
+    stats: Dict[str, Any] = {"queued": handler is not None}
+    if handler is not None:
+        stats.update(handler.stats())
+    if rate_limit is not None:
+        stats["rate_limit"] = rate_limit.stats()
+    return stats
+
+
+def shutdown_logging() -> None:
+    """Stop the listener after it has written every queued record."""
+    global _queue_handler, _listener
+    with _listener_lock:
+        listener, handler = _listener, _queue_handler
+        _listener = _queue_handler = None
+    if handler is not None:
+        logging.getLogger("ingenious_irrigation").removeHandler(handler)
+    if listener is not None:
+        listener.stop()
+        for output in listener.handlers:
+            output.close()
+
+
+atexit.register(shutdown_logging)
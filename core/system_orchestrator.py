@@ -4,9 +4,13 @@ from typing import List
 from core.app_context import AppContext
 from ai.engine import GardenAIEngine
 from irrigation.controller import IrrigationController
+from irrigation.emergency_shutdown import EmergencyBus, set_emergency_bus
+from irrigation.watering_journal import WateringJournal
 from scheduler.schedule_engine import ScheduleEngine
-from weather.weather_service import WeatherService
+from weather_service import WeatherService
 from monitoring.system_health import SystemHealthMonitor
+import schedule_manager
+from utils.clock import SYSTEM_CLOCK, Clock
 
 
 class SystemOrchestrator:
@@ -17,17 +21,46 @@ class SystemOrchestrator:
     - Scheduler
     - Weather service
     - Health monitoring
+    - Emergency bus (relay shutdown on leaks / flooding)
+    - Watering journal (every finished valve run)
+
+    Every timer-driven service reads time from `clock`. With a
+    VirtualClock, call attach_to(runner) instead of
+    start_background_services() and let the DiscreteEventRunner drive them.
     """
 
-    def __init__(self, ctx: AppContext):
+    def __init__(self, ctx: AppContext, clock: Clock = SYSTEM_CLOCK):
         self.ctx = ctx
+        self.clock = clock
         self.logger: logging.Logger = getattr(ctx, "logger", logging.getLogger(__name__))
 
-        self.ai_engine = GardenAIEngine(ctx)
-        self.irrigation_controller = IrrigationController(ctx)
-        self.weather_service = WeatherService(ctx)
-        self.scheduler = ScheduleEngine(ctx, self.ai_engine, self.irrigation_controller)
-        self.health_monitor = SystemHealthMonitor(ctx, self.ai_engine, self.weather_service)
+        self.ai_engine = GardenAIEngine(ctx, clock=clock)
+        self.irrigation_controller = IrrigationController(ctx, clock=clock)
+        emergency_cfg = ctx.get("safety", "emergency", default={})
+        self.emergency_bus = EmergencyBus(
+            shutdown=self.irrigation_controller.emergency_stop,
+            max_reaction_seconds=emergency_cfg.get("max_reaction_ms", 50) / 1000.0,
+            realtime_priority=emergency_cfg.get("realtime_priority", True),
+            logger=self.logger,
+        )
+        self.emergency_bus.on_emergency(self.irrigation_controller.cancel_jobs_after_emergency)
+        self.emergency_bus.start()
+        set_emergency_bus(self.emergency_bus)
+        self.journal = WateringJournal.from_config(ctx.get("journal", default={}), logger=self.logger)
+        self.irrigation_controller.jobs.on_job_finished(self.journal.record_job)
+        schedule_manager.set_journal(self.journal)
+        self.weather_service = WeatherService(ctx, clock=clock)
+        self.scheduler = ScheduleEngine(
+            ctx,
+            self.ai_engine,
+            self.irrigation_controller,
+            weather_service=self.weather_service,
+            clock=clock,
+        )
+        self.health_monitor = SystemHealthMonitor(ctx, self.ai_engine, self.weather_service, clock=clock)
+
+        # New weather invalidates cached zone evaluations
+        self.weather_service.on_snapshot(self.ai_engine.on_weather_snapshot)
 
         ctx.ai_engine = self.ai_engine
 
@@ -45,19 +78,25 @@ class SystemOrchestrator:
 
         self.logger.info("Running startup checks for zones: %s", zone_ids)
 
+        try:
+            results = self.ai_engine.evaluate_all_zones(zone_ids)
+        except Exception as e:
+            self.logger.exception("Error evaluating zones at startup: %s", e)
+            results = {}
+
         for zone_id in zone_ids:
-            try:
-                eval_result = self.ai_engine.evaluate_zone(zone_id)
-                self.logger.info(
-                    "Startup eval → zone=%s ideal=%.1fm health=%.2f emergency=%s reason=%s",
-                    zone_id,
-                    eval_result.ideal_duration_minutes,
-                    eval_result.health_score,
-                    eval_result.emergency_detected,
-                    eval_result.emergency_reason,
-                )
-            except Exception as e:
-                self.logger.exception("Error evaluating zone %s at startup: %s", zone_id, e)
+            eval_result = results.get(zone_id)
+            if eval_result is None:
+                self.logger.error("Startup eval failed for zone %s", zone_id)
+                continue
+            self.logger.info(
+                "Startup eval → zone=%s ideal=%.1fm health=%.2f emergency=%s reason=%s",
+                zone_id,
+                eval_result.ideal_duration_minutes,
+                eval_result.health_score,
+                eval_result.emergency_detected,
+                eval_result.emergency_reason,
+            )
 
         self.health_monitor.snapshot_system_health()
         self.logger.info("Startup checks complete.")
@@ -65,11 +104,22 @@ class SystemOrchestrator:
     def start_background_services(self):
         self.scheduler.start()
         self.health_monitor.start()
-        self.logger.info("Background services started (scheduler, health monitor).")
+        self.journal.start()
+        self.logger.info("Background services started (scheduler, health monitor, journal).")
+
+    def attach_to(self, runner):
+        """Register the timer-driven services with a DiscreteEventRunner."""
+        runner.add(self.irrigation_controller.jobs, self.scheduler, self.health_monitor)
 
     def shutdown(self):
         self.logger.info("SystemOrchestrator shutting down...")
         self.scheduler.stop()
         self.health_monitor.stop()
+        set_emergency_bus(None)
+        self.emergency_bus.stop()
         self.irrigation_controller.shutdown()
+        schedule_manager.set_journal(None)
+        self.journal.close()  # after the controller, so shutdown cancels are recorded
+        self.ai_engine.shutdown()
+        self.weather_service.close()
         self.logger.info("SystemOrchestrator shutdown complete.")
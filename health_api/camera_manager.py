@@ -30,9 +30,10 @@ class CameraManager:
     # ------------------------------------------------------------
     # Logging helper
     # ------------------------------------------------------------
-    def _log(self, level: str, msg: str, *args):
+    def _log(self, level: str, msg: str, *args, **fields):
+        # `fields` become structured log fields (see core.logger.TYPED_FIELDS)
         if self.logger:
-            getattr(self.logger, level)(msg, *args)
+            getattr(self.logger, level)(msg, *args, extra=fields or None)
 
     # ------------------------------------------------------------
     # Camera initialization
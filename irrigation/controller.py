@@ -1,7 +1,19 @@
+import threading
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, FrozenSet, List, Mapping, Optional, Tuple
 
 from core.app_context import AppContext
+from core.config_snapshot import ConfigSnapshot
+from irrigation.emergency_shutdown import EmergencyActiveError, EmergencyEvent
+from irrigation.relay_backends import (
+    ActuationStats,
+    FakeRelayBackend,
+    RelayBackend,
+    create_relay_backend,
+)
+from irrigation.sequencer import HydraulicLimits, SequencePlan, ZoneRun, plan_sequence
+from irrigation.valve_jobs import ValveJob, ValveJobRunner
+from utils.clock import SYSTEM_CLOCK, Clock
 
 
 class IrrigationController:
@@ -9,13 +21,23 @@ class IrrigationController:
     Low-level irrigation control.
 
     - Maps logical zones → relay pins
-    - Supports simulation mode (no GPIO)
+    - Drives relays through a RelayBackend (RPi.GPIO, I2C expander, or
+      an in-memory fake in simulation mode)
     - Supports active_low / active_high relay boards
+    - Caches each pin's state and skips writes that would not change it
     - Enforces max runtime safety
+    - Runs zones as non-blocking jobs (see ValveJobRunner): watering
+      returns immediately and a shared timer thread closes the valve
+    - emergency_stop() drops every relay and refuses new watering until
+      clear_emergency() (driven by the EmergencyBus)
+
+    With a virtual `clock` the job runner has no timer thread; drive
+    `self.jobs` from a DiscreteEventRunner.
     """
 
-    def __init__(self, ctx: AppContext):
+    def __init__(self, ctx: AppContext, clock: Clock = SYSTEM_CLOCK):
         self.ctx = ctx
+        self.clock = clock
         self.logger = getattr(self.ctx, "logger", None)
 
         self.simulation: bool = ctx.simulation_mode
@@ -23,13 +45,27 @@ class IrrigationController:
         self.zone_pin_map: Dict[str, int] = self.relay_config.get("in_pins", {})
         self.relay_type: str = self.relay_config.get("type", "active_low")
 
-        self._gpio_initialized: bool = False
-        self._gpio = None  # type: ignore[assignment]
+        self.relay: RelayBackend = FakeRelayBackend()
+        self._pin_states: Dict[int, bool] = {}  # pin -> energized, as last written
+        self._relay_lock = threading.Lock()
+        self._sequence_lock = threading.Lock()
+        self.actuation = ActuationStats()
+        self.emergency: Optional[EmergencyEvent] = None  # latched until cleared
 
         self.max_runtime_minutes: float = ctx.get(
             "ai", "thresholds", "max_continuous_runtime_minutes", default=60
         )
 
+        self.jobs = ValveJobRunner(
+            open_valve=lambda pin: self._set_pin_state(pin, True),
+            close_valve=lambda pin: self._set_pin_state(pin, False),
+            max_duration_seconds=self.max_runtime_minutes * 60.0,
+            logger=self.logger,
+            clock=clock.monotonic,
+            wall_clock=clock.time,
+            threaded=not clock.virtual,
+        )
+
         self._log(
             "info",
             "IrrigationController initialized. simulation=%s relay_type=%s pins=%s max_runtime=%sm",
@@ -39,37 +75,78 @@ class IrrigationController:
             self.max_runtime_minutes,
         )
 
-        if not self.simulation:
-            self._init_gpio()
+        self._init_relays()
+
+        if hasattr(self.ctx, "subscribe"):
+            # Relay and runtime-limit edits apply live; switching simulation
+            # mode touches real hardware, so that one still needs a restart
+            self.ctx.subscribe(self._on_relay_change, ("hardware", "relay"))
+            self.ctx.subscribe(
+                self._on_runtime_limit_change,
+                ("ai", "thresholds", "max_continuous_runtime_minutes"),
+            )
+            self.ctx.subscribe(self._on_simulation_mode_change, ("system", "simulation_mode"))
+
+    def _on_relay_change(self, changed: FrozenSet[Tuple], snapshot: ConfigSnapshot):
+        old_pins = set(self.zone_pin_map.values())
+        self.relay_config = snapshot.get("hardware", "relay", default={})
+        self.zone_pin_map = self.relay_config.get("in_pins", {})
+        self.relay_type = self.relay_config.get("type", "active_low")
+
+        with self._relay_lock:
+            self.relay.active_low = self.relay_type == "active_low"
+        new_pins = set(self.zone_pin_map.values()) - old_pins
+        if new_pins:
+            self.relay.setup(new_pins)
+            self.set_pin_states({pin: False for pin in new_pins}, force=True)
+
+        self._log(
+            "info",
+            "Relay config updated: relay_type=%s pins=%s",
+            self.relay_type,
+            self.zone_pin_map,
+        )
+
+    def _on_runtime_limit_change(self, changed: FrozenSet[Tuple], snapshot: ConfigSnapshot):
+        self.max_runtime_minutes = snapshot.get(
+            "ai", "thresholds", "max_continuous_runtime_minutes", default=60
+        )
+        self.jobs.max_duration_seconds = self.max_runtime_minutes * 60.0
+        self._log("info", "Max runtime updated to %sm", self.max_runtime_minutes)
+
+    def _on_simulation_mode_change(self, changed: FrozenSet[Tuple], snapshot: ConfigSnapshot):
+        if snapshot.simulation_mode != self.simulation:
+            self._log(
+                "warning",
+                "simulation_mode changed to %s; restart required to take effect",
+                snapshot.simulation_mode,
+            )
 
-    def _log(self, level: str, msg: str, *args):
+    def _log(self, level: str, msg: str, *args, **fields):
+        # `fields` become structured log fields (see core.logger.TYPED_FIELDS)
         if self.logger:
-            getattr(self.logger, level)(msg, *args)
+            getattr(self.logger, level)(msg, *args, extra=fields or None)
 
-    def _init_gpio(self):
+    def _init_relays(self):
         """
-        Initialize GPIO library and configure relay pins.
+        Create the relay backend and drive every configured relay OFF.
         """
         try:
-            import RPi.GPIO as GPIO  # type: ignore[import]
-
-            self._gpio = GPIO
-            self._gpio.setmode(GPIO.BCM)
-
-            for zone_key, pin in self.zone_pin_map.items():
-                self._gpio.setup(pin, GPIO.OUT)
-                # Ensure relays start OFF
-                self._set_pin_state(pin, False)
-
-            self._gpio_initialized = True
-            self._log("info", "GPIO initialized for relay control.")
+            self.relay = create_relay_backend(self.relay_config, self.simulation)
         except Exception as e:  # ImportError or runtime error
             self._log(
                 "exception",
-                "Failed to initialize GPIO; falling back to simulation mode: %s",
+                "Failed to initialize relay backend; falling back to simulation mode: %s",
                 e,
             )
             self.simulation = True
+            self.relay = create_relay_backend(self.relay_config, simulation=True)
+
+        pins = set(self.zone_pin_map.values())
+        self.relay.setup(pins)
+        # Ensure relays start OFF, whatever state the hardware was left in
+        self.set_pin_states({pin: False for pin in pins}, force=True)
+        self._log("info", "Relay backend initialized: %s", self.relay.name)
 
     def _get_pin_for_zone(self, zone_id: int) -> Optional[int]:
         key = f"zone_{zone_id}"
@@ -78,46 +155,122 @@ class IrrigationController:
             self._log("error", "No relay pin configured for %s", key)
         return pin
 
-    def _set_pin_state(self, pin: int, on: bool):
+    def _set_pin_state(self, pin: int, on: bool, force: bool = False):
         """
-        Set relay pin state, respecting active_low / active_high configuration.
+        Set one relay, respecting active_low / active_high configuration.
+        A write that would not change the cached state is skipped unless
+        `force` is set.
         """
-        if self.simulation:
+        self.set_pin_states({pin: on}, force=force)
+
+    def set_pin_states(self, states: Mapping[int, bool], force: bool = False):
+        """
+        Set several relays in one backend call (one bus transaction per
+        expander chip). Pins already in the requested state are skipped.
+        Energizing is refused while an emergency stop is latched.
+        """
+        with self._relay_lock:
+            if self.emergency is not None and any(states.values()):
+                raise EmergencyActiveError("Emergency stop active; relay not energized")
+            if force:
+                changes = dict(states)
+            else:
+                changes = {p: on for p, on in states.items() if self._pin_states.get(p) != on}
+                skipped = len(states) - len(changes)
+                if skipped:
+                    self.actuation.record_skip(skipped)
+            if not changes:
+                return
+
+            started = time.perf_counter()
+            if len(changes) == 1:
+                (pin, on), = changes.items()
+                self.relay.write(pin, on)
+            else:
+                self.relay.write_many(changes)
+            self.actuation.record(time.perf_counter() - started, pins=len(changes))
+            self._pin_states.update(changes)
+
+        for pin, on in changes.items():
             self._log(
                 "info",
-                "[SIM] Set relay pin %s → %s",
+                "Set relay pin %s → %s (%s)",
                 pin,
                 "ON" if on else "OFF",
+                self.relay.name,
+                pin=pin,
+                state="on" if on else "off",
             )
-            return
 
-        if not self._gpio_initialized or self._gpio is None:
-            raise RuntimeError("GPIO not initialized for hardware mode")
+    def all_relays_off(self):
+        """De-energize every configured relay, bypassing the state cache."""
+        self.set_pin_states({pin: False for pin in self.zone_pin_map.values()}, force=True)
 
-        active_low = self.relay_type == "active_low"
-        if active_low:
-            value = self._gpio.LOW if on else self._gpio.HIGH
-        else:
-            value = self._gpio.HIGH if on else self._gpio.LOW
+    def emergency_stop(self, event: EmergencyEvent):
+        """
+        Latch the emergency and drop every relay in one write, straight to
+        the backend without waiting for _relay_lock: a thread holding it
+        may be starved of the GIL for tens of ms under load. Once latched,
+        set_pin_states refuses to energize anything. Job bookkeeping and
+        the state cache are settled in cancel_jobs_after_emergency, off the
+        timed path.
+        """
+        self.emergency = event
+        self.relay.write_many({pin: False for pin in self.zone_pin_map.values()})
 
-        self._gpio.output(pin, value)
-        self._log(
-            "info",
-            "Set relay pin %s → %s (active_%s)",
-            pin,
-            "ON" if on else "OFF",
-            "low" if active_low else "high",
-        )
+    def cancel_jobs_after_emergency(self, event: EmergencyEvent):
+        """
+        Reconcile the state cache, then retire every job (their close
+        writes are cache hits by now). Any pin the cache shows energized is
+        written off again: either the cache predates the emergency write,
+        or an ON write that passed the latch check just before it landed
+        afterwards.
+        """
+        with self._relay_lock:
+            stale = {p: False for p, on in self._pin_states.items() if on}
+            if stale:
+                self.relay.write_many(stale)
+            self._pin_states.update({pin: False for pin in self.zone_pin_map.values()})
+        self.jobs.close_all(reason=f"emergency: {event.reason}")
+
+    def clear_emergency(self) -> Optional[EmergencyEvent]:
+        """Allow watering again; returns the event that was latched."""
+        event, self.emergency = self.emergency, None
+        if event is not None:
+            self._log("warning", "Emergency %s cleared; watering re-enabled", event.event_id)
+        return event
 
-    def water_zone(self, zone_id: int, duration_minutes: float):
+    def _check_emergency(self):
+        if self.emergency is not None:
+            raise EmergencyActiveError(
+                f"Emergency stop active ({self.emergency.source}: {self.emergency.reason})"
+            )
+
+    def relay_stats(self) -> Dict[str, Any]:
+        with self._relay_lock:
+            energized = sorted(p for p, on in self._pin_states.items() if on)
+        return {
+            "backend": self.relay.name,
+            "simulation": self.simulation,
+            "energized_pins": energized,
+            "emergency_latched": self.emergency is not None,
+            **self.actuation.to_dict(),
+        }
+
+    def water_zone(self, zone_id: int, duration_minutes: float) -> Optional[ValveJob]:
         """
-        Activate a zone for the specified duration (in minutes).
-        Enforces max runtime safety.
+        Start watering a zone for the specified duration (in minutes) and
+        return the running ValveJob without waiting for it. Enforces max
+        runtime safety. Returns None if nothing was started.
+
+        Raises ZoneBusyError if the zone is already running and
+        EmergencyActiveError while an emergency stop is latched.
         """
+        self._check_emergency()
         pin = self._get_pin_for_zone(zone_id)
         if pin is None:
-            self._log("error", "Cannot water zone %s: no pin configured", zone_id)
-            return
+            self._log("error", "Cannot water zone %s: no pin configured", zone_id, zone_id=zone_id)
+            return None
 
         # Safety clamp
         duration_minutes = max(0.0, min(duration_minutes, self.max_runtime_minutes))
@@ -128,8 +281,9 @@ class IrrigationController:
                 "warning",
                 "Requested watering duration is 0 seconds for zone %s. Skipping.",
                 zone_id,
+                zone_id=zone_id,
             )
-            return
+            return None
 
         self._log(
             "info",
@@ -138,23 +292,103 @@ class IrrigationController:
             pin,
             duration_seconds,
             duration_minutes,
+            zone_id=zone_id,
+            pin=pin,
+            duration_seconds=duration_seconds,
+            duration_minutes=duration_minutes,
         )
+        return self.jobs.start(zone_id, pin, duration_seconds)
 
-        self._set_pin_state(pin, True)
-        try:
-            if self.simulation:
-                # In simulation, we don't block for full duration
-                time.sleep(min(1.0, duration_seconds))
-            else:
-                time.sleep(duration_seconds)
-        finally:
-            self._set_pin_state(pin, False)
-            self._log("info", "Completed watering for zone %s", zone_id)
+    def plan_sequence(self, durations_minutes: Dict[int, float]) -> SequencePlan:
+        """
+        Pack the requested runs into a window that respects the site's
+        supply capacity and max concurrent valves (hardware.hydraulics),
+        using each zone's `flow_rate_lpm`.
+
+        Valve jobs already running or scheduled (manual runs, the
+        scheduler, earlier sequences) keep their flow and valve until they
+        end, so the new runs only use what is left. Scheduled jobs are
+        counted from now, which is conservative.
+        """
+        snapshot = self.ctx.snapshot()
+        limits = HydraulicLimits.from_config(snapshot.data)
+
+        def zone_flow(zone_id: int) -> float:
+            zone_cfg = snapshot.zones_by_id.get(zone_id, {})
+            return float(zone_cfg.get("flow_rate_lpm", limits.default_zone_flow_lpm))
+
+        busy = [
+            ((job["remaining_seconds"] or 0.0) / 60.0, zone_flow(job["zone_id"]))
+            for job in self.jobs.jobs()
+        ]
+        runs = []
+        for zone_id, minutes in durations_minutes.items():
+            runs.append(
+                ZoneRun(
+                    zone_id=zone_id,
+                    duration_minutes=max(0.0, min(minutes, self.max_runtime_minutes)),
+                    flow_lpm=zone_flow(zone_id),
+                )
+            )
+        return plan_sequence(runs, limits, busy=busy)
+
+    def run_sequence(self, durations_minutes: Dict[int, float]) -> Tuple[SequencePlan, List[ValveJob]]:
+        """
+        Plan the runs and schedule every one as a delayed valve job, so the
+        whole sequence is dispatched at once and nothing blocks.
+        """
+        self._check_emergency()
+        jobs: List[ValveJob] = []
+        # Two sequences planned at once would each see the other's valves free
+        with self._sequence_lock:
+            plan = self.plan_sequence(durations_minutes)
+            try:
+                for run in plan.runs:
+                    pin = self._get_pin_for_zone(run.zone_id)
+                    if pin is None:
+                        continue
+                    jobs.append(
+                        self.jobs.start(
+                            run.zone_id,
+                            pin,
+                            run.duration_minutes * 60.0,
+                            delay_seconds=run.start_minute * 60.0,
+                        )
+                    )
+            except Exception:
+                # All or nothing: a busy zone would otherwise leave half a plan
+                for job in jobs:
+                    self.jobs.cancel(job.job_id, reason="sequence aborted")
+                raise
+        self._log(
+            "info",
+            "Sequenced %d zone runs into a %.1f minute window (%s)",
+            len(jobs),
+            plan.window_minutes,
+            plan.strategy,
+        )
+        return plan, jobs
+
+    def cancel_watering(self, job_id: str) -> Optional[ValveJob]:
+        return self.jobs.cancel(job_id)
+
+    def stop_zone(self, zone_id: int) -> Optional[ValveJob]:
+        return self.jobs.cancel_zone(zone_id)
+
+    def extend_watering(self, job_id: str, extra_minutes: float) -> Optional[ValveJob]:
+        return self.jobs.extend(job_id, extra_minutes * 60.0)
+
+    def watering_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.status(job_id)
+
+    def watering_jobs(self, include_finished: bool = False) -> List[Dict[str, Any]]:
+        return self.jobs.jobs(include_finished=include_finished)
 
     def shutdown(self):
         """
-        Clean up GPIO on shutdown.
+        Close any open valves, then release the relay hardware on shutdown.
         """
-        if not self.simulation and self._gpio_initialized and self._gpio is not None:
-            self._gpio.cleanup()
-            self._log("info", "GPIO cleaned up on shutdown.")
+        self.jobs.stop()
+        self.all_relays_off()
+        self.relay.cleanup()
+        self._log("info", "Relay backend %s cleaned up on shutdown.", self.relay.name)
@@ -1,5 +1,288 @@
+"""
+Emergency shutdown path.
+
+Anything that spots a leak, flooding or a burst pipe (vision detections,
+the AI engine's pressure check, an operator via the API) publishes an
+EmergencyEvent on the EmergencyBus and returns immediately. One dedicated
+handler thread does nothing but wait for those events and run the
+shutdown action (IrrigationController.emergency_stop: every relay off),
+so the reaction never queues behind API requests, evaluations or valve
+bookkeeping.
+
+Time from detection to relay-off is recorded per event (EmergencyStats),
+and events slower than `max_reaction_seconds` are counted as misses.
+"""
+
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+
 def emergency_check(detections):
     for d in detections:
         if d["label"] in ["water", "mud"] and d["confidence"] > 0.8:
             return True
     return False
+
+
+class EmergencyActiveError(RuntimeError):
+    """Watering was refused because an emergency stop is latched."""
+
+
+@dataclass
+class EmergencyEvent:
+    source: str  # "vision", "pressure", "api", ...
+    reason: str
+    zone_id: Optional[int] = None
+    detected_at: float = field(default_factory=time.perf_counter)  # perf_counter, compared on the handler side
+    detected_wall: float = field(default_factory=time.time)
+    event_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    reaction_seconds: Optional[float] = None  # detection -> relays off
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "event_id": self.event_id,
+            "source": self.source,
+            "reason": self.reason,
+            "zone_id": self.zone_id,
+            "detected_at": self.detected_wall,
+            "reaction_ms": None if self.reaction_seconds is None else self.reaction_seconds * 1000,
+            "error": self.error,
+        }
+
+
+class EmergencyStats:
+    """Reaction-time samples and deadline misses."""
+
+    def __init__(self, max_reaction_seconds: float, window: int = 1000):
+        self.max_reaction_seconds = max_reaction_seconds
+        self._lock = threading.Lock()
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.published = 0
+        self.handled = 0
+        self.shutdowns = 0
+        self.failures = 0
+        self.deadline_misses = 0
+        self.worst_seconds = 0.0
+
+    def record_publish(self) -> None:
+        with self._lock:
+            self.published += 1
+
+    def record(self, events: List[EmergencyEvent], failed: bool) -> None:
+        with self._lock:
+            self.shutdowns += 1
+            self.failures += int(failed)
+            for event in events:
+                self.handled += 1
+                seconds = event.reaction_seconds or 0.0
+                self._samples.append(seconds)
+                if seconds > self.worst_seconds:
+                    self.worst_seconds = seconds
+                if seconds > self.max_reaction_seconds:
+                    self.deadline_misses += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = sorted(self._samples)
+            counts = {
+                "published": self.published,
+                "handled": self.handled,
+                "shutdowns": self.shutdowns,
+                "failures": self.failures,
+                "deadline_misses": self.deadline_misses,
+            }
+            worst = self.worst_seconds
+
+        def pct(p: float) -> Optional[float]:
+            if not samples:
+                return None
+            return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+        return {
+            **counts,
+            "max_reaction_ms": self.max_reaction_seconds * 1000,
+            "reaction_ms_p50": pct(0.5),
+            "reaction_ms_p99": pct(0.99),
+            "reaction_ms_worst": worst * 1000,
+        }
+
+
+_STOP = object()
+
+
+class EmergencyBus:
+    """
+    `shutdown(event)` performs the emergency action and must be safe to
+    call repeatedly. publish() only enqueues, so it is safe from any
+    thread, including the event loop. Events that arrive while a shutdown
+    is running are coalesced into the next one: relays are already off
+    for all of them by the time it returns.
+
+    `realtime_priority` asks the OS to run the handler thread SCHED_FIFO
+    (Linux, needs CAP_SYS_NICE); without the privilege it stays a normal
+    thread, which is still only ever woken for emergencies.
+
+    The OS priority does not help with the GIL: a woken handler waits for
+    the interpreter's switch interval (5 ms by default) for each busy
+    thread ahead of it. That interval is process-wide, so the bus leaves
+    it alone; App lowers it at startup when
+    `safety.emergency.switch_interval_ms` is set.
+    """
+
+    def __init__(
+        self,
+        shutdown: Callable[[EmergencyEvent], None],
+        max_reaction_seconds: float = 0.05,
+        realtime_priority: bool = True,
+        history_size: int = 50,
+        logger=None,
+    ):
+        self._shutdown = shutdown
+        self.realtime_priority = realtime_priority
+        self.logger = logger
+        self.stats = EmergencyStats(max_reaction_seconds)
+
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._history: Deque[EmergencyEvent] = deque(maxlen=history_size)
+        self._listeners: List[Callable[[EmergencyEvent], None]] = []
+        self._thread: Optional[threading.Thread] = None
+        self.priority = "normal"
+
+    def _log(self, level: str, msg: str, *args, **fields):
+        if self.logger:
+            getattr(self.logger, level)(msg, *args, extra=fields or None)
+
+    def on_emergency(self, callback: Callable[[EmergencyEvent], None]) -> None:
+        """Called on the handler thread after the relays are off."""
+        self._listeners.append(callback)
+
+    def start(self) -> "EmergencyBus":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="emergency-bus", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def publish(
+        self,
+        source: str,
+        reason: str,
+        zone_id: Optional[int] = None,
+        detected_at: Optional[float] = None,
+    ) -> EmergencyEvent:
+        """
+        Report an emergency. `detected_at` (time.perf_counter) lets the
+        caller backdate the event to when the condition was observed;
+        by default it is now.
+        """
+        event = EmergencyEvent(source=source, reason=reason, zone_id=zone_id)
+        if detected_at is not None:
+            event.detected_at = detected_at
+        self.stats.record_publish()
+        self._queue.put(event)
+        return event
+
+    def history(self) -> List[Dict[str, Any]]:
+        return [e.to_dict() for e in reversed(self._history)]
+
+    # ------------------------------------------------------------
+    # Handler thread
+    # ------------------------------------------------------------
+    def _raise_priority(self) -> None:
+        if not self.realtime_priority or not hasattr(os, "sched_setscheduler"):
+            return
+        try:
+            tid = threading.get_native_id()
+            os.sched_setscheduler(tid, os.SCHED_FIFO, os.sched_param(os.sched_get_priority_min(os.SCHED_FIFO)))
+            self.priority = "SCHED_FIFO"
+        except OSError as e:
+            self._log("debug", "Emergency handler stays at normal priority: %s", e)
+
+    def _run(self) -> None:
+        self._raise_priority()
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stopping = False
+            while True:
+                try:
+                    more = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if more is _STOP:
+                    stopping = True
+                    break
+                batch.append(more)
+            self._handle(batch)
+            if stopping:
+                return
+
+    def _handle(self, batch: List[EmergencyEvent]) -> None:
+        first = batch[0]
+        failed = False
+        try:
+            self._shutdown(first)
+        except Exception as e:
+            failed = True
+            first.error = str(e)
+        off_at = time.perf_counter()
+
+        for event in batch:
+            event.reaction_seconds = off_at - event.detected_at
+            self._history.append(event)
+        self.stats.record(batch, failed)
+
+        # Everything below is after the relays are off
+        for event in batch:
+            if failed:
+                self._log(
+                    "critical",
+                    "EMERGENCY shutdown FAILED (%s: %s): %s",
+                    event.source,
+                    event.reason,
+                    first.error,
+                    zone_id=event.zone_id,
+                )
+            else:
+                self._log(
+                    "critical",
+                    "EMERGENCY shutdown (%s: %s) relays off in %.2f ms",
+                    event.source,
+                    event.reason,
+                    event.reaction_seconds * 1000,
+                    zone_id=event.zone_id,
+                    source=event.source,
+                    reaction_ms=event.reaction_seconds * 1000,
+                )
+            for callback in self._listeners:
+                try:
+                    callback(event)
+                except Exception as e:
+                    self._log("exception", "Emergency listener failed: %s", e)
+
+
+_emergency_bus: Optional[EmergencyBus] = None
+
+
+def set_emergency_bus(bus: Optional[EmergencyBus]) -> None:
+    """Install the process-wide bus (done by SystemOrchestrator)."""
+    global _emergency_bus
+    _emergency_bus = bus
+
+
+def get_emergency_bus() -> Optional[EmergencyBus]:
+    return _emergency_bus
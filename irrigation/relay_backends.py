@@ -0,0 +1,247 @@
+"""
+Relay hardware backends.
+
+IrrigationController talks to relays only through RelayBackend, in terms
+of "energized or not"; each backend maps that onto its hardware, taking
+active_low / active_high wiring into account.
+
+- RPiGPIOBackend:  one GPIO pin per relay (RPi.GPIO)
+- ExpanderBackend: relays behind I2C / shift-register expanders, where
+                   one bus transaction writes a whole chip's outputs, so
+                   batched writes cost one transaction per chip
+- FakeRelayBackend: in-memory, with optional simulated write latency,
+                   for simulation mode and benchmarks
+
+ActuationStats records per-write latency so backends can be compared
+without a Pi.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Mapping, Optional
+
+
+class RelayBackend(ABC):
+    name = "abstract"
+
+    def __init__(self, active_low: bool = True):
+        self.active_low = active_low
+
+    @abstractmethod
+    def setup(self, pins: Iterable[int]) -> None:
+        """Configure pins as outputs (state is set separately)."""
+
+    @abstractmethod
+    def write(self, pin: int, energized: bool) -> None:
+        ...
+
+    def write_many(self, states: Mapping[int, bool]) -> None:
+        """Backends that can batch override this."""
+        for pin, energized in states.items():
+            self.write(pin, energized)
+
+    def cleanup(self) -> None:
+        pass
+
+    def _level(self, energized: bool) -> bool:
+        """Electrical level (True = high) for the wanted relay state."""
+        return energized != self.active_low
+
+
+class RPiGPIOBackend(RelayBackend):
+    name = "rpi_gpio"
+
+    def __init__(self, active_low: bool = True):
+        super().__init__(active_low)
+        import RPi.GPIO as GPIO  # type: ignore[import]
+
+        self._gpio = GPIO
+        self._gpio.setmode(GPIO.BCM)
+
+    def setup(self, pins: Iterable[int]) -> None:
+        for pin in pins:
+            self._gpio.setup(pin, self._gpio.OUT)
+
+    def write(self, pin: int, energized: bool) -> None:
+        self._gpio.output(pin, self._gpio.HIGH if self._level(energized) else self._gpio.LOW)
+
+    def cleanup(self) -> None:
+        self._gpio.cleanup()
+
+
+class ExpanderBackend(RelayBackend):
+    """
+    Relays on expander chips. Pin n is channel n % channels of chip
+    n // channels. A shadow register per chip holds the output levels and
+    every flush writes the whole register with one `transport(chip, value)`
+    call, so write_many touching k chips costs k bus transactions.
+    """
+
+    name = "expander"
+
+    def __init__(
+        self,
+        transport: Callable[[int, int], None],
+        channels: int = 16,
+        active_low: bool = True,
+    ):
+        super().__init__(active_low)
+        self.transport = transport
+        self.channels = channels
+        self._registers: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def setup(self, pins: Iterable[int]) -> None:
+        with self._lock:
+            for pin in pins:
+                chip = pin // self.channels
+                # All relays de-energized until told otherwise
+                idle = 0 if not self.active_low else (1 << self.channels) - 1
+                self._registers.setdefault(chip, idle)
+
+    def _apply(self, pin: int, energized: bool) -> int:
+        chip, bit = divmod(pin, self.channels)
+        register = self._registers.get(chip, 0)
+        if self._level(energized):
+            register |= 1 << bit
+        else:
+            register &= ~(1 << bit)
+        self._registers[chip] = register
+        return chip
+
+    def write(self, pin: int, energized: bool) -> None:
+        with self._lock:
+            chip = self._apply(pin, energized)
+            self.transport(chip, self._registers[chip])
+
+    def write_many(self, states: Mapping[int, bool]) -> None:
+        with self._lock:
+            chips = {self._apply(pin, energized) for pin, energized in states.items()}
+            for chip in sorted(chips):
+                self.transport(chip, self._registers[chip])
+
+
+def mcp23017_transport(bus_number: int = 1, base_address: int = 0x20) -> Callable[[int, int], None]:
+    """
+    Transport for MCP23017 16-channel I2C expanders (chip n at
+    base_address + n), writing OLATA/OLATB in one block write. Needs smbus2.
+    """
+    from smbus2 import SMBus  # type: ignore[import]
+
+    bus = SMBus(bus_number)
+    configured = set()
+
+    def transport(chip: int, value: int) -> None:
+        address = base_address + chip
+        if address not in configured:
+            bus.write_i2c_block_data(address, 0x00, [0x00, 0x00])  # IODIRA/B: all outputs
+            configured.add(address)
+        bus.write_i2c_block_data(address, 0x14, [value & 0xFF, (value >> 8) & 0xFF])  # OLATA/B
+
+    return transport
+
+
+class FakeRelayBackend(RelayBackend):
+    """In-memory relays. `write_latency_seconds` simulates a slow bus."""
+
+    name = "fake"
+
+    def __init__(self, active_low: bool = True, write_latency_seconds: float = 0.0):
+        super().__init__(active_low)
+        self.write_latency_seconds = write_latency_seconds
+        self.levels: Dict[int, bool] = {}
+        self.transactions = 0
+
+    def setup(self, pins: Iterable[int]) -> None:
+        for pin in pins:
+            self.levels.setdefault(pin, self._level(False))
+
+    def _transaction(self):
+        self.transactions += 1
+        if self.write_latency_seconds:
+            time.sleep(self.write_latency_seconds)
+
+    def write(self, pin: int, energized: bool) -> None:
+        self._transaction()
+        self.levels[pin] = self._level(energized)
+
+    def write_many(self, states: Mapping[int, bool]) -> None:
+        self._transaction()
+        for pin, energized in states.items():
+            self.levels[pin] = self._level(energized)
+
+    def energized(self, pin: int) -> bool:
+        return self.levels.get(pin, self._level(False)) == self._level(True)
+
+
+def create_relay_backend(relay_cfg: Dict[str, Any], simulation: bool) -> RelayBackend:
+    """
+    Backend named by `hardware.relay.backend` ("rpi_gpio", "expander",
+    "fake"); simulation mode always gets the fake one.
+    """
+    active_low = relay_cfg.get("type", "active_low") == "active_low"
+    kind = "fake" if simulation else relay_cfg.get("backend", "rpi_gpio")
+
+    if kind == "fake":
+        return FakeRelayBackend(
+            active_low=active_low,
+            write_latency_seconds=relay_cfg.get("fake_write_latency_ms", 0.0) / 1000.0,
+        )
+    if kind == "rpi_gpio":
+        return RPiGPIOBackend(active_low=active_low)
+    if kind == "expander":
+        expander_cfg = relay_cfg.get("expander", {})
+        return ExpanderBackend(
+            transport=mcp23017_transport(
+                bus_number=expander_cfg.get("i2c_bus", 1),
+                base_address=expander_cfg.get("base_address", 0x20),
+            ),
+            channels=expander_cfg.get("channels", 16),
+            active_low=active_low,
+        )
+    raise ValueError(f"Unknown relay backend: {kind}")
+
+
+class ActuationStats:
+    """Write counts, skipped (already-in-state) writes and latency samples."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.writes = 0
+        self.pins_written = 0
+        self.skipped = 0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float, pins: int = 1) -> None:
+        with self._lock:
+            self.writes += 1
+            self.pins_written += pins
+            self._samples.append(seconds)
+            if seconds > self.max_seconds:
+                self.max_seconds = seconds
+
+    def record_skip(self, pins: int = 1) -> None:
+        with self._lock:
+            self.skipped += pins
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            samples: List[float] = sorted(self._samples)
+            writes, pins, skipped, worst = self.writes, self.pins_written, self.skipped, self.max_seconds
+
+        def pct(p: float) -> Optional[float]:
+            if not samples:
+                return None
+            return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+        return {
+            "writes": writes,
+            "pins_written": pins,
+            "skipped_redundant": skipped,
+            "latency_ms_p50": pct(0.5),
+            "latency_ms_p99": pct(0.99),
+            "latency_ms_max": worst * 1000,
+        }
@@ -0,0 +1,212 @@
+"""
+Hydraulic-capacity-aware zone sequencing.
+
+Opening too many valves at once drops line pressure. Given the requested
+runs, each zone's flow rate and the site's limits (supply capacity and
+max concurrent valves), plan_sequence() packs the runs into a schedule
+that never exceeds either limit and keeps the overall watering window
+short.
+
+The packing is greedy list scheduling: walk time forward event by event
+(a run ending frees its flow and valve) and at each event start every
+pending run that fits, in priority order, so smaller runs backfill the
+gaps that bigger ones leave. A few priority orders are tried and the
+shortest window wins. The result is checked against a simple lower bound
+(longest run, total valve-minutes / valves, total litres / capacity).
+"""
+
+import heapq
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+_EPS = 1e-9
+
+
+@dataclass(frozen=True)
+class HydraulicLimits:
+    supply_capacity_lpm: float
+    max_concurrent_valves: int
+    default_zone_flow_lpm: float = 20.0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "HydraulicLimits":
+        cfg = config.get("hardware", {}).get("hydraulics", {})
+        return cls(
+            supply_capacity_lpm=float(cfg.get("supply_capacity_lpm", float("inf"))),
+            max_concurrent_valves=int(cfg.get("max_concurrent_valves", 1)),
+            default_zone_flow_lpm=float(cfg.get("default_zone_flow_lpm", 20.0)),
+        )
+
+
+@dataclass(frozen=True)
+class ZoneRun:
+    zone_id: int
+    duration_minutes: float
+    flow_lpm: float
+
+
+@dataclass(frozen=True)
+class PlannedRun:
+    zone_id: int
+    start_minute: float
+    duration_minutes: float
+    flow_lpm: float
+
+    @property
+    def end_minute(self) -> float:
+        return self.start_minute + self.duration_minutes
+
+
+@dataclass
+class SequencePlan:
+    runs: List[PlannedRun]
+    limits: HydraulicLimits
+    window_minutes: float
+    lower_bound_minutes: float
+    strategy: str
+
+    def peak_usage(self) -> Tuple[float, int]:
+        """(peak flow lpm, peak open valves) over the plan."""
+        events = sorted(
+            [(r.start_minute, 1, r.flow_lpm) for r in self.runs]
+            + [(r.end_minute, 0, -r.flow_lpm) for r in self.runs]
+        )  # ends sort before starts at the same instant
+        flow = peak_flow = 0.0
+        valves = peak_valves = 0
+        for _, is_start, delta in events:
+            flow += delta
+            valves += 1 if is_start else -1
+            peak_flow = max(peak_flow, flow)
+            peak_valves = max(peak_valves, valves)
+        return peak_flow, peak_valves
+
+    def to_dict(self) -> Dict[str, Any]:
+        peak_flow, peak_valves = self.peak_usage()
+        return {
+            "strategy": self.strategy,
+            "window_minutes": round(self.window_minutes, 2),
+            "lower_bound_minutes": round(self.lower_bound_minutes, 2),
+            "peak_flow_lpm": round(peak_flow, 2),
+            "peak_valves": peak_valves,
+            "supply_capacity_lpm": self.limits.supply_capacity_lpm,
+            "max_concurrent_valves": self.limits.max_concurrent_valves,
+            "runs": [
+                {
+                    "zone_id": r.zone_id,
+                    "start_minute": round(r.start_minute, 2),
+                    "duration_minutes": round(r.duration_minutes, 2),
+                    "flow_lpm": r.flow_lpm,
+                }
+                for r in self.runs
+            ],
+        }
+
+
+# Priority orders tried by plan_sequence; the shortest window wins
+ORDERINGS: Dict[str, Callable[[ZoneRun], Tuple]] = {
+    "longest_first": lambda r: (-r.duration_minutes, -r.flow_lpm),
+    "largest_volume_first": lambda r: (-r.duration_minutes * r.flow_lpm, -r.duration_minutes),
+    "highest_flow_first": lambda r: (-r.flow_lpm, -r.duration_minutes),
+}
+
+
+def lower_bound(runs: Sequence[ZoneRun], limits: HydraulicLimits) -> float:
+    if not runs:
+        return 0.0
+    bound = max(
+        max(r.duration_minutes for r in runs),
+        sum(r.duration_minutes for r in runs) / limits.max_concurrent_valves,
+    )
+    if limits.supply_capacity_lpm != float("inf"):
+        volume = sum(r.duration_minutes * r.flow_lpm for r in runs)
+        bound = max(bound, volume / limits.supply_capacity_lpm)
+    return bound
+
+
+def list_schedule(
+    ordered: Sequence[ZoneRun],
+    limits: HydraulicLimits,
+    busy: Sequence[Tuple[float, float]] = (),
+) -> List[PlannedRun]:
+    """
+    Greedy event-driven packing of `ordered` (highest priority first).
+    `busy` holds (end_minute, flow) of valves that are already taken.
+    """
+    capacity = limits.supply_capacity_lpm + _EPS
+    max_valves = limits.max_concurrent_valves
+
+    pending = list(ordered)
+    running: List[Tuple[float, float]] = list(busy)  # heap of (end_minute, flow)
+    heapq.heapify(running)
+    planned: List[PlannedRun] = []
+    now = 0.0
+    flow = sum(f for _, f in running)
+
+    while pending:
+        if len(running) < max_valves:
+            free = capacity - flow
+            waiting = []
+            for i, run in enumerate(pending):
+                if len(running) >= max_valves:
+                    waiting.extend(pending[i:])
+                    break
+                if run.flow_lpm <= free:
+                    planned.append(PlannedRun(run.zone_id, now, run.duration_minutes, run.flow_lpm))
+                    heapq.heappush(running, (now + run.duration_minutes, run.flow_lpm))
+                    flow += run.flow_lpm
+                    free -= run.flow_lpm
+                else:
+                    waiting.append(run)
+            pending = waiting
+            if not pending:
+                break
+
+        # Advance to the next run ending (and release everything ending then)
+        now, released = heapq.heappop(running)
+        flow -= released
+        while running and running[0][0] <= now + _EPS:
+            flow -= heapq.heappop(running)[1]
+
+    return planned
+
+
+def plan_sequence(
+    runs: Iterable[ZoneRun],
+    limits: HydraulicLimits,
+    orderings: Optional[Dict[str, Callable[[ZoneRun], Tuple]]] = None,
+    busy: Sequence[Tuple[float, float]] = (),
+) -> SequencePlan:
+    """
+    Pack `runs` under `limits`. Zero-length runs are dropped. Raises
+    ValueError if a single zone needs more flow than the supply provides.
+
+    `busy` lists runs outside this plan as (end_minute, flow_lpm) from
+    now; they hold their flow and a valve until they end, so new runs
+    only start in what they leave free.
+    """
+    runs = [r for r in runs if r.duration_minutes > 0]
+    too_big = [r.zone_id for r in runs if r.flow_lpm > limits.supply_capacity_lpm + _EPS]
+    if too_big:
+        raise ValueError(
+            f"Zones {too_big} need more flow than the supply capacity "
+            f"({limits.supply_capacity_lpm} lpm)"
+        )
+    if limits.max_concurrent_valves < 1:
+        raise ValueError("max_concurrent_valves must be at least 1")
+
+    best: Optional[Tuple[float, str, List[PlannedRun]]] = None
+    for name, key in (orderings or ORDERINGS).items():
+        planned = list_schedule(sorted(runs, key=key), limits, busy)
+        window = max((p.end_minute for p in planned), default=0.0)
+        if best is None or window < best[0] - _EPS:
+            best = (window, name, planned)
+
+    window, strategy, planned = best  # type: ignore[misc]
+    planned.sort(key=lambda p: (p.start_minute, p.zone_id))
+    return SequencePlan(
+        runs=planned,
+        limits=limits,
+        window_minutes=window,
+        lower_bound_minutes=lower_bound(runs, limits),
+        strategy=strategy,
+    )
@@ -1,10 +1,57 @@
+import asyncio
+import logging
 import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
 
 class ValveController:
-    def __init__(self, gpio_pin):
+    """
+    One valve on one GPIO pin.
+
+    `actuator(pin, open)` performs the physical write; without one the
+    valve is simulated and only logs. Use `await open_for(...)` from async
+    code; `open()` is the old blocking call.
+    """
+
+    def __init__(self, gpio_pin, actuator: Optional[Callable[[int, bool], None]] = None):
         self.gpio_pin = gpio_pin
+        self.actuator = actuator
+        self.is_open = False
+
+    def _set(self, open_: bool):
+        if self.actuator is not None:
+            self.actuator(self.gpio_pin, open_)
+        self.is_open = open_
+        logger.debug("Valve %s %s", self.gpio_pin, "OPEN" if open_ else "CLOSED", extra={"pin": self.gpio_pin})
+
+    def close(self):
+        """Close the valve; harmless if it is already closed."""
+        if self.is_open:
+            self._set(False)
 
     def open(self, duration):
-        print(f"Valve {self.gpio_pin} OPEN for {duration} min")
-        time.sleep(duration * 60)
-        print(f"Valve {self.gpio_pin} CLOSED")
+        self._set(True)
+        try:
+            time.sleep(duration * 60)
+        finally:
+            self._set(False)
+
+    async def open_for(self, duration_minutes: float) -> float:
+        """
+        Open the valve, wait `duration_minutes` on the event loop, then
+        close it. Cancelling the awaiting task closes the valve at once.
+        Returns the seconds the valve was open (by the loop's clock).
+        """
+        if self.is_open:
+            raise RuntimeError(f"Valve {self.gpio_pin} is already open")
+
+        loop = asyncio.get_running_loop()
+        opened_at = loop.time()
+        self._set(True)
+        try:
+            await asyncio.sleep(max(0.0, duration_minutes) * 60)
+        finally:
+            self._set(False)
+        return loop.time() - opened_at
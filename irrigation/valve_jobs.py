@@ -0,0 +1,349 @@
+"""
+Non-blocking valve runs.
+
+ValveJobRunner opens a valve, records its shut-off deadline in a heap and
+returns immediately. One timer thread sleeps until the earliest deadline
+and closes whatever is due, so any number of concurrent zone runs costs
+a single thread. Jobs can be cancelled or extended while running, and can
+be scheduled to open later (used to dispatch sequenced runs).
+
+With `threaded=False` there is no timer thread: a DiscreteEventRunner
+calls next_wakeup() / run_due() against a virtual clock instead.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SCHEDULED = "scheduled"
+RUNNING = "running"
+COMPLETED = "completed"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+
+class ZoneBusyError(RuntimeError):
+    """A zone already has a scheduled or running job."""
+
+
+@dataclass
+class ValveJob:
+    zone_id: int
+    pin: int
+    duration_seconds: float
+    started_at: Optional[float]  # wall clock (runner's wall_clock) for reporting
+    deadline: float  # runner clock, drives the shut-off
+    start_at: float = 0.0  # runner clock, when the valve opens
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    state: str = SCHEDULED
+    ended_at: Optional[float] = None
+    end_reason: Optional[str] = None
+    _done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def running(self) -> bool:
+        return self.state == RUNNING
+
+    @property
+    def active(self) -> bool:
+        return self.state in (SCHEDULED, RUNNING)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the valve is closed (for scripts and tests)."""
+        return self._done.wait(timeout)
+
+    def to_dict(self, now: Optional[float] = None) -> Dict[str, Any]:
+        remaining = starts_in = None
+        if self.active and now is not None:
+            remaining = max(0.0, self.deadline - now)
+        if self.state == SCHEDULED and now is not None:
+            starts_in = max(0.0, self.start_at - now)
+        return {
+            "job_id": self.job_id,
+            "zone_id": self.zone_id,
+            "pin": self.pin,
+            "state": self.state,
+            "duration_seconds": self.duration_seconds,
+            "remaining_seconds": remaining,
+            "starts_in_seconds": starts_in,
+            "started_at": self.started_at,
+            "ended_at": self.ended_at,
+            "end_reason": self.end_reason,
+        }
+
+
+class ValveJobRunner:
+    """
+    `open_valve(pin)` / `close_valve(pin)` do the actual relay writes.
+    `max_duration_seconds` caps a job's total run time, including
+    extensions (None = no cap).
+    """
+
+    def __init__(
+        self,
+        open_valve: Callable[[int], None],
+        close_valve: Callable[[int], None],
+        max_duration_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        history_size: int = 1000,
+        logger=None,
+        wall_clock: Callable[[], float] = time.time,
+        threaded: bool = True,
+    ):
+        self._open_valve = open_valve
+        self._close_valve = close_valve
+        self.max_duration_seconds = max_duration_seconds
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self.threaded = threaded
+        self.history_size = history_size
+        self.logger = logger
+
+        self._cond = threading.Condition()
+        # (due time, seq, job_id): valve opens for scheduled jobs, shut-offs
+        # for running ones. Stale entries are skipped when popped
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._active: Dict[str, ValveJob] = {}
+        self._by_zone: Dict[int, str] = {}
+        self._finished: "OrderedDict[str, ValveJob]" = OrderedDict()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._finish_listeners: List[Callable[[ValveJob], None]] = []
+
+    def _log(self, level: str, msg: str, *args, **fields):
+        if self.logger:
+            getattr(self.logger, level)(msg, *args, extra=fields or None)
+
+    def _ensure_thread(self):
+        if self.threaded and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="valve-timer", daemon=True)
+            self._thread.start()
+
+    def _clamp(self, seconds: float) -> float:
+        seconds = max(0.0, seconds)
+        if self.max_duration_seconds is not None:
+            seconds = min(seconds, self.max_duration_seconds)
+        return seconds
+
+    # ------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------
+    def start(
+        self,
+        zone_id: int,
+        pin: int,
+        duration_seconds: float,
+        delay_seconds: float = 0.0,
+    ) -> ValveJob:
+        """
+        Open the valve now (or after `delay_seconds`) and close it
+        `duration_seconds` later.
+        """
+        duration_seconds = self._clamp(duration_seconds)
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("valve runner is shutting down")
+            if zone_id in self._by_zone:
+                raise ZoneBusyError(f"Zone {zone_id} is already running (job {self._by_zone[zone_id]})")
+
+            start_at = self._clock() + max(0.0, delay_seconds)
+            job = ValveJob(
+                zone_id=zone_id,
+                pin=pin,
+                duration_seconds=duration_seconds,
+                started_at=None,
+                start_at=start_at,
+                deadline=start_at + duration_seconds,
+                state=SCHEDULED,
+            )
+            self._active[job.job_id] = job
+            self._by_zone[zone_id] = job.job_id
+            if delay_seconds > 0:
+                heapq.heappush(self._heap, (start_at, next(self._seq), job.job_id))
+            else:
+                # Open under the lock so a racing cancel/stop cannot close first
+                self._open(job)
+            self._ensure_thread()
+            self._cond.notify()
+        return job
+
+    def cancel(self, job_id: str, reason: str = "cancelled") -> Optional[ValveJob]:
+        """Close the valve now. Returns None for unknown or finished jobs."""
+        with self._cond:
+            job = self._active.get(job_id)
+            if job is None:
+                return None
+            self._finish(job, CANCELLED, reason)
+            self._cond.notify()
+        return job
+
+    def cancel_zone(self, zone_id: int, reason: str = "cancelled") -> Optional[ValveJob]:
+        with self._cond:
+            job_id = self._by_zone.get(zone_id)
+        return self.cancel(job_id, reason) if job_id else None
+
+    def extend(self, job_id: str, extra_seconds: float) -> Optional[ValveJob]:
+        """
+        Push the shut-off back (or forward, if negative). The total run time
+        is still capped at max_duration_seconds.
+        """
+        with self._cond:
+            job = self._active.get(job_id)
+            if job is None:
+                return None
+            total = self._clamp(job.duration_seconds + extra_seconds)
+            if job.running:
+                elapsed = job.duration_seconds - (job.deadline - self._clock())
+                total = max(total, elapsed)
+            job.deadline += total - job.duration_seconds
+            job.duration_seconds = total
+            if job.running:
+                heapq.heappush(self._heap, (job.deadline, next(self._seq), job.job_id))
+                self._cond.notify()
+        return job
+
+    def get(self, job_id: str) -> Optional[ValveJob]:
+        with self._cond:
+            return self._active.get(job_id) or self._finished.get(job_id)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.get(job_id)
+        return job.to_dict(self._clock()) if job else None
+
+    def jobs(self, include_finished: bool = False) -> List[Dict[str, Any]]:
+        now = self._clock()
+        with self._cond:
+            jobs = list(self._active.values())
+            if include_finished:
+                jobs += list(self._finished.values())
+        return [j.to_dict(now) for j in jobs]
+
+    def active_count(self) -> int:
+        with self._cond:
+            return len(self._active)
+
+    def on_job_finished(self, callback: Callable[[ValveJob], None]) -> None:
+        """
+        Called with every job as it retires (completed, cancelled or
+        failed), under the runner's lock: keep it quick.
+        """
+        self._finish_listeners.append(callback)
+
+    def close_all(self, reason: str = "close_all") -> List[ValveJob]:
+        with self._cond:
+            jobs = list(self._active.values())
+            for job in jobs:
+                self._finish(job, CANCELLED, reason)
+            self._cond.notify()
+        return jobs
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Close every open valve and stop the timer thread."""
+        self.close_all(reason="shutdown")
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # ------------------------------------------------------------
+    # Timer thread
+    # ------------------------------------------------------------
+    def _open(self, job: ValveJob):
+        """Open the valve and arm the shut-off. Caller holds self._cond."""
+        try:
+            self._open_valve(job.pin)
+        except Exception as e:
+            self._log("exception", "Failed to open valve for job %s: %s", job.job_id, e)
+            self._finish(job, FAILED, f"open failed: {e}")
+            return
+
+        job.state = RUNNING
+        job.started_at = self._wall_clock()
+        job.deadline = self._clock() + job.duration_seconds
+        heapq.heappush(self._heap, (job.deadline, next(self._seq), job.job_id))
+        self._log(
+            "info",
+            "Valve job %s started: zone=%s pin=%s duration=%.1fs",
+            job.job_id,
+            job.zone_id,
+            job.pin,
+            job.duration_seconds,
+            zone_id=job.zone_id,
+            pin=job.pin,
+            duration_seconds=job.duration_seconds,
+        )
+
+    def _finish(self, job: ValveJob, state: str, reason: str):
+        """Close the valve (if open) and retire the job. Caller holds self._cond."""
+        if job.state == RUNNING:
+            try:
+                self._close_valve(job.pin)
+            except Exception as e:
+                state, reason = FAILED, f"close failed: {e}"
+                self._log("exception", "Failed to close valve for job %s: %s", job.job_id, e)
+
+        job.state = state
+        job.end_reason = reason
+        job.ended_at = self._wall_clock()
+        self._active.pop(job.job_id, None)
+        if self._by_zone.get(job.zone_id) == job.job_id:
+            del self._by_zone[job.zone_id]
+        self._finished[job.job_id] = job
+        while len(self._finished) > self.history_size:
+            self._finished.popitem(last=False)
+        job._done.set()
+        for callback in self._finish_listeners:
+            try:
+                callback(job)
+            except Exception as e:
+                self._log("exception", "Job finish listener failed: %s", e)
+
+        self._log(
+            "info",
+            "Valve job %s %s: zone=%s pin=%s (%s)",
+            job.job_id,
+            state,
+            job.zone_id,
+            job.pin,
+            reason,
+            zone_id=job.zone_id,
+            pin=job.pin,
+            state=state,
+        )
+
+    def _run_due_locked(self, now: float):
+        while self._heap and self._heap[0][0] <= now:
+            due, _, job_id = heapq.heappop(self._heap)
+            job = self._active.get(job_id)
+            # Skip entries superseded by extend() or already finished
+            if job is None:
+                continue
+            if job.state == SCHEDULED and job.start_at == due:
+                self._open(job)
+            elif job.running and job.deadline == due:
+                self._finish(job, COMPLETED, "duration elapsed")
+
+    def next_wakeup(self) -> Optional[float]:
+        """Earliest pending open / shut-off (may be a stale entry)."""
+        with self._cond:
+            return self._heap[0][0] if self._heap else None
+
+    def run_due(self):
+        """Open and close whatever is due now (the unthreaded timer)."""
+        with self._cond:
+            self._run_due_locked(self._clock())
+
+    def _run(self):
+        with self._cond:
+            while not self._stopping:
+                now = self._clock()
+                self._run_due_locked(now)
+                timeout = self._heap[0][0] - now if self._heap else None
+                self._cond.wait(timeout)
@@ -0,0 +1,405 @@
+"""
+Watering run journal.
+
+Every finished valve run is one JSON line in a per-day segment
+(`runs-YYYY-MM-DD.jsonl`, keyed by the local date the run started).
+Appends go to an in-memory buffer. flush() writes and fsyncs it, and
+runs every `flush_interval_seconds` on a background thread once start()
+is called, or sooner when `max_buffered` runs are waiting. A crash
+loses at most one flush interval.
+
+An index of per-day, per-zone totals (runs, seconds, last start) is
+kept in memory and saved as index.json, along with how many bytes of
+each segment it covers. On open only the unindexed tail of a segment is
+read, so runtime totals and last-run lookups never scan the journal.
+The index is a cache: if it is missing or unreadable it is rebuilt from
+the segments and daily.jsonl.
+
+compact(before) rolls segments older than a date into per-day, per-zone
+aggregate lines in daily.jsonl and deletes them. Totals stay exact;
+only the per-run detail of those days is gone. The days being compacted
+and the size of daily.jsonl are first written to compacting.json; if a
+crash interrupts the compaction, the next open either completes it (the
+index already lists the days as compacted, or segments are gone) or
+truncates daily.jsonl back to that size, so no day is counted twice.
+"""
+
+import json
+import os
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from utils.atomic_file import atomic_write_json, fsync_dir
+
+_SEGMENT_PREFIX = "runs-"
+_INDEX_FILE = "index.json"
+_DAILY_FILE = "daily.jsonl"
+_COMPACTING_FILE = "compacting.json"
+
+
+def _day_of(ts: float) -> str:
+    return datetime.fromtimestamp(ts).date().isoformat()
+
+
+class WateringJournal:
+    def __init__(
+        self,
+        directory: str = "data/journal",
+        flush_interval_seconds: float = 5.0,
+        max_buffered: int = 500,
+        fsync: bool = True,
+        compact_after_days: Optional[int] = None,
+        logger=None,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_buffered = max_buffered
+        self.fsync = fsync
+        self.compact_after_days = compact_after_days
+        self.logger = logger
+
+        self._lock = threading.RLock()
+        self._buffer: List[Dict[str, Any]] = []
+        # day -> zone_id -> [runs, seconds, last_started_at]
+        self._days: Dict[str, Dict[int, List[float]]] = defaultdict(dict)
+        self._segment_bytes: Dict[str, int] = {}  # segment day -> bytes covered by the index
+        self._compacted: set = set()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"appended": 0, "flushes": 0, "bytes_scanned": 0}
+
+        with self._lock:
+            self._load_index_locked()
+
+    @classmethod
+    def from_config(cls, journal_cfg: Dict[str, Any], logger=None) -> "WateringJournal":
+        return cls(
+            directory=journal_cfg.get("directory", "data/journal"),
+            flush_interval_seconds=journal_cfg.get("flush_interval_seconds", 5.0),
+            max_buffered=journal_cfg.get("max_buffered", 500),
+            fsync=journal_cfg.get("fsync", True),
+            compact_after_days=journal_cfg.get("compact_after_days", 30),
+            logger=logger,
+        )
+
+    def _log(self, level: str, msg: str, *args, **fields):
+        if self.logger:
+            getattr(self.logger, level)(msg, *args, extra=fields or None)
+
+    # ------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------
+    def _segment_path(self, day: str) -> Path:
+        return self.directory / f"{_SEGMENT_PREFIX}{day}.jsonl"
+
+    def _add_to_index(self, record: Dict[str, Any]):
+        totals = self._days[record["day"]].setdefault(int(record["zone_id"]), [0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += record["seconds"]
+        totals[2] = max(totals[2], record["started_at"])
+
+    def _scan_segment(self, day: str, offset: int) -> int:
+        """Index segment bytes from `offset`; returns the new covered size."""
+        path = self._segment_path(day)
+        with path.open("rb") as f:
+            f.seek(offset)
+            tail = f.read()
+        self.stats["bytes_scanned"] += len(tail)
+        end = tail.rfind(b"\n") + 1
+        for line in tail[:end].splitlines():
+            if line.strip():
+                self._add_to_index(json.loads(line))
+        if end < len(tail):
+            # A line cut short by a crash mid-write: drop it
+            with path.open("r+b") as f:
+                f.truncate(offset + end)
+            self._log("warning", "Truncated partial journal line in %s", path.name)
+        return offset + end
+
+    def _load_index_locked(self):
+        try:
+            with (self.directory / _INDEX_FILE).open("r", encoding="utf-8") as f:
+                saved = json.load(f)
+            days = {day: {int(z): list(t) for z, t in zones.items()} for day, zones in saved["days"].items()}
+            segment_bytes = dict(saved["segments"])
+            compacted = set(saved["compacted"])
+        except (OSError, ValueError, KeyError):
+            saved = None
+        finished = self._recover_compaction_locked(compacted if saved is not None else None)
+        if saved is not None:
+            self._days.update(days)
+            self._segment_bytes = segment_bytes
+            self._compacted = compacted | set(finished)
+            for day in finished:
+                self._segment_bytes.pop(day, None)
+        else:
+            self._rebuild_from_daily_locked()
+
+        segments = {}
+        for path in sorted(self.directory.glob(f"{_SEGMENT_PREFIX}*.jsonl")):
+            day = path.stem[len(_SEGMENT_PREFIX):]
+            if day in self._compacted:
+                # Compaction got as far as the aggregates, not the delete
+                path.unlink()
+            else:
+                segments[day] = path.stat().st_size
+        if any(size < self._segment_bytes.get(day, 0) for day, size in segments.items()):
+            # The index is ahead of the data (unsynced writes lost): start over
+            self._log("warning", "Journal index does not match segments; rebuilding")
+            self._rebuild_from_daily_locked()
+        for day, size in segments.items():
+            covered = self._segment_bytes.get(day, 0)
+            if size != covered:
+                self._segment_bytes[day] = self._scan_segment(day, covered)
+
+    def _recover_compaction_locked(self, compacted: Optional[set]) -> List[str]:
+        """
+        Finish or undo a compaction a crash interrupted; returns its days
+        if it is to be finished. It is if the index lists the days as
+        compacted or any of their segments is gone (segments are deleted
+        only after that index is durable). Otherwise its aggregate lines,
+        whole or partial, are cut off daily.jsonl and the days stay
+        uncompacted.
+        """
+        marker = self.directory / _COMPACTING_FILE
+        try:
+            with marker.open("r", encoding="utf-8") as f:
+                pending = json.load(f)
+        except FileNotFoundError:
+            return []
+        days = pending["days"]
+        finished = (compacted is not None and compacted.issuperset(days)) or not all(
+            self._segment_path(day).exists() for day in days
+        )
+        if not finished:
+            daily = self.directory / _DAILY_FILE
+            if daily.exists() and daily.stat().st_size > pending["daily_bytes"]:
+                with daily.open("r+b") as f:
+                    f.truncate(pending["daily_bytes"])
+                    if self.fsync:
+                        os.fsync(f.fileno())
+            self._log("warning", "Rolled back an interrupted compaction of %d journal day(s)", len(days))
+        marker.unlink()
+        fsync_dir(self.directory)
+        return days if finished else []
+
+    def _rebuild_from_daily_locked(self):
+        self._days.clear()
+        self._segment_bytes = {}
+        self._compacted = set()
+        daily = self.directory / _DAILY_FILE
+        if not daily.exists():
+            return
+        with daily.open("r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                # A day can have several lines (runs recorded after compaction)
+                totals = self._days[row["day"]].setdefault(int(row["zone_id"]), [0, 0.0, 0.0])
+                totals[0] += row["runs"]
+                totals[1] += row["seconds"]
+                totals[2] = max(totals[2], row["last_started_at"])
+                self._compacted.add(row["day"])
+
+    def _write_index_locked(self, durable: bool = False):
+        payload = {
+            "days": {day: {str(z): t for z, t in zones.items()} for day, zones in self._days.items()},
+            "segments": self._segment_bytes,
+            "compacted": sorted(self._compacted),
+        }
+        # Only fsynced for compaction: otherwise the index can always be
+        # rebuilt from the segments
+        atomic_write_json(self.directory / _INDEX_FILE, payload, indent=None, fsync=durable)
+
+    # ------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------
+    def _append(self, path: Path, data: str):
+        with path.open("ab") as f:
+            f.write(data.encode("utf-8"))
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    @staticmethod
+    def _daily_line(day: str, zone_id: int, totals: List[float]) -> str:
+        row = {
+            "day": day,
+            "zone_id": zone_id,
+            "runs": totals[0],
+            "seconds": round(totals[1], 3),
+            "last_started_at": totals[2],
+        }
+        return json.dumps(row, separators=(",", ":")) + "\n"
+
+    def record_run(
+        self,
+        zone_id: int,
+        started_at: float,
+        ended_at: float,
+        reason: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> None:
+        """Buffer one finished run (epoch seconds)."""
+        record = {
+            "zone_id": int(zone_id),
+            "day": _day_of(started_at),
+            "started_at": round(started_at, 3),
+            "ended_at": round(ended_at, 3),
+            "seconds": round(max(0.0, ended_at - started_at), 3),
+            "reason": reason,
+            "source": source,
+        }
+        with self._lock:
+            self._buffer.append(record)
+            self._add_to_index(record)
+            self.stats["appended"] += 1
+            if len(self._buffer) >= self.max_buffered:
+                self.flush()
+
+    def record_job(self, job) -> None:
+        """ValveJobRunner.on_job_finished hook. Jobs that never opened are skipped."""
+        if job.started_at is None or job.ended_at is None:
+            return
+        self.record_run(job.zone_id, job.started_at, job.ended_at, reason=job.end_reason, source="controller")
+
+    def flush(self) -> int:
+        """Write buffered runs to their segments. Returns how many were written."""
+        with self._lock:
+            if not self._buffer:
+                return 0
+            batch, self._buffer = self._buffer, []
+            by_day: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            for record in batch:
+                by_day[record["day"]].append(record)
+
+            late: List[Dict[str, Any]] = []
+            for day, records in by_day.items():
+                if day in self._compacted:
+                    # A run for a day that is already compacted only gets an aggregate line
+                    late.extend(records)
+                    continue
+                data = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+                self._append(self._segment_path(day), data)
+                self._segment_bytes[day] = self._segment_bytes.get(day, 0) + len(data.encode("utf-8"))
+            if late:
+                self._append(
+                    self.directory / _DAILY_FILE,
+                    "".join(
+                        self._daily_line(r["day"], r["zone_id"], [1, r["seconds"], r["started_at"]]) for r in late
+                    ),
+                )
+            self._write_index_locked()
+            self.stats["flushes"] += 1
+            return len(batch)
+
+    # ------------------------------------------------------------
+    # Queries (index only, buffered runs included)
+    # ------------------------------------------------------------
+    def runtime_totals(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        zone_id: Optional[int] = None,
+    ) -> Dict[int, Dict[str, float]]:
+        """{zone_id: {"runs", "seconds"}} for days in [start, end] inclusive."""
+        lo = start.isoformat() if start else ""
+        hi = end.isoformat() if end else "9999-12-31"
+        totals: Dict[int, Dict[str, float]] = {}
+        with self._lock:
+            for day, zones in self._days.items():
+                if not lo <= day <= hi:
+                    continue
+                for zid, (runs, seconds, _) in zones.items():
+                    if zone_id is not None and zid != zone_id:
+                        continue
+                    entry = totals.setdefault(zid, {"runs": 0, "seconds": 0.0})
+                    entry["runs"] += runs
+                    entry["seconds"] += seconds
+        return totals
+
+    def last_run(self, zone_id: int) -> Optional[float]:
+        """Start time (epoch seconds) of the zone's most recent run."""
+        with self._lock:
+            starts = [zones[zone_id][2] for zones in self._days.values() if zone_id in zones]
+        return max(starts) if starts else None
+
+    def last_run_date(self, zone_id: int) -> Optional[str]:
+        """ISO date of the last run, in the form should_water_today expects."""
+        last = self.last_run(zone_id)
+        return _day_of(last) if last is not None else None
+
+    def runs(self, day: date, zone_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Per-run detail for one day (empty once the day is compacted)."""
+        key = day.isoformat()
+        with self._lock:
+            if key in self._compacted:
+                return []
+            records = [r for r in self._buffer if r["day"] == key]
+            path = self._segment_path(key)
+            if path.exists():
+                with path.open("r", encoding="utf-8") as f:
+                    records = [json.loads(line) for line in f if line.strip()] + records
+        return [r for r in records if zone_id is None or r["zone_id"] == zone_id]
+
+    # ------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------
+    def compact(self, before: date) -> int:
+        """Roll segments for days before `before` into daily.jsonl. Returns days compacted."""
+        cutoff = before.isoformat()
+        with self._lock:
+            self.flush()
+            days = sorted(d for d in self._segment_bytes if d < cutoff and d not in self._compacted)
+            if not days:
+                return 0
+            lines = "".join(
+                self._daily_line(day, zid, totals) for day in days for zid, totals in sorted(self._days[day].items())
+            )
+            daily = self.directory / _DAILY_FILE
+            marker = self.directory / _COMPACTING_FILE
+            # Recorded first, so an interrupted compaction can be undone on open
+            atomic_write_json(
+                marker, {"days": days, "daily_bytes": daily.stat().st_size if daily.exists() else 0}, fsync=self.fsync
+            )
+            # Aggregates and the index are durable before any segment goes away
+            self._append(daily, lines)
+            self._compacted.update(days)
+            for day in days:
+                self._segment_bytes.pop(day, None)
+            self._write_index_locked(durable=self.fsync)
+            for day in days:
+                self._segment_path(day).unlink(missing_ok=True)
+            marker.unlink()
+            fsync_dir(self.directory)
+        self._log("info", "Compacted %d journal day(s) before %s", len(days), cutoff)
+        return len(days)
+
+    # ------------------------------------------------------------
+    # Background flushing
+    # ------------------------------------------------------------
+    def start(self):
+        """Flush (and compact, if compact_after_days is set) in the background."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="watering-journal", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval_seconds):
+            try:
+                self.flush()
+                if self.compact_after_days is not None:
+                    self.compact(date.today() - timedelta(days=self.compact_after_days))
+            except Exception as e:
+                self._log("exception", "Journal flush failed: %s", e)
+
+    def close(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
@@ -1,6 +1,30 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+
+@dataclass
+class ZoneRunResult:
+    zone_id: int
+    requested_seconds: float
+    open_seconds: float
+    completed: bool
+    error: Optional[str] = None
+
+
 class ZoneManager:
+    """
+    Zone id -> ValveController registry.
+
+    `await run_many(...)` runs any number of zones concurrently on one event
+    loop; `await shutdown()` cancels every run and leaves all valves closed.
+    Every run's outcome, including cancelled ones, lands in `last_results`.
+    """
+
     def __init__(self):
         self.zones = {}
+        self.last_results: Dict[int, ZoneRunResult] = {}
+        self._tasks: Set[asyncio.Task] = set()
 
     def register_zone(self, zone_id, valve):
         self.zones[zone_id] = valve
@@ -9,3 +33,82 @@ class ZoneManager:
         valve = self.zones.get(zone_id)
         if valve:
             valve.open(duration)
+
+    async def run_zone(self, zone_id: int, duration_minutes: float) -> ZoneRunResult:
+        valve = self.zones.get(zone_id)
+        requested = max(0.0, duration_minutes) * 60
+        if valve is None:
+            return self._record(ZoneRunResult(zone_id, requested, 0.0, False, error="unknown zone"))
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            open_seconds = await valve.open_for(duration_minutes)
+        except asyncio.CancelledError:
+            # The valve closed itself on the way out; record how long it ran
+            self._record(ZoneRunResult(zone_id, requested, loop.time() - started, False, error="cancelled"))
+            raise
+        except Exception as e:
+            return self._record(ZoneRunResult(zone_id, requested, loop.time() - started, False, error=str(e)))
+        return self._record(ZoneRunResult(zone_id, requested, open_seconds, True))
+
+    def _record(self, result: ZoneRunResult) -> ZoneRunResult:
+        self.last_results[result.zone_id] = result
+        return result
+
+    async def run_many(
+        self,
+        runs: Union[Mapping[int, float], Iterable[Tuple[int, float]]],
+        max_concurrent: Optional[int] = None,
+    ) -> Dict[int, ZoneRunResult]:
+        """
+        Run zones concurrently ({zone_id: minutes} or (zone_id, minutes)
+        pairs). `max_concurrent` caps how many valves are open at once;
+        the rest wait their turn in the given order.
+
+        Cancelling run_many (or shutdown()) cancels every run and raises
+        CancelledError; the partial results are in `last_results`.
+        """
+        items = list(runs.items()) if isinstance(runs, Mapping) else list(runs)
+        gate = asyncio.Semaphore(max_concurrent) if max_concurrent else None
+
+        async def run_one(zone_id: int, minutes: float) -> ZoneRunResult:
+            if gate is None:
+                return await self.run_zone(zone_id, minutes)
+            try:
+                await gate.acquire()
+            except asyncio.CancelledError:
+                # Cancelled while queued: the valve never opened
+                self._record(ZoneRunResult(zone_id, max(0.0, minutes) * 60, 0.0, False, error="cancelled"))
+                raise
+            try:
+                return await self.run_zone(zone_id, minutes)
+            finally:
+                gate.release()
+
+        tasks = [asyncio.ensure_future(run_one(z, m)) for z, m in items]
+        self._tasks.update(tasks)
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            self._tasks.difference_update(tasks)
+        return {r.zone_id: r for r in results}
+
+    async def shutdown(self) -> List[int]:
+        """
+        Cancel all runs, wait for them to unwind (each closes its valve),
+        then close anything still open, in zone order. Returns the zones
+        that were open when shutdown began.
+        """
+        was_open = [z for z in sorted(self.zones) if getattr(self.zones[z], "is_open", False)]
+
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        for zone_id in sorted(self.zones):
+            valve = self.zones[zone_id]
+            if hasattr(valve, "close"):
+                valve.close()
+        return was_open
@@ -1,12 +1,11 @@
 import logging
 import threading
-import time
-from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from core.app_context import AppContext
 from ai.engine import GardenAIEngine
-from weather.weather_service import WeatherService
+from weather_service import WeatherService
+from utils.clock import SYSTEM_CLOCK, Clock
 
 
 class SystemHealthMonitor(threading.Thread):
@@ -15,6 +14,9 @@ class SystemHealthMonitor(threading.Thread):
     - AI evaluation summary
     - Weather snapshot
     - Simulation vs hardware mode
+
+    On a virtual clock the thread is not started; a DiscreteEventRunner
+    drives next_wakeup() / run_due() instead.
     """
 
     def __init__(
@@ -22,18 +24,36 @@ class SystemHealthMonitor(threading.Thread):
         ctx: AppContext,
         ai_engine: GardenAIEngine,
         weather_service: WeatherService,
+        clock: Clock = SYSTEM_CLOCK,
     ):
         super().__init__(daemon=True)
         self.ctx = ctx
+        self.clock = clock
         self.logger: logging.Logger = getattr(ctx, "logger", logging.getLogger(__name__))
         self.ai_engine = ai_engine
         self.weather_service = weather_service
 
         self._stop_event = threading.Event()
-        self.interval_seconds = 300  # every 5 minutes
+        self.interval_seconds = ctx.get("monitoring", "health_interval_seconds", default=300)
+        self._next_snapshot_at: Optional[float] = clock.time()
 
         self.logger.info("SystemHealthMonitor initialized. interval=%ss", self.interval_seconds)
 
+    def start(self):
+        if self.clock.virtual:
+            return
+        super().start()
+
+    def next_wakeup(self) -> Optional[float]:
+        return self._next_snapshot_at
+
+    def run_due(self):
+        try:
+            self.snapshot_system_health()
+        except Exception as e:
+            self.logger.exception("Error in system health monitor: %s", e)
+        self._next_snapshot_at = self.clock.time() + self.interval_seconds
+
     def run(self):
         self.logger.info("SystemHealthMonitor thread started.")
         while not self._stop_event.is_set():
@@ -46,7 +66,7 @@ class SystemHealthMonitor(threading.Thread):
         self.logger.info("SystemHealthMonitor thread exiting.")
 
     def snapshot_system_health(self):
-        now = datetime.now()
+        now = self.clock.now()
         zones = self.ctx.get("zones", default=[])
 
         health_summary: Dict[str, Any] = {
@@ -55,30 +75,40 @@ class SystemHealthMonitor(threading.Thread):
             "zones": [],
         }
 
+        try:
+            results = self.ai_engine.evaluate_all_zones()
+        except Exception as e:
+            self.logger.exception("Error evaluating zones in health snapshot: %s", e)
+            results = {}
+
         for zone in zones:
             zone_id = zone.get("id")
-            try:
-                eval_result = self.ai_engine.evaluate_zone(zone_id)
-                health_summary["zones"].append(
-                    {
-                        "zone_id": zone_id,
-                        "ideal_duration_minutes": eval_result.ideal_duration_minutes,
-                        "health_score": eval_result.health_score,
-                        "emergency_detected": eval_result.emergency_detected,
-                    }
-                )
-            except Exception as e:
-                self.logger.exception("Error evaluating zone %s in health snapshot: %s", zone_id, e)
+            eval_result = results.get(zone_id)
+            if eval_result is None:
+                continue
+            health_summary["zones"].append(
+                {
+                    "zone_id": zone_id,
+                    "ideal_duration_minutes": eval_result.ideal_duration_minutes,
+                    "health_score": eval_result.health_score,
+                    "emergency_detected": eval_result.emergency_detected,
+                }
+            )
 
         try:
-            weather_snapshot = self.weather_service.fetch_current_weather()
+            weather_snapshot = self.weather_service.get_weather()
             health_summary["weather"] = {
                 "temp_c": weather_snapshot["temp_c"],
                 "humidity": weather_snapshot["humidity"],
                 "rain_probability": weather_snapshot["rain_probability"],
             }
+            if weather_snapshot.get("fallback"):
+                health_summary["weather"]["fallback"] = True
         except Exception as e:
             self.logger.exception("Error fetching weather in health snapshot: %s", e)
+        client_stats = self.weather_service.client_stats()
+        if client_stats is not None:
+            health_summary["weather_client"] = client_stats
 
         self.logger.info("System health snapshot: %s", health_summary)
 
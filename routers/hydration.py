@@ -1,4 +1,7 @@
-from fastapi import APIRouter
+from typing import List
+
+import numpy as np
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 from ai.hydration_scorer import (
@@ -17,6 +20,25 @@ class HydrationRequest(BaseModel):
     weather: WeatherSnapshot
 
 
+class HydrationBatchRequest(BaseModel):
+    """
+    Column-oriented batch of zones. Every zone list must have the same length.
+    `weather` holds either one snapshot shared by all zones or one per zone.
+    """
+    zone_ids: List[int]
+    plant_type: List[str]
+    sun_exposure: List[str]
+    soil_type: List[str]
+    soil_moisture: List[float]
+    weather: List[WeatherSnapshot]
+
+
+class HydrationBatchResponse(BaseModel):
+    zone_ids: List[int]
+    scores: List[float]
+    recommendations: List[str]
+
+
 @router.post("/score", response_model=HydrationScoreResult)
 async def score_zone(req: HydrationRequest):
     """
@@ -32,3 +54,38 @@ async def score_zone(req: HydrationRequest):
         weather=req.weather,
     )
     return result
+
+
+@router.post("/score/batch", response_model=HydrationBatchResponse)
+def score_zones(req: HydrationBatchRequest):
+    """
+    Computes hydration scores for many zones in one vectorized pass.
+    Scores and recommendations match /hydration/score zone for zone.
+    """
+    n = len(req.zone_ids)
+    columns = (req.plant_type, req.sun_exposure, req.soil_type, req.soil_moisture)
+    if any(len(col) != n for col in columns):
+        raise HTTPException(status_code=422, detail="All zone columns must have the same length.")
+    if len(req.weather) not in (1, n):
+        raise HTTPException(status_code=422, detail="Provide one weather snapshot or one per zone.")
+
+    scorer = get_hydration_scorer()
+    plant_codes, sun_codes, soil_codes = scorer.encode_zones(
+        req.plant_type, req.sun_exposure, req.soil_type
+    )
+    result = scorer.score_zones(
+        zone_ids=np.asarray(req.zone_ids),
+        soil_moisture=np.asarray(req.soil_moisture),
+        plant_codes=plant_codes,
+        sun_codes=sun_codes,
+        soil_codes=soil_codes,
+        temperature_c=np.array([w.temperature_c for w in req.weather]),
+        humidity=np.array([w.humidity for w in req.weather]),
+        recent_rain_mm_24h=np.array([w.recent_rain_mm_24h for w in req.weather]),
+        forecast_rain_mm_24h=np.array([w.forecast_rain_mm_24h for w in req.weather]),
+    )
+    return HydrationBatchResponse(
+        zone_ids=result.zone_ids.tolist(),
+        scores=result.scores.tolist(),
+        recommendations=[r.value for r in result.recommendations()],
+    )
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from ai.inference_engine import get_inference_engine, InferenceResult
+from irrigation.emergency_shutdown import emergency_check, get_emergency_bus
 
 router = APIRouter(prefix="/vision", tags=["Vision / AI"])
 
@@ -7,7 +8,8 @@ router = APIRouter(prefix="/vision", tags=["Vision / AI"])
 async def analyze_image(file: UploadFile = File(...)):
     """
     Accepts an uploaded image and runs inference using the AI engine.
-    Returns structured detections.
+    Returns structured detections. Standing water or mud in the frame
+    is published to the emergency bus.
     """
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image.")
@@ -17,4 +19,8 @@ async def analyze_image(file: UploadFile = File(...)):
     engine = get_inference_engine()
     result = engine.run_on_bytes(image_bytes)
 
+    bus = get_emergency_bus()
+    if bus is not None and emergency_check([d.model_dump() for d in result.detections]):
+        bus.publish("vision", f"water/mud detected in {file.filename or 'upload'}")
+
     return result
@@ -1,36 +1,135 @@
 """
 Simple JSON-backed schedule/timer manager with start/stop hooks.
 Designed to be replaced later with GPIO or controller integration.
+
+schedule.json is held in memory by a JsonFileStore. Reads are served
+from the cache and only re-parse the file when its mtime/size change
+(hand edits are still picked up). Writes go to a temp file, are fsynced
+and renamed over the original, so a crash leaves either the old or the
+new schedule, never half of one. Schedule edits are debounced
+(SCHEDULE_WRITE_DELAY_SEC); watering status is written immediately and
+lives in the same file under "_status", so it survives restarts.
+
+Finished runs go to the application's WateringJournal (buffered, indexed
+by day and zone), which also answers last-run and runtime questions. The
+orchestrator attaches its journal with set_journal(); until one is
+attached, runs are not journaled and no zone has a last run.
 """
-import json, datetime as dt
+import atexit, copy, json, threading, time, datetime as dt
 from pathlib import Path
-from typing import Dict, Any, List
-from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional
+
+from Config import (
+    SCHEDULE_JSON, DEFAULT_START_TIME, DEFAULT_DURATION_MIN, SCHEDULE_WRITE_DELAY_SEC,
+)
+from irrigation.watering_journal import WateringJournal
+from utils.atomic_file import atomic_write_json
+
+STATUS_KEY = "_status"
+_IDLE_STATUS: Dict[str, Any] = {"watering": False, "active_zone": None, "started_at": None}
+
+class JsonFileStore:
+    """
+    In-memory copy of a JSON object file. All access is serialized by
+    one lock. update() applies a change to the cache and schedules a
+    write-back; edits arriving within `write_delay` of each other are
+    coalesced into one write, but a steady stream still flushes at
+    least every `max_delay` seconds.
+    """
+
+    def __init__(self, path: Path, write_delay: float = 1.0, max_delay: float = 10.0):
+        self.path = Path(path)
+        self.write_delay = write_delay
+        self.max_delay = max_delay
+        self.writes = 0
+        self.reads = 0
+        self._lock = threading.RLock()
+        self._data: Dict[str, Any] = {}
+        self._stamp = None       # (mtime_ns, size) of the file _data came from
+        self._dirty_since = None  # monotonic time of the first unflushed edit
+        self._timer: Optional[threading.Timer] = None
+
+    def _refresh_locked(self):
+        if self._dirty_since is not None:
+            return  # pending edits are newer than the file
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            self._data, self._stamp = {}, None
+            return
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self._stamp:
+            return
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                self._data = json.load(f)
+        except ValueError:
+            # Half-written by something other than us; keep what we had
+            return
+        self._stamp = stamp
+        self.reads += 1
+
+    def get(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh_locked()
+            return copy.deepcopy(self._data)
+
+    def update(self, changes: Dict[str, Any], flush: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh_locked()
+            self._data.update(copy.deepcopy(changes))
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+            if flush:
+                self.flush()
+            else:
+                self._schedule_flush_locked()
+            return copy.deepcopy(self._data)
 
-from config import SCHEDULE_JSON, DEFAULT_START_TIME, DEFAULT_DURATION_MIN, WATERING_LOG
+    def _schedule_flush_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        delay = min(self.write_delay, self._dirty_since + self.max_delay - time.monotonic())
+        self._timer = threading.Timer(max(0.0, delay), self.flush)
+        self._timer.daemon = True
+        self._timer.start()
 
-@dataclass
-class WaterEvent:
-    timestamp: str
-    action: str
-    zone: int
-    duration_min: int
+    def flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._dirty_since is None:
+                return
+            atomic_write_json(self.path, self._data)
+            st = self.path.stat()
+            self._stamp = (st.st_mtime_ns, st.st_size)
+            self._dirty_since = None
+            self.writes += 1
 
-def _read_json(path: Path) -> Dict[str, Any]:
-    if not path.exists():
-        return {}
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+_store: Optional[JsonFileStore] = None
+_store_lock = threading.Lock()
 
-def _write_json(path: Path, payload: Dict[str, Any]) -> None:
-    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+def _get_store() -> JsonFileStore:
+    # Built on first use, so importing this module touches nothing on disk
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JsonFileStore(SCHEDULE_JSON, write_delay=SCHEDULE_WRITE_DELAY_SEC)
+            atexit.register(_store.flush)
+        return _store
 
-def _append_watering_log(event: WaterEvent):
-    with open(WATERING_LOG, "a", encoding="utf-8") as f:
-        f.write(json.dumps(asdict(event)) + "\n")
+
+_journal: Optional[WateringJournal] = None
+
+def set_journal(journal: Optional[WateringJournal]) -> None:
+    """Record runs in, and answer last-run questions from, `journal`."""
+    global _journal
+    _journal = journal
 
 def get_schedule() -> Dict[str, Any]:
-    data = _read_json(SCHEDULE_JSON)
+    data = _get_store().get()
+    data.pop(STATUS_KEY, None)
     if not data:
         data = {
             "enabled": True,
@@ -40,13 +139,14 @@ def get_schedule() -> Dict[str, Any]:
             "every_x_days": 1,
             "zones": [1],                       # list of zone ids
         }
-        _write_json(SCHEDULE_JSON, data)
+        _get_store().update(data, flush=True)
     return data
 
 def save_schedule(update: Dict[str, Any]) -> Dict[str, Any]:
-    data = get_schedule()
-    data.update(update or {})
-    _write_json(SCHEDULE_JSON, data)
+    get_schedule()  # materialize defaults first
+    changes = {k: v for k, v in (update or {}).items() if k != STATUS_KEY}
+    data = _get_store().update(changes)
+    data.pop(STATUS_KEY, None)
     return data
 
 def should_water_today(last_ran_date: str | None, freq: str, every_x_days: int) -> bool:
@@ -64,28 +164,45 @@ def should_water_today(last_ran_date: str | None, freq: str, every_x_days: int)
         return delta >= max(1, int(every_x_days))
     return False
 
+def last_ran_date(zone: int) -> Optional[str]:
+    """ISO date of the zone's last run, for should_water_today."""
+    journal = _journal
+    return journal.last_run_date(zone) if journal is not None else None
+
+def zone_runtime(zone: int, start: dt.date | None = None, end: dt.date | None = None) -> Dict[str, float]:
+    """{"runs", "seconds"} for the zone between two dates (inclusive)."""
+    journal = _journal
+    if journal is None:
+        return {"runs": 0, "seconds": 0.0}
+    return journal.runtime_totals(start, end, zone).get(zone, {"runs": 0, "seconds": 0.0})
+
 # --- Simulated hardware control (replace with GPIO/relay as needed) ---
 
-_status: Dict[str, Any] = {"watering": False, "active_zone": None, "started_at": None}
+def _set_status(status: Dict[str, Any]):
+    # Valve state is not debounced: after a crash we must know a zone was on
+    _get_store().update({STATUS_KEY: status}, flush=True)
 
 def start_watering(zone: int, duration_min: int):
-    global _status
-    _status = {
+    status = {
         "watering": True,
         "active_zone": zone,
         "started_at": dt.datetime.now().isoformat(timespec="seconds"),
         "duration_min": duration_min,
     }
-    _append_watering_log(WaterEvent(timestamp=_status["started_at"], action="start", zone=zone, duration_min=duration_min))
+    _set_status(status)
 
 def stop_watering():
-    global _status
-    if _status.get("watering"):
-        _append_watering_log(WaterEvent(timestamp=dt.datetime.now().isoformat(timespec="seconds"),
-                                        action="stop",
-                                        zone=_status.get("active_zone") or 1,
-                                        duration_min=_status.get("duration_min") or 0))
-    _status = {"watering": False, "active_zone": None, "started_at": None}
+    status = get_status()
+    journal = _journal
+    if status.get("watering") and journal is not None:
+        journal.record_run(
+            status.get("active_zone") or 1,
+            dt.datetime.fromisoformat(status["started_at"]).timestamp(),
+            time.time(),
+            reason="stopped",
+            source="schedule_manager",
+        )
+    _set_status(dict(_IDLE_STATUS))
 
 def get_status() -> Dict[str, Any]:
-    return dict(_status)
+    return _get_store().get().get(STATUS_KEY) or dict(_IDLE_STATUS)
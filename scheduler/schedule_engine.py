@@ -1,9 +1,364 @@
+"""
+Zone schedule runner.
+
+Every schedule has a precomputed next fire time. Schedules are daily or
+every-N-days, one per zone start time from `default_schedule`, plus any
+added through add_schedules. The engine keeps them in a heap and sleeps
+until the earliest one. No tick ever scans the schedule list: a wakeup
+costs O(log n) per schedule that is actually due.
+
+When a schedule fires, the zone is evaluated by the AI engine. The run
+is skipped on a restricted watering day (the zone's
+`default_schedule.watering_days` or `scheduler.watering_days`), on an
+emergency, or when the weather service's forecast decisions say rain or
+cold for that zone and hour (weather_forecast; without a forecast, the
+current rain probability against
+`weather.adjustment.rain_probability_threshold`). Otherwise a valve job
+starts for the schedule's duration scaled by the forecast decision, or
+the ideal one (already weather-adjusted) if none is set.
+
+Schedules and their last/next run times persist in a ScheduleStore
+(SQLite, WAL). After a restart, a run missed while the process was down
+fires once if it is no older than `scheduler.catch_up_window_minutes`.
+Older misses are only recorded.
+
+Time comes from a Clock. On the system clock start() runs a thread; on
+a VirtualClock a DiscreteEventRunner drives next_wakeup() / run_due().
+"""
+
+import heapq
+import itertools
+import logging
+import threading
 from datetime import datetime
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from core.app_context import AppContext
+from core.config_snapshot import ConfigSnapshot
+from ai.engine import GardenAIEngine
+from irrigation.controller import IrrigationController
+from irrigation.emergency_shutdown import EmergencyActiveError
+from irrigation.valve_jobs import ZoneBusyError
+from scheduler.schedule_store import ScheduleStore
+from scheduler.schedules import Schedule, next_fire_time, schedules_from_zones, watering_allowed, watering_days
+from utils.clock import SYSTEM_CLOCK, Clock
+from weather_client import WeatherUnavailable
+
 
 class ScheduleEngine:
-    def __init__(self, schedule):
-        self.schedule = schedule
+    def __init__(
+        self,
+        ctx: AppContext,
+        ai_engine: GardenAIEngine,
+        irrigation_controller: IrrigationController,
+        weather_service=None,
+        clock: Clock = SYSTEM_CLOCK,
+        store: Optional[ScheduleStore] = None,
+    ):
+        self.ctx = ctx
+        self.logger: logging.Logger = getattr(ctx, "logger", None) or logging.getLogger(__name__)
+        self.ai_engine = ai_engine
+        self.irrigation_controller = irrigation_controller
+        self.weather_service = weather_service
+        self.clock = clock
+
+        scheduler_cfg = ctx.get("scheduler", default={})
+        self.tick_interval_seconds: float = scheduler_cfg.get("tick_interval_seconds", 60)
+        self.catch_up_window_seconds: float = scheduler_cfg.get("catch_up_window_minutes", 120) * 60.0
+        self.store = store if store is not None else ScheduleStore.from_config(scheduler_cfg)
+
+        self._lock = threading.Lock()
+        self._schedules: Dict[str, Schedule] = {}
+        # (next_run_at, seq, schedule_id); entries whose time no longer
+        # matches the schedule's next_run_at are stale and skipped
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.counts = {
+            "started": 0,
+            "skipped_rain": 0,
+            "skipped_cold": 0,
+            "skipped_restricted": 0,
+            "skipped_emergency": 0,
+            "not_started": 0,
+            "missed": 0,
+        }
+
+        with self._lock:
+            self._schedules = {s.schedule_id: s for s in self.store.load_all()}
+            self._sync_config_locked(self.ctx.snapshot())
+        self._unsubscribe = None
+        if hasattr(self.ctx, "subscribe"):
+            self._unsubscribe = self.ctx.subscribe(self._on_zones_change, ("zones",))
+
+        self.logger.info(
+            "ScheduleEngine initialized. schedules=%d store=%s",
+            len(self._schedules),
+            self.store.path,
+        )
+
+    # ------------------------------------------------------------
+    # Schedule set
+    # ------------------------------------------------------------
+    def _arm(self, schedule: Schedule, after: datetime):
+        """Compute the next fire time and push it. Caller holds self._lock."""
+        schedule.next_run_at = next_fire_time(schedule, after).timestamp()
+        heapq.heappush(self._heap, (schedule.next_run_at, next(self._seq), schedule.schedule_id))
+
+    def _rebuild_heap_locked(self):
+        self._heap = [
+            (s.next_run_at, next(self._seq), s.schedule_id)
+            for s in self._schedules.values()
+            if s.enabled and s.next_run_at is not None
+        ]
+        heapq.heapify(self._heap)
+
+    def _sync_config_locked(self, snapshot: ConfigSnapshot):
+        """
+        Bring config-sourced schedules in line with the zones section.
+        Unchanged schedules keep their stored next_run_at (so missed runs
+        are still caught up); new or edited ones are armed from now.
+        """
+        now = self.clock.now()
+        wanted = schedules_from_zones(snapshot.zones_by_id)
+        removed = [
+            sid for sid, s in self._schedules.items() if s.source == "config" and sid not in wanted
+        ]
+        for sid in removed:
+            del self._schedules[sid]
+
+        changed: List[Schedule] = []
+        for sid, schedule in wanted.items():
+            current = self._schedules.get(sid)
+            if current is not None and current.definition() == schedule.definition():
+                if current.enabled != schedule.enabled or current.next_run_at is None:
+                    # Re-enabled schedules start from now, not from a stale slot
+                    current.enabled = schedule.enabled
+                    current.next_run_at = next_fire_time(current, now).timestamp()
+                    changed.append(current)
+                continue
+            if current is not None:
+                schedule.last_run_at = current.last_run_at
+            schedule.next_run_at = next_fire_time(schedule, now).timestamp()
+            self._schedules[sid] = schedule
+            changed.append(schedule)
+
+        self.store.delete(removed)
+        self.store.save(changed)
+        self._rebuild_heap_locked()
+
+    def _on_zones_change(self, changed: FrozenSet[Tuple], snapshot: ConfigSnapshot):
+        with self._lock:
+            self._sync_config_locked(snapshot)
+        self._wake.set()
+        self.logger.info("Zone schedules resynced: %d schedules", len(self._schedules))
+
+    def add_schedules(self, schedules: Iterable[Schedule]) -> None:
+        """
+        Add or replace schedules. Use a source other than "config" for
+        schedules the zones section does not own; config sync leaves
+        those alone.
+        """
+        now = self.clock.now()
+        with self._lock:
+            batch = list(schedules)
+            for schedule in batch:
+                self._schedules[schedule.schedule_id] = schedule
+                if schedule.enabled:
+                    self._arm(schedule, now)
+            self.store.save(batch)
+        self._wake.set()
+
+    def remove_schedule(self, schedule_id: str) -> Optional[Schedule]:
+        with self._lock:
+            schedule = self._schedules.pop(schedule_id, None)
+            if schedule is not None:
+                self.store.delete([schedule_id])
+        return schedule
+
+    def upcoming(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            live = heapq.nsmallest(
+                limit,
+                (s for s in self._schedules.values() if s.enabled and s.next_run_at is not None),
+                key=lambda s: s.next_run_at,
+            )
+        return [s.to_dict() for s in live]
+
+    # ------------------------------------------------------------
+    # Timer-driven interface
+    # ------------------------------------------------------------
+    def _drop_stale_locked(self):
+        while self._heap:
+            at, _, sid = self._heap[0]
+            schedule = self._schedules.get(sid)
+            if schedule is not None and schedule.enabled and schedule.next_run_at == at:
+                return
+            heapq.heappop(self._heap)
+
+    def next_wakeup(self) -> Optional[float]:
+        with self._lock:
+            self._drop_stale_locked()
+            return self._heap[0][0] if self._heap else None
+
+    def run_due(self):
+        now = self.clock.time()
+        now_dt = datetime.fromtimestamp(now)
+        to_fire: List[Tuple[Schedule, float]] = []
+        touched: List[Schedule] = []
+        with self._lock:
+            while True:
+                self._drop_stale_locked()
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                slot, _, sid = heapq.heappop(self._heap)
+                schedule = self._schedules[sid]
+                if now - slot > self.catch_up_window_seconds:
+                    self.counts["missed"] += 1
+                    self.logger.warning(
+                        "Missed scheduled run: %s slot=%s",
+                        sid,
+                        datetime.fromtimestamp(slot).strftime("%Y-%m-%d %H:%M"),
+                        extra={"zone_id": schedule.zone_id},
+                    )
+                else:
+                    schedule.last_run_at = now
+                    to_fire.append((schedule, slot))
+                # Arm from now, not the slot: several runs missed in a row fire once
+                self._arm(schedule, max(now_dt, datetime.fromtimestamp(slot)))
+                touched.append(schedule)
+            # One transaction for everything that fired at this instant
+            self.store.save(touched)
+
+        for schedule, slot in to_fire:
+            try:
+                self._fire(schedule, slot)
+            except Exception as e:
+                self.logger.exception("Scheduled run %s failed: %s", schedule.schedule_id, e)
+
+    def _weather_decision(self, zone_id: int, scheduled_for: float) -> Tuple[Optional[str], Optional[float], float]:
+        """
+        (skip reason or None, duration scale, rain probability) for this run.
+        The scale is None without a forecast decision: the evaluation's own
+        current-weather adjustment then stands.
+        """
+        if self.weather_service is None:
+            return None, None, 0.0
+        try:
+            decision = self.weather_service.forecast_decisions().at(zone_id, scheduled_for)
+        except Exception as e:
+            self.logger.warning("No forecast decision for zone=%s: %s", zone_id, e, extra={"zone_id": zone_id})
+            decision = None
+        if decision is not None:
+            return decision
+
+        adjustment = self.ctx.get("weather", "adjustment", default={})
+        try:
+            rain = self.weather_service.get_weather().get("rain_probability", 0.0)
+        except WeatherUnavailable as e:
+            # No forecast and no current weather: water as planned
+            self.logger.warning("No weather for zone=%s, running unadjusted: %s", zone_id, e, extra={"zone_id": zone_id})
+            return None, None, 0.0
+        if adjustment.get("rain_skip_enabled", True) and rain >= adjustment.get("rain_probability_threshold", 0.6):
+            return "rain", 0.0, rain
+        return None, None, rain
+
+    def _restricted(self, zone_id: int, scheduled_for: float) -> bool:
+        snapshot = self.ctx.snapshot()
+        zone = snapshot.zones_by_id.get(zone_id, {})
+        return not watering_allowed(
+            datetime.fromtimestamp(scheduled_for).date(),
+            watering_days(snapshot.get("scheduler", "watering_days")),
+            watering_days(zone.get("default_schedule", {}).get("watering_days")),
+        )
+
+    def _fire(self, schedule: Schedule, scheduled_for: float):
+        zone_id = schedule.zone_id
+        if self._restricted(zone_id, scheduled_for):
+            self.logger.info("Scheduled run skipped: zone=%s restricted watering day", zone_id, extra={"zone_id": zone_id})
+            self.counts["skipped_restricted"] += 1
+            return
+
+        skip, scale, rain = self._weather_decision(zone_id, scheduled_for)
+        if skip is not None:
+            self.logger.info(
+                "Scheduled run skipped: zone=%s weather=%s rain_probability=%.2f",
+                zone_id,
+                skip,
+                rain,
+                extra={"zone_id": zone_id},
+            )
+            self.counts[f"skipped_{skip}"] += 1
+            return
+
+        result = self.ai_engine.evaluate_zone(zone_id)
+        if result.emergency_detected:
+            self.logger.warning(
+                "Scheduled run skipped: zone=%s emergency=%s",
+                zone_id,
+                result.emergency_reason,
+                extra={"zone_id": zone_id},
+            )
+            self.counts["skipped_emergency"] += 1
+            return
+
+        if schedule.duration_minutes is not None:
+            duration = schedule.duration_minutes * (1.0 if scale is None else scale)
+        elif scale is None or result.pre_weather_duration_minutes is None:
+            duration = result.ideal_duration_minutes
+        else:
+            # The forecast scale stands in for the evaluation's current-weather
+            # rain and heat factors, so rain is not cut twice
+            duration = min(
+                result.pre_weather_duration_minutes * scale,
+                self.irrigation_controller.max_runtime_minutes,
+            )
+        self.logger.info(
+            "Scheduled run: zone=%s slot=%s duration=%.1fm",
+            zone_id,
+            datetime.fromtimestamp(scheduled_for).strftime("%Y-%m-%d %H:%M"),
+            duration,
+            extra={"zone_id": zone_id, "duration_minutes": duration},
+        )
+        try:
+            job = self.irrigation_controller.water_zone(zone_id, duration)
+        except (ZoneBusyError, EmergencyActiveError) as e:
+            self.logger.warning("Scheduled run not started: zone=%s (%s)", zone_id, e, extra={"zone_id": zone_id})
+            job = None
+        self.counts["started" if job is not None else "not_started"] += 1
+
+    # ------------------------------------------------------------
+    # Thread (system clock)
+    # ------------------------------------------------------------
+    def start(self):
+        if self.clock.virtual:
+            # Driven by a DiscreteEventRunner instead
+            return
+        self._thread = threading.Thread(target=self._run, name="schedule-engine", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.run_due()
+            except Exception as e:
+                self.logger.exception("Error in schedule engine: %s", e)
+            wakeup = self.next_wakeup()
+            # Re-check at least every tick in case the wall clock jumps
+            timeout = self.tick_interval_seconds
+            if wakeup is not None:
+                timeout = max(0.0, min(timeout, wakeup - self.clock.time()))
+            self._wake.wait(timeout)
+            self._wake.clear()
 
-    def should_run_now(self):
-        now = datetime.now().strftime("%H:%M")
-        return now == self.schedule["start_time"]
+    def stop(self):
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.store.close()
@@ -0,0 +1,119 @@
+"""
+SQLite persistence for schedules and their run state.
+
+The database runs in WAL mode with synchronous=NORMAL: the scheduler's
+writes (one transaction per batch of fired schedules) never block
+readers, and a power cut loses at most the last few transactions, never
+the file. Because next_run_at is stored, a restart knows which runs it
+missed while down (see ScheduleEngine's catch-up).
+
+`scheduler.backend: "memory"` keeps the same tables in an in-memory
+database (simulations, dry runs).
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from scheduler.schedules import Schedule
+
+_COLUMNS = (
+    "schedule_id",
+    "zone_id",
+    "start_time",
+    "frequency",
+    "every_x_days",
+    "anchor_date",
+    "duration_minutes",
+    "enabled",
+    "source",
+    "last_run_at",
+    "next_run_at",
+)
+
+
+class ScheduleStore:
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Used from the scheduler thread and config-change callbacks
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schedules (
+                    schedule_id TEXT PRIMARY KEY,
+                    zone_id INTEGER NOT NULL,
+                    start_time TEXT NOT NULL,
+                    frequency TEXT NOT NULL,
+                    every_x_days INTEGER NOT NULL,
+                    anchor_date TEXT NOT NULL,
+                    duration_minutes REAL,
+                    enabled INTEGER NOT NULL,
+                    source TEXT NOT NULL,
+                    last_run_at REAL,
+                    next_run_at REAL
+                )
+                """
+            )
+            self._conn.commit()
+
+    @classmethod
+    def from_config(cls, scheduler_cfg: Dict[str, Any]) -> "ScheduleStore":
+        if scheduler_cfg.get("backend", "sqlite") == "memory":
+            return cls(":memory:")
+        return cls(scheduler_cfg.get("database_path", "data/scheduler.db"))
+
+    def load_all(self) -> List[Schedule]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM schedules").fetchall()
+        schedules = []
+        for row in rows:
+            fields = dict(zip(_COLUMNS, row))
+            fields["enabled"] = bool(fields["enabled"])
+            schedules.append(Schedule(**fields))
+        return schedules
+
+    def save(self, schedules: Iterable[Schedule]) -> int:
+        """Insert or update in one transaction. Returns the row count."""
+        rows = [
+            (
+                s.schedule_id,
+                s.zone_id,
+                s.start_time,
+                s.frequency,
+                s.every_x_days,
+                s.anchor_date,
+                s.duration_minutes,
+                int(s.enabled),
+                s.source,
+                s.last_run_at,
+                s.next_run_at,
+            )
+            for s in schedules
+        ]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO schedules ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                rows,
+            )
+        return len(rows)
+
+    def delete(self, schedule_ids: Iterable[str]) -> None:
+        ids = [(i,) for i in schedule_ids]
+        if ids:
+            with self._lock, self._conn:
+                self._conn.executemany("DELETE FROM schedules WHERE schedule_id = ?", ids)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,120 @@
+"""
+Schedule definitions and next-fire-time computation.
+
+A Schedule waters one zone at a local HH:MM either daily or every N days
+(counted from `anchor_date`). Each zone's `default_schedule` in the
+config yields one schedule per start time:
+
+    "default_schedule": {
+        "enabled": true,
+        "start_time": "05:00",            # or "start_times": ["05:00", "19:30"]
+        "frequency": "every_x_days",      # default "daily"
+        "every_x_days": 2,
+        "anchor_date": "2025-01-01",      # optional
+        "watering_days": ["tue", "sat"],  # optional, also "odd" / "even" dates
+        "base_duration_minutes": 15
+    }
+
+Watering-day restrictions (the zone's and the site-wide
+`scheduler.watering_days`) are checked when a run fires, not here: a
+restricted day is skipped and the schedule keeps its rhythm.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, FrozenSet, Iterable, Mapping, Optional, Tuple
+
+from utils.time_utils import parse_hhmm
+
+DAILY = "daily"
+EVERY_X_DAYS = "every_x_days"
+DEFAULT_ANCHOR_DATE = "1970-01-01"
+# Municipal watering-day restriction tokens (plus "odd" / "even" dates)
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+@dataclass
+class Schedule:
+    schedule_id: str
+    zone_id: int
+    start_time: str  # HH:MM, local time
+    frequency: str = DAILY
+    every_x_days: int = 1
+    anchor_date: str = DEFAULT_ANCHOR_DATE
+    duration_minutes: Optional[float] = None  # None: use the AI engine's ideal duration
+    enabled: bool = True
+    source: str = "config"  # "config" schedules are kept in sync with the zones section
+    last_run_at: Optional[float] = None  # epoch seconds
+    next_run_at: Optional[float] = None
+
+    @property
+    def interval_days(self) -> int:
+        return 1 if self.frequency == DAILY else max(1, int(self.every_x_days))
+
+    def definition(self) -> Tuple:
+        """The fields that decide when it fires (state is kept while these match)."""
+        return (self.zone_id, self.start_time, self.interval_days, self.anchor_date, self.duration_minutes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "schedule_id": self.schedule_id,
+            "zone_id": self.zone_id,
+            "start_time": self.start_time,
+            "frequency": self.frequency,
+            "every_x_days": self.every_x_days,
+            "duration_minutes": self.duration_minutes,
+            "enabled": self.enabled,
+            "source": self.source,
+            "last_run": datetime.fromtimestamp(self.last_run_at).isoformat() if self.last_run_at else None,
+            "next_run": datetime.fromtimestamp(self.next_run_at).isoformat() if self.next_run_at else None,
+        }
+
+
+def next_fire_time(schedule: Schedule, after: datetime) -> datetime:
+    """First firing of `schedule` strictly after `after` (naive local time)."""
+    at = parse_hhmm(schedule.start_time)
+    step = schedule.interval_days
+    day = after.date()
+    offset = (day - date.fromisoformat(schedule.anchor_date)).days % step
+    if offset:
+        day += timedelta(days=step - offset)
+    candidate = datetime.combine(day, at)
+    if candidate <= after:
+        candidate = datetime.combine(day + timedelta(days=step), at)
+    return candidate
+
+
+def day_tokens(day: date) -> FrozenSet[str]:
+    """The restriction tokens a date matches: its weekday and odd/even."""
+    return frozenset((WEEKDAYS[day.weekday()], "odd" if day.day % 2 else "even"))
+
+
+def watering_days(values: Optional[Iterable[str]]) -> Optional[FrozenSet[str]]:
+    """Config list -> token set; None or empty means no restriction."""
+    return frozenset(v.lower() for v in values) if values else None
+
+
+def watering_allowed(day: date, *restrictions: Optional[FrozenSet[str]]) -> bool:
+    """True if `day` matches every restriction that is set."""
+    tokens = day_tokens(day)
+    return all(r is None or bool(r & tokens) for r in restrictions)
+
+
+def schedules_from_zones(zones_by_id: Mapping[int, Mapping[str, Any]]) -> Dict[str, Schedule]:
+    """One config-sourced schedule per zone start time, keyed by schedule_id."""
+    schedules: Dict[str, Schedule] = {}
+    for zone_id, zone in zones_by_id.items():
+        default = zone.get("default_schedule", {})
+        start_times = default.get("start_times") or [default.get("start_time", "05:00")]
+        for start_time in start_times:
+            schedule_id = f"zone-{zone_id}@{start_time}"
+            schedules[schedule_id] = Schedule(
+                schedule_id=schedule_id,
+                zone_id=zone_id,
+                start_time=start_time,
+                frequency=default.get("frequency", DAILY),
+                every_x_days=default.get("every_x_days", 1),
+                anchor_date=default.get("anchor_date") or DEFAULT_ANCHOR_DATE,
+                enabled=default.get("enabled", True),
+            )
+    return schedules
@@ -0,0 +1,475 @@
+"""
+Evaporation-aware start times for zone schedules.
+
+Picks a start time for every zone's run on a given day so that:
+- runs stay inside the zone's allowed watering windows and days
+  (municipal restrictions are hard limits: a zone is either allowed to
+  water that day or it is reported as restricted)
+- concurrent runs never exceed the site's supply capacity or max open
+  valves (hardware.hydraulics, the same limits as the sequencer)
+- the water lost to evaporation is as small as possible
+
+The day is a grid of `slot_minutes` slots (288 at 5 minutes). Hourly
+temperature, humidity and wind become a per-slot evaporation-loss
+fraction (an index built from vapour-pressure deficit, daylight and
+wind; it ranks hours and gives rough litres, it is not an ET model).
+A run's cost is its litres times the loss over the slots it covers,
+times the zone's sun modifier. With prefix sums that is one vectorized
+expression over every possible start.
+
+Zones are placed greedily: those confined to narrow windows of their
+own first, then most to lose first ("regret": the gap between their
+best and worst allowed start). Each zone goes into the
+cheapest start whose slots still have room for its flow and one more
+valve (a sliding-window max over the occupancy arrays). One improvement
+pass then lifts each run out and re-places it. The old slot is always
+still available, so the cost never goes up. A zone left without room
+(usually a narrow window that cheaper runs filled) gets a repair step
+that moves the runs in its way. 1000 zones take well under a second.
+
+A zone with several daily start times ("start_times") is not moved: its
+runs stay at their configured times, still take their share of the
+supply, and the plan lists the zone as fixed.
+
+    "scheduler": {
+        "watering_days": ["mon", "wed", "sat"],      # or "odd" / "even" dates; null = any
+        "optimizer": {"slot_minutes": 5, "windows": ["03:00-09:00", "19:00-23:00"]}
+    }
+    zone "default_schedule": {"watering_windows": [...], "watering_days": [...]}
+
+The ScheduleEngine enforces the same watering days when runs fire.
+"""
+
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ai.hydration_profiles import HydrationProfileRegistry
+from core.config_snapshot import thaw
+from irrigation.sequencer import HydraulicLimits
+from scheduler.schedules import watering_allowed, watering_days
+from utils.time_utils import format_hhmm, minutes_of_day, parse_window
+
+DEFAULT_WINDOWS = ("03:00-09:00", "19:00-23:00")
+_EPS = 1e-9
+
+
+@dataclass(frozen=True)
+class ZoneRequest:
+    zone_id: int
+    duration_minutes: float
+    flow_lpm: float
+    windows: Tuple[Tuple[int, int], ...]  # minutes since midnight, end exclusive
+    watering_days: Optional[FrozenSet[str]] = None  # None: any day
+    evaporation_factor: float = 1.0  # sun exposure
+    current_start_minute: Optional[int] = None  # today's configured start, for comparison
+    fixed: bool = False  # keep current_start_minute (one of several daily runs)
+
+    def allowed_on(self, day: date) -> bool:
+        return watering_allowed(day, self.watering_days)
+
+
+@dataclass
+class EvaporationModel:
+    """Loss fraction per hour of the water applied in that hour."""
+    vpd_coefficient: float = 0.06  # per kPa of vapour-pressure deficit
+    sun_coefficient: float = 0.12  # at solar noon, scaled by a daylight curve
+    wind_coefficient: float = 0.05  # per m/s, multiplies the rest
+    max_loss: float = 0.6
+
+    @classmethod
+    def from_config(cls, cfg: Mapping[str, Any]) -> "EvaporationModel":
+        return cls(**{k: float(v) for k, v in cfg.items() if k in cls.__dataclass_fields__})
+
+    def hourly_loss(self, weather: "HourlyWeather") -> np.ndarray:
+        t = weather.temperature_c
+        saturation_kpa = 0.6108 * np.exp(17.27 * t / (t + 237.3))
+        vpd = saturation_kpa * (1.0 - np.clip(weather.humidity, 0.0, 1.0))
+        hours = np.arange(24) + 0.5
+        daylight = np.clip(np.sin(np.pi * (hours - 6.0) / 12.0), 0.0, None)
+        loss = (self.vpd_coefficient * vpd + self.sun_coefficient * daylight) * (
+            1.0 + self.wind_coefficient * weather.wind_mps
+        )
+        return np.clip(loss, 0.0, self.max_loss)
+
+
+@dataclass
+class HourlyWeather:
+    """24 hourly values for the day being planned (hour 0 = 00:00-01:00)."""
+    temperature_c: np.ndarray
+    humidity: np.ndarray  # 0-1, like the weather snapshot
+    wind_mps: np.ndarray = field(default_factory=lambda: np.zeros(24))
+
+    def __post_init__(self):
+        self.temperature_c = np.asarray(self.temperature_c, dtype=float)
+        self.humidity = np.asarray(self.humidity, dtype=float)
+        self.wind_mps = np.broadcast_to(np.asarray(self.wind_mps, dtype=float), (24,))
+        if self.temperature_c.shape != (24,) or self.humidity.shape != (24,):
+            raise ValueError("HourlyWeather needs 24 hourly temperature and humidity values")
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Mapping[str, Any], swing_c: float = 6.0) -> "HourlyWeather":
+        """
+        A diurnal curve around a single weather snapshot (coldest around
+        04:00, warmest around 16:00, humidity moving the other way), for
+        when no hourly forecast is at hand.
+        """
+        shape = -np.cos(2 * np.pi * (np.arange(24) + 0.5 - 4.0) / 24.0)
+        temp = float(snapshot.get("temp_c", 20.0)) + swing_c * shape
+        humidity = np.clip(float(snapshot.get("humidity", 0.5)) - 0.2 * shape, 0.05, 1.0)
+        return cls(temperature_c=temp, humidity=humidity, wind_mps=np.full(24, float(snapshot.get("wind_mps", 0.0))))
+
+
+@dataclass
+class OptimizerSettings:
+    slot_minutes: int = 5
+    windows: Tuple[Tuple[int, int], ...] = tuple(w for s in DEFAULT_WINDOWS for w in parse_window(s))
+    watering_days: Optional[FrozenSet[str]] = None
+    evaporation: EvaporationModel = field(default_factory=EvaporationModel)
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "OptimizerSettings":
+        scheduler_cfg = config.get("scheduler", {})
+        cfg = scheduler_cfg.get("optimizer", {})
+        return cls(
+            slot_minutes=int(cfg.get("slot_minutes", 5)),
+            windows=_parse_windows(cfg.get("windows", DEFAULT_WINDOWS)),
+            watering_days=watering_days(scheduler_cfg.get("watering_days")),
+            evaporation=EvaporationModel.from_config(cfg.get("evaporation", {})),
+        )
+
+
+def _parse_windows(values: Iterable[str]) -> Tuple[Tuple[int, int], ...]:
+    return tuple(w for value in values for w in parse_window(value))
+
+
+@dataclass(frozen=True)
+class OptimizedRun:
+    zone_id: int
+    start_minute: int
+    duration_minutes: float
+    flow_lpm: float
+    evaporation_litres: float
+
+    @property
+    def start_time(self) -> str:
+        return format_hhmm(self.start_minute)
+
+
+@dataclass
+class StartTimePlan:
+    day: date
+    runs: List[OptimizedRun]  # in start order
+    restricted: List[int]  # zones not allowed to water on `day`
+    unplaced: List[int]  # no room in their windows under the hydraulic limits
+    fixed: List[int]  # several daily runs, kept at their configured times
+    evaporation_litres: float
+    baseline_evaporation_litres: Optional[float]  # at the configured start times
+    baseline_conflict_minutes: Optional[float]  # minutes over the limits at the configured times
+    solve_seconds: float
+
+    def start_times(self) -> Dict[int, str]:
+        return {r.zone_id: r.start_time for r in self.runs}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "day": self.day.isoformat(),
+            "evaporation_litres": round(self.evaporation_litres, 2),
+            "baseline_evaporation_litres": (
+                round(self.baseline_evaporation_litres, 2) if self.baseline_evaporation_litres is not None else None
+            ),
+            "baseline_conflict_minutes": self.baseline_conflict_minutes,
+            "restricted": self.restricted,
+            "unplaced": self.unplaced,
+            "fixed": self.fixed,
+            "solve_ms": round(self.solve_seconds * 1000, 1),
+            "runs": [
+                {
+                    "zone_id": r.zone_id,
+                    "start_time": r.start_time,
+                    "duration_minutes": round(r.duration_minutes, 2),
+                    "flow_lpm": r.flow_lpm,
+                    "evaporation_litres": round(r.evaporation_litres, 2),
+                }
+                for r in self.runs
+            ],
+        }
+
+
+# ------------------------------------------------------------
+# Solver
+# ------------------------------------------------------------
+class _Grid:
+    """Per-slot occupancy (flow and open valves) over one day."""
+
+    def __init__(self, n_slots: int, limits: HydraulicLimits):
+        self.flow = np.zeros(n_slots)
+        self.valves = np.zeros(n_slots, dtype=np.int32)
+        self.capacity = limits.supply_capacity_lpm + _EPS
+        self.max_valves = limits.max_concurrent_valves
+
+    def fits(self, length: int, flow_lpm: float) -> np.ndarray:
+        """Bool per start slot (n_slots - length + 1): room for the whole run."""
+        peak_flow = sliding_window_view(self.flow, length).max(axis=1)
+        peak_valves = sliding_window_view(self.valves, length).max(axis=1)
+        return (peak_flow + flow_lpm <= self.capacity) & (peak_valves < self.max_valves)
+
+    def place(self, start: int, length: int, flow_lpm: float, sign: int = 1):
+        self.flow[start : start + length] += sign * flow_lpm
+        self.valves[start : start + length] += sign
+
+
+def _start_mask(zone: ZoneRequest, windows: Sequence[Tuple[int, int]], n_starts: int, slot: int) -> np.ndarray:
+    """Start slots whose whole run lies inside one of the windows."""
+    starts = np.arange(n_starts) * slot
+    mask = np.zeros(n_starts, dtype=bool)
+    for lo, hi in windows:
+        mask |= (starts >= lo) & (starts + zone.duration_minutes <= hi + _EPS)
+    return mask
+
+
+def optimize_start_times(
+    zones: Sequence[ZoneRequest],
+    weather: HourlyWeather,
+    limits: HydraulicLimits,
+    settings: Optional[OptimizerSettings] = None,
+    day: Optional[date] = None,
+    improve_passes: int = 1,
+    repair_candidates: int = 24,
+) -> StartTimePlan:
+    started = time.perf_counter()
+    settings = settings or OptimizerSettings()
+    day = day or date.today()
+    slot = settings.slot_minutes
+    if 1440 % slot:
+        raise ValueError("slot_minutes must divide a day")
+    n_slots = 1440 // slot
+    too_big = [z.zone_id for z in zones if z.flow_lpm > limits.supply_capacity_lpm + _EPS]
+    if too_big:
+        raise ValueError(f"Zones {too_big} need more flow than the supply capacity ({limits.supply_capacity_lpm} lpm)")
+    unanchored = [z.zone_id for z in zones if z.fixed and z.current_start_minute is None]
+    if unanchored:
+        raise ValueError(f"Fixed runs for zones {unanchored} have no start time")
+
+    allowed = {z.zone_id: watering_allowed(day, settings.watering_days, z.watering_days) for z in zones}
+    restricted = [z.zone_id for z in zones if not allowed[z.zone_id]]
+    active = [z for z in zones if allowed[z.zone_id] and z.duration_minutes > 0]
+
+    # Loss per minute in each slot, and its prefix sum over slots
+    hourly = settings.evaporation.hourly_loss(weather) / 60.0
+    slot_loss = np.repeat(hourly, 60)[: n_slots * slot].reshape(n_slots, slot).sum(axis=1)
+    prefix = np.concatenate(([0.0], np.cumsum(slot_loss)))
+
+    lengths, costs, masks = [], [], []
+    for zone in active:
+        length = min(n_slots, max(1, math.ceil(zone.duration_minutes / slot - _EPS)))
+        n_starts = n_slots - length + 1
+        # Scale the slot sum to the run's real length (the last slot may be partial)
+        loss = (prefix[length:] - prefix[:n_starts]) * (zone.duration_minutes / (length * slot))
+        windows = _intersect(zone.windows, settings.windows)
+        lengths.append(length)
+        costs.append(loss * zone.flow_lpm * zone.evaporation_factor)
+        masks.append(_start_mask(zone, windows, n_starts, slot))
+
+    # Regret: the gap between a zone's dearest and cheapest allowed start
+    regret = [float(c[m].max() - c[m].min()) if m.any() else -1.0 for c, m in zip(costs, masks)]
+    # Zones with their own, narrower windows first (they have nowhere else
+    # to go), then most to lose first
+    n_allowed = [int(m.sum()) for m in masks]
+    widest = max(n_allowed, default=0)
+    order = sorted(
+        (i for i in range(len(active)) if not active[i].fixed),
+        key=lambda i: (n_allowed[i] >= widest / 2, -regret[i], -active[i].duration_minutes, active[i].zone_id),
+    )
+
+    grid = _Grid(n_slots, limits)
+    placed: Dict[int, int] = {}  # index into active -> start slot
+
+    def best_start(i: int) -> Optional[int]:
+        feasible = masks[i] & grid.fits(lengths[i], active[i].flow_lpm)
+        if not feasible.any():
+            return None
+        # Ties go to the earliest start
+        return int(np.argmin(np.where(feasible, costs[i], np.inf)))
+
+    def place_all(indices: Iterable[int]):
+        for i in indices:
+            start = best_start(i)
+            if start is not None:
+                grid.place(start, lengths[i], active[i].flow_lpm)
+                placed[i] = start
+
+    def repair(i: int) -> bool:
+        """
+        Make room for an unplaced zone: at one of its cheapest allowed
+        starts, lift out every run it would overlap, place it, and put
+        the lifted runs back wherever they now fit best. Rolled back if
+        any of them no longer fits. Each re-placement spends one unit of
+        `budget`, which bounds the work on a site that cannot fit every
+        zone anyway.
+        """
+        starts = np.flatnonzero(masks[i])
+        starts = starts[np.argsort(costs[i][starts], kind="stable")][:repair_candidates]
+        others = np.fromiter(placed, dtype=np.int64, count=len(placed))
+        other_starts = np.array([placed[j] for j in others], dtype=np.int64)
+        other_ends = other_starts + np.array([lengths[j] for j in others], dtype=np.int64)
+        for start in starts:
+            if budget[0] <= 0:
+                return False
+            lifted = others[(other_starts < start + lengths[i]) & (other_ends > start)].tolist()
+            for j in lifted:
+                grid.place(placed[j], lengths[j], active[j].flow_lpm, sign=-1)
+            moved: Dict[int, int] = {}
+            if grid.fits(lengths[i], active[i].flow_lpm)[start]:
+                grid.place(start, lengths[i], active[i].flow_lpm)
+                for j in sorted(lifted, key=lambda j: -regret[j]):
+                    budget[0] -= 1
+                    new_start = best_start(j)
+                    if new_start is None:
+                        break
+                    grid.place(new_start, lengths[j], active[j].flow_lpm)
+                    moved[j] = new_start
+                if len(moved) == len(lifted):
+                    placed.update(moved)
+                    placed[i] = int(start)
+                    return True
+                grid.place(start, lengths[i], active[i].flow_lpm, sign=-1)
+            for j, new_start in moved.items():
+                grid.place(new_start, lengths[j], active[j].flow_lpm, sign=-1)
+            for j in lifted:
+                grid.place(placed[j], lengths[j], active[j].flow_lpm)
+        return False
+
+    # Fixed runs only take up room; they are never lifted or moved
+    fixed_litres = 0.0
+    for i, zone in enumerate(active):
+        if zone.fixed:
+            start = min(zone.current_start_minute // slot, len(costs[i]) - 1)
+            grid.place(start, lengths[i], zone.flow_lpm)
+            fixed_litres += float(costs[i][start])
+    place_all(order)
+    for _ in range(improve_passes):
+        moved_any = False
+        for i in sorted(placed, key=lambda i: -costs[i][placed[i]]):
+            grid.place(placed[i], lengths[i], active[i].flow_lpm, sign=-1)
+            start = best_start(i)  # never None: the old slot is free again
+            grid.place(start, lengths[i], active[i].flow_lpm)
+            moved_any |= start != placed[i]
+            placed[i] = start
+        if not moved_any:
+            break
+    budget = [len(active)]
+    for i in order:
+        if i not in placed:
+            repair(i)
+
+    runs = sorted(
+        (
+            OptimizedRun(
+                zone_id=active[i].zone_id,
+                start_minute=start * slot,
+                duration_minutes=active[i].duration_minutes,
+                flow_lpm=active[i].flow_lpm,
+                evaporation_litres=float(costs[i][start]),
+            )
+            for i, start in placed.items()
+        ),
+        key=lambda r: (r.start_minute, r.zone_id),
+    )
+    unplaced = sorted(active[i].zone_id for i in order if i not in placed)
+    baseline, conflicts = _baseline(active, lengths, costs, slot, n_slots, limits)
+    return StartTimePlan(
+        day=day,
+        runs=runs,
+        restricted=sorted(set(restricted)),
+        unplaced=unplaced,
+        fixed=sorted({z.zone_id for z in zones if z.fixed}),
+        evaporation_litres=fixed_litres + float(sum(r.evaporation_litres for r in runs)),
+        baseline_evaporation_litres=baseline,
+        baseline_conflict_minutes=conflicts,
+        solve_seconds=time.perf_counter() - started,
+    )
+
+
+def _intersect(a: Sequence[Tuple[int, int]], b: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    if not a:
+        return list(b)
+    return [(max(x0, y0), min(x1, y1)) for x0, x1 in a for y0, y1 in b if max(x0, y0) < min(x1, y1)]
+
+
+def _baseline(active, lengths, costs, slot, n_slots, limits) -> Tuple[Optional[float], Optional[float]]:
+    """Evaporation and minutes over the hydraulic limits at the configured start times."""
+    if not active or any(z.current_start_minute is None for z in active):
+        return None, None
+    grid = _Grid(n_slots, limits)
+    total = 0.0
+    for zone, length, cost in zip(active, lengths, costs):
+        start = min(zone.current_start_minute // slot, len(cost) - 1)
+        total += float(cost[start])
+        grid.place(start, length, zone.flow_lpm)
+    over = (grid.flow > grid.capacity) | (grid.valves > grid.max_valves)
+    return total, float(over.sum() * slot)
+
+
+# ------------------------------------------------------------
+# Config glue
+# ------------------------------------------------------------
+def zone_requests_from_config(
+    config: Mapping[str, Any],
+    durations_minutes: Optional[Mapping[int, float]] = None,
+    zone_ids: Optional[Iterable[int]] = None,
+) -> List[ZoneRequest]:
+    """
+    One request per configured zone (or `zone_ids`). Durations default
+    to `default_schedule.base_duration_minutes`, flows and sun exposure
+    come from the zone, as for the sequencer and hydration profiles. A
+    zone with several `start_times` gets one fixed request per run.
+    """
+    limits = HydraulicLimits.from_config(config)
+    profiles = HydrationProfileRegistry.from_config(config)
+    wanted = set(zone_ids) if zone_ids is not None else None
+    requests = []
+    for zone in config.get("zones", []):
+        zone_id = zone["id"]
+        if wanted is not None and zone_id not in wanted:
+            continue
+        schedule = zone.get("default_schedule", {})
+        duration = (durations_minutes or {}).get(zone_id, schedule.get("base_duration_minutes", 0.0))
+        exposure = str(zone.get("sun_exposure", profiles.default_sun_exposure)).lower()
+        start_times = schedule.get("start_times") or [schedule.get("start_time", "05:00")]
+        for start_time in start_times:
+            requests.append(
+                ZoneRequest(
+                    zone_id=zone_id,
+                    duration_minutes=float(duration),
+                    flow_lpm=float(zone.get("flow_rate_lpm", limits.default_zone_flow_lpm)),
+                    windows=_parse_windows(schedule.get("watering_windows", ())),
+                    watering_days=watering_days(schedule.get("watering_days")),
+                    evaporation_factor=profiles.sun_modifiers.get(exposure, profiles.default_sun_modifier),
+                    current_start_minute=minutes_of_day(start_time),
+                    fixed=len(start_times) > 1,
+                )
+            )
+    return requests
+
+
+def apply_start_times(config: Mapping[str, Any], plan: StartTimePlan) -> Dict[str, Any]:
+    """
+    A copy of `config` with each planned zone's start time replaced.
+    Fixed zones are not in `plan.runs`, so their start times are kept.
+    """
+    updated = thaw(config)
+    start_times = plan.start_times()
+    for zone in updated.get("zones", []):
+        if zone["id"] in start_times:
+            schedule = zone.setdefault("default_schedule", {})
+            if schedule.get("start_times"):
+                schedule["start_times"] = [start_times[zone["id"]]]
+            else:
+                schedule["start_time"] = start_times[zone["id"]]
+    return updated
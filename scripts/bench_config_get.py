@@ -0,0 +1,104 @@
+"""
+Microbenchmark AppContext.get throughput under thread contention.
+
+Compares the lock-free snapshot getter with the previous implementation
+(a global lock around a nested dict walk) at several thread counts.
+
+    python scripts/bench_config_get.py [seconds_per_run]
+"""
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.app_context import AppContext  # noqa: E402
+
+KEYS = [
+    ("zones",),
+    ("ai", "thresholds", "max_continuous_runtime_minutes"),
+    ("hardware", "relay", "type"),
+    ("system", "name"),
+]
+
+
+class LockedGetter:
+    """
+    The pre-snapshot AppContext: one lock shared by every reader, held by
+    reloads while the file is read and parsed.
+    """
+
+    def __init__(self, config_path: Path):
+        self.config_path = config_path
+        self._config_lock = threading.Lock()
+        self._load_config()
+
+    def _load_config(self):
+        with self._config_lock:
+            with self.config_path.open("r", encoding="utf-8") as f:
+                self.config = json.load(f)
+
+    def get(self, *keys, default=None):
+        with self._config_lock:
+            node = self.config
+            for key in keys:
+                if not isinstance(node, dict) or key not in node:
+                    return default
+                node = node[key]
+            return node
+
+
+def run(getter, n_threads: int, seconds: float) -> float:
+    stop = threading.Event()
+    counts = [0] * n_threads
+
+    def worker(i):
+        n = 0
+        while not stop.is_set():
+            for keys in KEYS:
+                getter(*keys)
+            n += len(KEYS)
+        counts[i] = n
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return sum(counts) / seconds
+
+
+def main(seconds: float = 1.0):
+    config_path = Path(__file__).resolve().parent.parent / "config" / "system_config.json"
+    ctx = AppContext(str(config_path))
+    locked = LockedGetter(config_path)
+
+    # A writer reloading in the background, as the ConfigWatcher would
+    stop_reload = threading.Event()
+
+    def reloader():
+        while not stop_reload.is_set():
+            ctx._load_config()
+            locked._load_config()
+            time.sleep(0.01)
+
+    reload_thread = threading.Thread(target=reloader, daemon=True)
+    reload_thread.start()
+    try:
+        print(f"{'threads':>7} {'locked get/s':>14} {'snapshot get/s':>15}")
+        for n in (1, 2, 4, 8):
+            old = run(locked.get, n, seconds)
+            new = run(ctx.get, n, seconds)
+            print(f"{n:>7} {old:>14,.0f} {new:>15,.0f}")
+    finally:
+        stop_reload.set()
+        reload_thread.join()
+        ctx.stop()
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 1.0)
@@ -0,0 +1,125 @@
+"""
+Benchmark forecast ingestion and the vectorized skip/scale decisions.
+
+A 5-day / 3-hour OpenWeather payload (40 rows) is parsed onto an hourly
+grid, then decisions are computed for 1000 zones over every forecast
+hour and checked cell by cell against a plain per-zone, per-hour loop
+that applies the same rules. Also checks that a refetch of the same
+forecast keeps its version (so cached decisions are reused) and that
+3-hour rain totals survive the resampling.
+
+    python scripts/bench_forecast_decisions.py [zones]
+"""
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from weather_forecast import (  # noqa: E402
+    AdjustmentSettings,
+    Forecast,
+    SKIP_REASONS,
+    compute_decisions,
+)
+
+T0 = 1751328000  # 2025-07-01 00:00 UTC
+
+
+def payload(seed: int = 3):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(40):
+        t = T0 + i * 3 * 3600
+        hour = (i * 3) % 24
+        rain = rng.random() < 0.25
+        rows.append({
+            "dt": t,
+            "main": {"temp": round(27 + 9 * -math.cos(2 * math.pi * (hour - 4) / 24) + rng.uniform(-2, 2), 2),
+                     "humidity": rng.randint(35, 95)},
+            "pop": round(rng.uniform(0.5, 1.0) if rain else rng.uniform(0, 0.4), 2),
+            "rain": {"3h": round(rng.uniform(0.5, 6), 1)} if rain else {},
+            "wind": {"speed": round(rng.uniform(0, 6), 1)},
+        })
+    return {"list": rows}
+
+
+def reference(forecast, zone_ids, sun, s: AdjustmentSettings):
+    """Same rules, one cell at a time."""
+    h = forecast.hourly
+    n = len(h)
+    reason = np.zeros((len(zone_ids), n), dtype=np.uint8)
+    scale = np.zeros((len(zone_ids), n), dtype=np.float32)
+    for j in range(n):
+        pop_ahead = max(float(p) for p in h["pop"][j : j + s.rain_lookahead_hours])
+        peak = max(float(t) for t in h["temp_c"][j : j + 24])
+        for i in range(len(zone_ids)):
+            if s.rain_skip_enabled and pop_ahead >= s.rain_probability_threshold:
+                reason[i, j] = 1
+            elif h["temp_c"][j] < s.low_temp_threshold_c:
+                reason[i, j] = 2
+            else:
+                factor = s.rain_scale if pop_ahead >= s.rain_probability_threshold / 2 else 1.0
+                if peak > s.high_temp_threshold_c:
+                    factor *= 1.0 + (s.heat_scale - 1.0) * float(sun[i])
+                scale[i, j] = factor
+    return reason, scale
+
+
+def main():
+    n_zones = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rng = np.random.default_rng(5)
+    zone_ids = np.arange(1, n_zones + 1)
+    sun = rng.choice(np.array([0.8, 1.0, 1.2], dtype=np.float32), n_zones)
+    settings = AdjustmentSettings(low_temp_threshold_c=21.0)  # warm nights still trip the cold rule sometimes
+
+    raw = payload()
+    started = time.perf_counter()
+    forecast = Forecast.from_openweather("bench", raw)
+    t_parse = time.perf_counter() - started
+    hours = len(forecast.hourly)
+    assert hours == 120 and np.all(np.diff(forecast.hourly["time"]) == 3600)
+    rain_3h = sum((r.get("rain") or {}).get("3h", 0.0) for r in raw["list"])
+    assert abs(float(forecast.hourly["rain_mm"].sum()) - rain_3h) < 1e-3
+    assert abs(float(forecast.daily["rain_mm"].sum()) - rain_3h) < 1e-3
+    print(
+        f"parsed 40 3-hour rows into {hours} hours + {len(forecast.daily)} days in {t_parse * 1000:.2f} ms "
+        f"({forecast.hourly.nbytes + forecast.daily.nbytes} bytes)"
+    )
+
+    compute_decisions(forecast, zone_ids[:10], sun[:10], settings)  # warm up
+    started = time.perf_counter()
+    decisions = compute_decisions(forecast, zone_ids, sun, settings)
+    t_vec = time.perf_counter() - started
+
+    started = time.perf_counter()
+    ref_reason, ref_scale = reference(forecast, zone_ids, sun, settings)
+    t_loop = time.perf_counter() - started
+    assert np.array_equal(decisions.reason, ref_reason)
+    assert np.allclose(decisions.scale, ref_scale, atol=1e-6)
+    cells = n_zones * hours
+    skipped = int((decisions.reason != 0).any(axis=0).sum())
+    print(
+        f"{n_zones} zones x {hours} h = {cells} decisions: vectorized {t_vec * 1000:.2f} ms, "
+        f"loop {t_loop * 1000:.0f} ms ({t_loop / t_vec:.0f}x); {skipped} hours skipped "
+        f"({', '.join(f'{SKIP_REASONS[c]} {int((decisions.reason[0] == c).sum())}' for c in SKIP_REASONS)})"
+    )
+
+    again = Forecast.from_openweather("bench", payload())
+    changed = payload()
+    changed["list"][5]["pop"] = 0.99
+    assert again.version == forecast.version
+    assert Forecast.from_openweather("bench", changed).version != forecast.version
+    reason, scale, pop = decisions.at(int(zone_ids[0]), forecast.start + 5.5 * 3600)
+    assert (reason is None) == (scale > 0)
+    print(f"refetch keeps version {forecast.version}; a changed forecast gets a new one")
+    assert t_vec < 0.05, f"too slow: {t_vec:.3f}s"
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark HydrationScorer.score_zones against the scalar score_zone loop.
+
+Scores 100k random zones both ways, checks the results are identical,
+and prints the timings.
+
+    python scripts/bench_hydration_batch.py [n_zones]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ai.hydration_scorer import (  # noqa: E402
+    HydrationScorer,
+    PLANT_TYPES,
+    SOIL_TYPES,
+    SUN_EXPOSURES,
+    SensorSnapshot,
+    WeatherSnapshot,
+    ZoneContext,
+)
+
+
+def main(n: int = 100_000, seed: int = 7):
+    rng = random.Random(seed)
+    plants = [rng.choice(PLANT_TYPES + ("cactus",)) for _ in range(n)]
+    suns = [rng.choice(SUN_EXPOSURES + ("Full_Sun",)) for _ in range(n)]
+    soils = [rng.choice(SOIL_TYPES + ("silt",)) for _ in range(n)]
+    moisture = [round(rng.uniform(0, 100), 1) for _ in range(n)]
+    temp = [round(rng.uniform(-5, 45), 1) for _ in range(n)]
+    hum = [round(rng.uniform(0, 100), 1) for _ in range(n)]
+    rain = [round(rng.uniform(0, 20), 1) for _ in range(n)]
+    forecast = [round(rng.uniform(0, 20), 1) for _ in range(n)]
+
+    scorer = HydrationScorer()
+
+    t0 = time.perf_counter()
+    scalar = [
+        scorer.score_zone(
+            ZoneContext(i, plants[i], suns[i], soils[i]),
+            SensorSnapshot(moisture[i]),
+            WeatherSnapshot(temp[i], hum[i], rain[i], forecast[i]),
+        )
+        for i in range(n)
+    ]
+    t_scalar = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    plant_codes, sun_codes, soil_codes = scorer.encode_zones(plants, suns, soils)
+    t_encode = time.perf_counter() - t0
+
+    arrays = [np.asarray(a) for a in (moisture, temp, hum, rain, forecast)]
+    t0 = time.perf_counter()
+    batch = scorer.score_zones(
+        np.arange(n), arrays[0], plant_codes, sun_codes, soil_codes, *arrays[1:]
+    )
+    t_batch = time.perf_counter() - t0
+
+    assert [r.score for r in scalar] == batch.scores.tolist(), "score mismatch"
+    assert [r.recommendation for r in scalar] == batch.recommendations(), "recommendation mismatch"
+
+    print(f"zones:          {n}")
+    print(f"scalar loop:    {t_scalar * 1000:8.1f} ms")
+    print(f"encode codes:   {t_encode * 1000:8.1f} ms (once per zone set)")
+    print(f"score_zones:    {t_batch * 1000:8.1f} ms  ({t_scalar / t_batch:.0f}x)")
+    print("results identical: yes")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
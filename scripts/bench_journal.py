@@ -0,0 +1,116 @@
+"""
+Benchmark the watering journal against a flat JSON-lines log.
+
+A year of runs for 50 zones (three a day) goes into a WateringJournal
+and into one flat file, the way watering.log used to be written. Then:
+
+- "how long did zone 2 run last month": index lookup vs full file scan
+- last-run lookup for should_water_today
+- reopening: index load + tail scan vs a rebuild with the index deleted
+- a crash mid-write: a torn last line is dropped on reopen
+- compaction to daily aggregates keeps totals exact
+
+    python scripts/bench_journal.py [zones] [days]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from irrigation.watering_journal import WateringJournal  # noqa: E402
+
+START = datetime(2025, 1, 1)
+
+
+def timed(fn, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) / repeat
+
+
+def main():
+    n_zones = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+
+    with tempfile.TemporaryDirectory() as tmp:
+        journal_dir = Path(tmp) / "journal"
+        flat = Path(tmp) / "watering.log"
+        journal = WateringJournal(journal_dir, max_buffered=5000, fsync=False)
+
+        started = time.perf_counter()
+        with flat.open("w", encoding="utf-8") as f:
+            for d in range(days):
+                for slot, hour in enumerate((5, 12, 19)):
+                    for zone in range(1, n_zones + 1):
+                        begin = (START + timedelta(days=d, hours=hour, minutes=zone)).timestamp()
+                        seconds = 300 + 60 * ((zone + d + slot) % 10)
+                        journal.record_run(zone, begin, begin + seconds)
+                        f.write(json.dumps({"zone": zone, "start": begin, "seconds": seconds}) + "\n")
+        journal.flush()
+        runs = days * 3 * n_zones
+        print(f"{runs} runs written in {time.perf_counter() - started:.2f}s ({flat.stat().st_size / 1e6:.1f} MB flat)")
+
+        month_start, month_end = date(2025, 6, 1), date(2025, 6, 30)
+
+        def flat_scan():
+            lo = datetime.combine(month_start, datetime.min.time()).timestamp()
+            hi = datetime.combine(month_end + timedelta(days=1), datetime.min.time()).timestamp()
+            total = 0.0
+            with flat.open("r", encoding="utf-8") as f:
+                for line in f:
+                    row = json.loads(line)
+                    if row["zone"] == 2 and lo <= row["start"] < hi:
+                        total += row["seconds"]
+            return total
+
+        indexed, t_index = timed(lambda: journal.runtime_totals(month_start, month_end, zone_id=2)[2]["seconds"], 100)
+        scanned, t_scan = timed(flat_scan)
+        assert indexed == scanned, (indexed, scanned)
+        print(f"zone 2, June: {indexed / 3600:.1f}h  index {t_index * 1e6:.0f} us vs flat scan {t_scan * 1000:.0f} ms")
+
+        last, t_last = timed(lambda: journal.last_run_date(2), 100)
+        print(f"last run of zone 2: {last} in {t_last * 1e6:.0f} us")
+
+        # Reopen with the index, then without it
+        journal.close()
+        reopened, t_open = timed(lambda: WateringJournal(journal_dir, fsync=False))
+        assert reopened.stats["bytes_scanned"] == 0
+        os.unlink(journal_dir / "index.json")
+        rebuilt, t_rebuild = timed(lambda: WateringJournal(journal_dir, fsync=False))
+        assert rebuilt.runtime_totals() == reopened.runtime_totals()
+        print(f"reopen: {t_open * 1000:.0f} ms with index, {t_rebuild * 1000:.0f} ms rebuilding without it")
+
+        # Crash mid-append: one whole record written, the next one torn
+        before = rebuilt.runtime_totals()[3]
+        segment = journal_dir / f"runs-{(START + timedelta(days=days - 1)).date().isoformat()}.jsonl"
+        last_begin = (START + timedelta(days=days - 1, hours=22)).timestamp()
+        whole = json.dumps({
+            "zone_id": 3, "day": segment.stem[5:], "started_at": last_begin, "ended_at": last_begin + 60,
+            "seconds": 60.0, "reason": None, "source": None,
+        })
+        with segment.open("a", encoding="utf-8") as f:
+            f.write(whole + "\n" + whole[:25])
+        recovered = WateringJournal(journal_dir, fsync=False)
+        after = recovered.runtime_totals()[3]
+        assert after["runs"] == before["runs"] + 1 and after["seconds"] == before["seconds"] + 60
+        assert segment.read_text(encoding="utf-8").endswith("\n")
+        print("torn write: complete record kept, partial line dropped")
+
+        totals = recovered.runtime_totals()
+        compacted, t_compact = timed(lambda: recovered.compact(date(2025, 12, 1)))
+        assert recovered.runtime_totals() == totals
+        recovered.close()
+        assert WateringJournal(journal_dir).runtime_totals() == totals
+        remaining = len(list(journal_dir.glob("runs-*.jsonl")))
+        print(f"compacted {compacted} days in {t_compact * 1000:.0f} ms; {remaining} segments left; totals unchanged")
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
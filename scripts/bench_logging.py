@@ -0,0 +1,108 @@
+"""
+Measure the latency logging adds to GardenAIEngine.evaluate_zone.
+
+Runs evaluate_zone (cache bypassed, DEBUG level so its per-evaluation log
+line is emitted) with no logger, with the synchronous console + file
+handlers, and with the queued pipeline under both overflow policies.
+Console output goes to a sink that sleeps per write to stand in for a
+slow serial console / SD card.
+
+    python scripts/bench_logging.py [calls] [sink_latency_ms]
+"""
+import copy
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.app_context import AppContext  # noqa: E402
+from core.logger import configure_root_logger, logging_stats, shutdown_logging  # noqa: E402
+from ai.engine import GardenAIEngine  # noqa: E402
+
+
+class SlowSink:
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+
+    def write(self, data: str) -> int:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+def measure(ctx: AppContext, logger, calls: int):
+    ctx.logger = logger
+    engine = GardenAIEngine(ctx)
+    samples = []
+    try:
+        for _ in range(calls):
+            started = time.perf_counter()
+            engine.evaluate_zone(1, max_age_seconds=0)
+            samples.append(time.perf_counter() - started)
+    finally:
+        engine.shutdown()
+    samples.sort()
+    return {
+        "mean_us": statistics.fmean(samples) * 1e6,
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "p99_us": samples[int(len(samples) * 0.99)] * 1e6,
+    }
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    sink_latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+
+    ctx = AppContext()
+    log_dir = tempfile.mkdtemp(prefix="bench_logging_")
+
+    def config_for(queue_cfg):
+        config = copy.deepcopy(ctx.config)
+        config["system"]["log_level"] = "DEBUG"
+        config["logging"]["directory"] = log_dir
+        config["logging"]["queue"] = queue_cfg
+        # Measure every call, not what survives rate limiting
+        config["logging"]["rate_limit"] = {"enabled": False}
+        return config
+
+    modes = {
+        "sync": {"enabled": False},
+        "queued (drop)": {"enabled": True, "max_size": 10000, "overflow": "drop"},
+        "queued (block)": {"enabled": True, "max_size": 10000, "overflow": "block"},
+    }
+
+    results = {"no logger": measure(ctx, None, calls)}
+    dropped = {}
+    real_stderr = sys.stderr
+    for name, queue_cfg in modes.items():
+        sys.stderr = SlowSink(sink_latency_ms / 1000)  # picked up by the StreamHandler
+        try:
+            logger = configure_root_logger(config_for(queue_cfg))
+            results[name] = measure(ctx, logger, calls)
+            dropped[name] = logging_stats().get("dropped", 0)
+            shutdown_logging()
+        finally:
+            sys.stderr = real_stderr
+        logging.getLogger("ingenious_irrigation").handlers.clear()
+
+    ctx.stop()
+
+    base = results["no logger"]["mean_us"]
+    print(f"{calls} evaluate_zone calls, console sink latency {sink_latency_ms}ms/write")
+    print(f"{'mode':>16} {'mean us':>9} {'p50 us':>9} {'p99 us':>9} {'added us':>9} {'dropped':>8}")
+    for name, r in results.items():
+        print(
+            f"{name:>16} {r['mean_us']:9.1f} {r['p50_us']:9.1f} {r['p99_us']:9.1f} "
+            f"{r['mean_us'] - base:9.1f} {dropped.get(name, 0):8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
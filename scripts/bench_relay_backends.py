@@ -0,0 +1,101 @@
+"""
+Benchmark relay actuation per backend without a Pi.
+
+Drives IrrigationController's relay layer with a valve workload (random
+open/close commands, about half of them redundant, plus periodic
+all-off sweeps) over:
+
+- fake:     in-memory, no latency
+- gpio-ish: fake backend with 1 ms per write (sysfs / slow GPIO stand-in)
+- expander: ExpanderBackend over a transport taking 0.3 ms per I2C write
+
+Each runs with the pin state cache off (every command forced through)
+and on, and reports bus transactions and write latency.
+
+    python scripts/bench_relay_backends.py [commands] [pins]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.app_context import AppContext  # noqa: E402
+from irrigation.controller import IrrigationController  # noqa: E402
+from irrigation.relay_backends import ActuationStats, ExpanderBackend, FakeRelayBackend  # noqa: E402
+
+
+class SlowTransport:
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+        self.transactions = 0
+
+    def __call__(self, chip: int, value: int):
+        self.transactions += 1
+        time.sleep(self.latency_seconds)
+
+
+def make_backends():
+    expander_transport = SlowTransport(0.0003)
+    return {
+        "fake": (FakeRelayBackend(), None),
+        "gpio-ish 1ms": (FakeRelayBackend(write_latency_seconds=0.001), None),
+        "expander 0.3ms": (ExpanderBackend(expander_transport, channels=16), expander_transport),
+    }
+
+
+def workload(n_commands: int, pins: list):
+    rng = random.Random(7)
+    for i in range(n_commands):
+        if i % 50 == 49:
+            yield "sweep", None, None
+        else:
+            yield "set", rng.choice(pins), rng.random() < 0.3
+
+
+def run(controller: IrrigationController, backend, transport, n_commands: int, pins: list, cached: bool):
+    controller.relay = backend
+    controller.actuation = ActuationStats(window=n_commands)
+    controller._pin_states.clear()
+    backend.setup(pins)
+    controller.set_pin_states({p: False for p in pins}, force=True)
+
+    before = transport.transactions if transport else backend.transactions
+    started = time.perf_counter()
+    for op, pin, on in workload(n_commands, pins):
+        if op == "sweep":
+            controller.set_pin_states({p: False for p in pins}, force=not cached)
+        else:
+            controller._set_pin_state(pin, on, force=not cached)
+    elapsed = time.perf_counter() - started
+    after = transport.transactions if transport else backend.transactions
+
+    stats = controller.relay_stats()
+    return elapsed, after - before, stats
+
+
+def main():
+    n_commands = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_pins = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+
+    ctx = AppContext()
+    controller = IrrigationController(ctx)  # logger is None: measure writes only
+    pins = list(range(n_pins))
+
+    print(f"{n_commands} commands over {n_pins} pins (sweep every 50)")
+    print(f"{'backend':>15} {'cache':>6} {'total ms':>9} {'bus txns':>9} {'skipped':>8} {'p50 ms':>7} {'p99 ms':>7}")
+    for name, (backend, transport) in make_backends().items():
+        for cached in (False, True):
+            elapsed, txns, stats = run(controller, backend, transport, n_commands, pins, cached)
+            print(
+                f"{name:>15} {'on' if cached else 'off':>6} {elapsed * 1000:9.1f} {txns:9} "
+                f"{stats['skipped_redundant']:8} {stats['latency_ms_p50'] or 0:7.3f} {stats['latency_ms_p99'] or 0:7.3f}"
+            )
+
+    controller.jobs.stop()
+    ctx.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Run hundreds of concurrent valve jobs through ValveJobRunner and report
+the thread count and how late each shut-off fired.
+
+    python scripts/bench_valve_jobs.py [jobs] [max_duration_seconds]
+"""
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from irrigation.valve_jobs import ValveJobRunner  # noqa: E402
+
+
+def main():
+    n_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    max_duration = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+
+    closed_at = {}
+    lock = threading.Lock()
+
+    def close_valve(pin):
+        with lock:
+            closed_at[pin] = time.monotonic()
+
+    runner = ValveJobRunner(open_valve=lambda pin: None, close_valve=close_valve)
+    threads_before = threading.active_count()
+
+    rng = random.Random(0)
+    started = time.perf_counter()
+    jobs = [runner.start(zone_id=i, pin=i, duration_seconds=rng.uniform(0.1, max_duration)) for i in range(n_jobs)]
+    start_us = (time.perf_counter() - started) / n_jobs * 1e6
+
+    # Exercise extend/cancel on a few jobs too
+    for job in jobs[:10]:
+        runner.extend(job.job_id, 0.5)
+    for job in jobs[10:20]:
+        runner.cancel(job.job_id)
+
+    threads_during = threading.active_count()
+    for job in jobs:
+        job.wait()
+
+    lateness = sorted((closed_at[j.pin] - j.deadline) * 1000 for j in jobs[20:])
+    print(f"{n_jobs} concurrent jobs, durations 0.1-{max_duration}s")
+    print(f"start(): {start_us:.1f} us/job")
+    print(f"threads: {threads_before} before, {threads_during} while running")
+    print(
+        f"shut-off lateness ms: p50={lateness[len(lateness) // 2]:.2f} "
+        f"p99={lateness[int(len(lateness) * 0.99)]:.2f} max={lateness[-1]:.2f}"
+    )
+    runner.stop()
+
+
+if __name__ == "__main__":
+    main()
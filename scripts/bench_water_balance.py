@@ -0,0 +1,79 @@
+"""
+Benchmark the soil water balance simulator: one year, 10k zones.
+
+Writes a synthetic weather CSV, then backtests the fixed default schedule
+against a depletion-triggered policy and prints timings and totals.
+
+    python scripts/bench_water_balance.py [n_zones] [n_days]
+"""
+import csv
+import datetime as dt
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ai.water_balance import (  # noqa: E402
+    WeatherSeries,
+    ZoneSoilParams,
+    depletion_triggered_policy,
+    fixed_interval_policy,
+    simulate,
+)
+
+
+def write_synthetic_weather(path: Path, n_days: int, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    start = dt.date(2025, 1, 1)
+    with path.open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["date", "tmin_c", "tmax_c", "rain_mm"])
+        for i in range(n_days):
+            season = np.sin(2 * np.pi * (i - 100) / 365)
+            tmin = 14 + 9 * season + rng.normal(0, 2)
+            tmax = tmin + 9 + rng.normal(0, 2)
+            rain = rng.exponential(12) if rng.random() < 0.25 else 0.0
+            w.writerow([(start + dt.timedelta(days=i)).isoformat(), f"{tmin:.1f}", f"{tmax:.1f}", f"{rain:.1f}"])
+
+
+def main(n_zones: int = 10_000, n_days: int = 365):
+    rng = np.random.default_rng(11)
+    soils = ["sandy", "loam", "clay"]
+    plants = ["bermuda", "st_augustine", "shrub", "vegetable"]
+    zones = [
+        {"id": i, "soil_type": soils[rng.integers(3)], "grass_type": plants[rng.integers(4)]}
+        for i in range(n_zones)
+    ]
+    params = ZoneSoilParams.from_zones(zones)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        weather_csv = Path(tmp) / "weather.csv"
+        write_synthetic_weather(weather_csv, n_days)
+        t0 = time.perf_counter()
+        weather = WeatherSeries.from_csv(weather_csv)
+        t_load = time.perf_counter() - t0
+
+    for name, policy in (
+        ("fixed 15m daily", fixed_interval_policy(15.0, 1)),
+        ("fixed 20m every 3d", fixed_interval_policy(20.0, 3)),
+        ("depletion-triggered", depletion_triggered_policy()),
+    ):
+        t0 = time.perf_counter()
+        result = simulate(params, weather, latitude_deg=29.56, policy=policy)
+        elapsed = time.perf_counter() - t0
+        print(
+            f"{name:<22} {elapsed * 1000:8.1f} ms  "
+            f"irrigation={result.irrigation_mm.sum(axis=0).mean():7.1f} mm/zone  "
+            f"percolation={result.deep_percolation_mm.sum(axis=0).mean():7.1f} mm/zone  "
+            f"stress_days={result.stress_days.mean():5.1f}"
+        )
+    print(f"zones={n_zones} days={n_days} weather load={t_load * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,119 @@
+"""
+Exercise the weather cache against a slow, counting fake provider.
+
+- 50 threads asking at once on a cold cache: one provider call
+- after the TTL: the stale snapshot comes back at once, one refresh
+  runs in the background
+- a provider outage during refresh: stale snapshot kept, no exception
+- restart: a new cache on the same file serves the saved snapshot
+  without calling the provider
+- past max_stale: callers wait for a fresh fetch
+
+    python scripts/bench_weather_cache.py
+"""
+import logging
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from weather_cache import WeatherCache  # noqa: E402
+
+KEY = "openweather:Pearland,TX,US"
+LATENCY = 0.2
+
+
+class FakeClock:
+    virtual = False
+
+    def __init__(self):
+        self.offset = 0.0
+
+    def time(self):
+        return time.time() + self.offset
+
+
+class SlowProvider:
+    def __init__(self):
+        self.calls = 0
+        self.failing = False
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        time.sleep(LATENCY)
+        if self.failing:
+            raise ConnectionError("provider down")
+        return {"temp_c": 20.0 + n, "humidity": 0.5, "rain_probability": 0.1}
+
+
+def make_cache(path, clock):
+    logger = logging.getLogger("bench")
+    logger.setLevel(logging.ERROR)
+    return WeatherCache(path, ttl_seconds=1800, max_stale_seconds=6 * 3600, clock=clock, logger=logger)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "weather_cache.json"
+        clock, provider = FakeClock(), SlowProvider()
+        cache = make_cache(path, clock)
+
+        results = []
+        started = time.perf_counter()
+        threads = [threading.Thread(target=lambda: results.append(cache.get(KEY, provider))) for _ in range(50)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - started
+        assert provider.calls == 1 and len({r["temp_c"] for r in results}) == 1, provider.calls
+        print(f"cold: 50 concurrent callers, {provider.calls} provider call, {wall * 1000:.0f} ms")
+
+        t0 = time.perf_counter()
+        for _ in range(10000):
+            cache.get(KEY, provider)
+        print(f"fresh hit: {(time.perf_counter() - t0) / 10000 * 1e6:.1f} us")
+
+        clock.offset += 1801  # past the TTL
+        t0 = time.perf_counter()
+        stale = [cache.get(KEY, provider) for _ in range(20)]
+        t_stale = time.perf_counter() - t0
+        assert all(s["temp_c"] == 21.0 for s in stale)
+        assert t_stale < LATENCY / 2, t_stale
+        time.sleep(LATENCY * 2)
+        assert provider.calls == 2, provider.calls
+        assert cache.get(KEY, provider)["temp_c"] == 22.0
+        print(f"stale: 20 calls served in {t_stale * 1000:.1f} ms, one background refresh")
+
+        clock.offset += 1801
+        provider.failing = True
+        assert cache.get(KEY, provider)["temp_c"] == 22.0
+        time.sleep(LATENCY * 2)
+        assert cache.get(KEY, provider)["temp_c"] == 22.0 and cache.stats["fetch_errors"] == 1
+        print("outage: refresh failed, stale snapshot kept")
+        provider.failing = False
+        time.sleep(LATENCY * 2)  # the retry started by the last get() lands
+
+        calls = provider.calls
+        restarted = make_cache(path, clock)
+        assert restarted.peek(KEY) is not None
+        snap = restarted.get(KEY, provider)
+        assert provider.calls == calls, (provider.calls, calls)
+        print(f"restart: snapshot temp={snap['temp_c']} served from {path.name}, no provider call")
+
+        clock.offset += 7 * 3600  # past max_stale
+        t0 = time.perf_counter()
+        fresh = restarted.get(KEY, provider)
+        assert time.perf_counter() - t0 >= LATENCY and fresh["temp_c"] > snap["temp_c"]
+        print("too stale: caller waited for a fresh fetch")
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
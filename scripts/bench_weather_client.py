@@ -0,0 +1,179 @@
+"""
+Load-test the pooled weather client against the local stand-in server.
+
+- unpooled requests.get per call (the old fetch path) vs the pooled
+  client, sequentially: connections opened and per-call latency
+- 16 threads plus 500 concurrent async calls: throughput, latency
+  percentiles, connections stay within the pool limit
+- 20% of answers 503: retries with jitter hide almost all of them
+- provider down: the breaker opens, calls fail fast, WeatherService
+  serves the cached snapshot (or the fallback with an empty cache), and
+  one probe closes the circuit once the provider is back
+
+The stand-in runs in-process and shares the CPU with the client, so
+throughput here is a floor; against a remote provider the keep-alive
+win is larger (DNS and TLS are skipped too, not only the TCP handshake).
+
+    python scripts/bench_weather_client.py
+"""
+import asyncio
+import logging
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from weather_client import CircuitBreaker, CircuitOpenError, WeatherHttpClient, WeatherUnavailable  # noqa: E402
+from weather_service import WeatherService  # noqa: E402
+from weather_standin import StandinServer  # noqa: E402
+
+PATH = "/data/2.5/weather"
+PARAMS = {"q": "Pearland,TX,US", "appid": "test", "units": "metric"}
+
+logger = logging.getLogger("bench")
+logger.setLevel(logging.CRITICAL)
+
+
+class Ctx:
+    def __init__(self, weather):
+        self.logger = logger
+        self._weather = weather
+
+    def get(self, key, default=None):
+        return self._weather if key == "weather" else default
+
+
+def make_client(server, **kw):
+    kw.setdefault("backoff_base_seconds", 0.01)
+    kw.setdefault("backoff_max_seconds", 0.05)
+    return WeatherHttpClient(server.url, logger=logger, **kw)
+
+
+def main():
+    server = StandinServer(latency_ms=5).start()
+
+    # Old path: a fresh connection per call
+    n = 200
+    started = time.perf_counter()
+    for _ in range(n):
+        requests.get(f"{server.url}{PATH}", params=PARAMS, timeout=5).raise_for_status()
+    t_plain = (time.perf_counter() - started) / n
+    plain_conns = server.connections
+
+    server.reset_counts()
+    client = make_client(server, max_connections=16, max_keepalive_connections=16)
+    client.get_json(PATH, PARAMS)  # start the loop thread
+    started = time.perf_counter()
+    for _ in range(n):
+        client.get_json(PATH, PARAMS)
+    t_pooled = (time.perf_counter() - started) / n
+    print(
+        f"sequential x{n}: requests.get {t_plain * 1000:.2f} ms/call, {plain_conns} connections; "
+        f"pooled {t_pooled * 1000:.2f} ms/call, {server.connections} connection(s)"
+    )
+    assert server.connections == 1
+
+    # Load: threads through the blocking bridge, then async fan-out
+    server.reset_counts()
+    threads_n, per_thread = 16, 50
+    started = time.perf_counter()
+    workers = [
+        threading.Thread(target=lambda: [client.get_json(PATH, PARAMS) for _ in range(per_thread)])
+        for _ in range(threads_n)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    wall = time.perf_counter() - started
+    print(f"{threads_n} threads x {per_thread}: {threads_n * per_thread / wall:.0f} req/s, {server.connections} new connections")
+
+    async def fan_out(k):
+        await asyncio.gather(*(client.get_json_async(PATH, PARAMS) for _ in range(k)))
+
+    server.reset_counts()
+    started = time.perf_counter()
+    client.submit(fan_out(500)).result()
+    wall = time.perf_counter() - started
+    report = client.report()
+    print(
+        f"500 concurrent async calls: {500 / wall:.0f} req/s, {server.connections} new connections; "
+        f"latency incl. queueing p50 {report['latency_ms_p50']} ms p95 {report['latency_ms_p95']} ms p99 {report['latency_ms_p99']} ms"
+    )
+    assert server.connections <= 16
+    client.close()
+
+    # Flaky provider
+    server.error_rate = 0.2
+    flaky = make_client(server, retries=3, breaker=CircuitBreaker(failure_threshold=1000))
+    ok = 0
+    for _ in range(500):
+        try:
+            flaky.get_json(PATH, PARAMS)
+            ok += 1
+        except WeatherUnavailable:
+            pass
+    report = flaky.report()
+    print(f"20% 503s: {ok}/500 calls succeeded, {report['retries']} retries")
+    assert ok >= 490
+    flaky.close()
+    server.error_rate = 0.0
+
+    # Provider down: breaker + cached / fallback data
+    with tempfile.TemporaryDirectory() as tmp:
+        weather_cfg = {
+            "provider": "openweather",
+            "api_key": "test",
+            "base_url": server.url,
+            "location": {"city": "Pearland", "state": "TX"},
+            "cache_path": str(Path(tmp) / "cache.json"),
+            "cache_ttl_minutes": 0,
+            "client": {"retries": 1, "backoff_base_seconds": 0.01, "breaker_failure_threshold": 3,
+                       "breaker_reset_seconds": 0.5},
+            "fallback": {"temp_c": 22.0, "humidity": 0.5, "rain_probability": 0.0},
+        }
+        service = WeatherService(Ctx(weather_cfg))
+        first = service.fetch_current_weather()
+        server.down = True
+        for _ in range(3):
+            try:
+                service.fetch_current_weather()
+            except WeatherUnavailable:
+                pass
+        assert service.client.breaker.state == "open"
+        started = time.perf_counter()
+        try:
+            service.client.get_json(PATH, PARAMS)
+            raise AssertionError("circuit should be open")
+        except CircuitOpenError:
+            t_short = time.perf_counter() - started
+        stale = service.get_weather()  # TTL 0: stale, refresh fails in the background
+        assert stale["temp_c"] == first["temp_c"]
+        cold = WeatherService(Ctx(dict(weather_cfg, cache_path=str(Path(tmp) / "empty.json"))))
+        assert cold.get_weather().get("fallback") is True
+        print(
+            f"provider down: circuit open after 3 failed calls, short-circuit in {t_short * 1e6:.0f} us; "
+            f"cached snapshot served, fallback with an empty cache"
+        )
+
+        server.down = False
+        time.sleep(0.6)
+        assert service.client.breaker.state == "half_open"
+        service.fetch_current_weather()
+        assert service.client.breaker.state == "closed"
+        print(f"provider back: probe closed the circuit; client report {service.client_stats()}")
+        service.close()
+        cold.close()
+
+    server.stop()
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
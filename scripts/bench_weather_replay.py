@@ -0,0 +1,158 @@
+"""
+Record weather, pack it into a replay archive, and load-test replay.
+
+- a WeatherService on the simulated provider with recording on runs for
+  two virtual days; a second service replaying the archive (shifted to
+  another date) returns the same snapshots and forecasts, and at
+  speed 60 a replay minute covers a recorded hour
+- 5000 synthetic locations (hourly snapshots, 3-hour forecasts twice a
+  day) are packed and opened; random lookups across all of them measure
+  request rate, with the index and payloads memory-mapped
+
+    python scripts/bench_weather_replay.py [locations]
+"""
+import logging
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.clock import VirtualClock  # noqa: E402
+from weather_providers import (  # noqa: E402
+    ReplayArchive,
+    ReplayProvider,
+    build_archive,
+    read_recordings,
+)
+from weather_service import WeatherService  # noqa: E402
+
+logger = logging.getLogger("bench")
+logger.setLevel(logging.ERROR)
+LOCATION = {"city": "Pearland", "state": "TX", "country": "US"}
+RECORDED = datetime(2025, 7, 1)
+
+
+class Ctx:
+    def __init__(self, weather):
+        self.logger = logger
+        self._weather = weather
+
+    def get(self, key, default=None):
+        return self._weather if key == "weather" else default
+
+
+def record_and_replay(tmp: Path):
+    clock = VirtualClock(RECORDED)
+    recorder = WeatherService(Ctx({
+        "provider": "simulated",
+        "location": LOCATION,
+        "cache_ttl_minutes": 60,
+        "record": {"enabled": True, "directory": str(tmp / "rec")},
+    }), clock=clock)
+    seen = []
+    for _ in range(48):
+        seen.append((clock.time(), recorder.get_weather(), recorder.get_forecast()))
+        clock.advance(3600)
+    recorder.close()
+    n = build_archive(read_recordings(sorted((tmp / "rec").glob("*.jsonl.gz"))), tmp / "sim.wxa")
+    assert n == 96, n
+
+    # Replay a month later, hour by hour
+    replay_clock = VirtualClock(RECORDED + timedelta(days=30))
+    replayer = WeatherService(Ctx({
+        "provider": "replay",
+        "location": LOCATION,
+        "cache_ttl_minutes": 60,
+        "replay": {"archive": str(tmp / "sim.wxa")},
+    }), clock=replay_clock)
+    shift = replay_clock.time() - seen[0][0]
+    for recorded_at, snapshot, forecast in seen:
+        assert replayer.get_weather() == snapshot, (recorded_at, replayer.get_weather(), snapshot)
+        replayed = replayer.get_forecast()
+        assert (replayed.hourly["time"] - forecast.hourly["time"] == shift).all()
+        assert (replayed.hourly["temp_c"] == forecast.hourly["temp_c"]).all()
+        replay_clock.advance(3600)
+    replayer.close()
+
+    fast_clock = VirtualClock(RECORDED + timedelta(days=30))
+    fast = ReplayProvider(ReplayArchive(tmp / "sim.wxa"), clock=fast_clock, speed=60)
+    fast_clock.advance(60 * 10)  # ten replay minutes = ten recorded hours
+    assert fast.current(LOCATION) == seen[10][1]
+    fast.close()
+    print("record -> archive -> replay: 48 hourly snapshots and forecasts identical, shifted 30 days; speed 60 ok")
+
+
+def synthetic_records(n_locations: int, hours: int = 24):
+    rng = random.Random(11)
+    t0 = RECORDED.timestamp()
+    for h in range(hours):
+        t = t0 + h * 3600
+        for loc in range(n_locations):
+            key = f"City{loc},ST,US"
+            temp = round(20 + 10 * rng.random(), 1)
+            yield {"t": t, "kind": "current", "location": key,
+                   "payload": {"temp_c": temp, "humidity": round(rng.random(), 2),
+                               "rain_probability": round(rng.random() ** 2, 2)}}
+            if h % 12 == 0:
+                yield {"t": t, "kind": "forecast", "location": key, "payload": {"list": [
+                    {"dt": int(t + 10800 * i), "main": {"temp": round(temp + rng.uniform(-5, 5), 1),
+                                                        "humidity": rng.randint(30, 90)},
+                     "pop": round(rng.random(), 2), "wind": {"speed": round(rng.uniform(0, 8), 1)}}
+                    for i in range(40)
+                ]}}
+
+
+def load_test(tmp: Path, n_locations: int):
+    path = tmp / "many.wxa"
+    started = time.perf_counter()
+    n = build_archive(synthetic_records(n_locations), path)
+    t_build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    archive = ReplayArchive(path)
+    t_open = time.perf_counter() - started
+    print(
+        f"{n_locations} locations, {n} records -> {path.stat().st_size / 1e6:.1f} MB archive in {t_build:.1f}s; "
+        f"opened in {t_open * 1000:.1f} ms"
+    )
+
+    clock = VirtualClock(RECORDED + timedelta(days=60))
+    provider = ReplayProvider(archive, clock=clock, speed=3600)  # a recorded hour per replay second
+    locations = [{"city": f"City{i}", "state": "ST", "country": "US"} for i in range(n_locations)]
+    rng = random.Random(2)
+    requests = 200_000
+    picks = [rng.choice(locations) for _ in range(requests)]
+    started = time.perf_counter()
+    for i, loc in enumerate(picks):
+        if i % 1000 == 0:
+            clock.advance(0.5)
+        provider.current(loc)
+    wall = time.perf_counter() - started
+    print(f"current(): {requests / wall:,.0f} req/s over random locations while time advances")
+
+    picks = picks[:20_000]
+    started = time.perf_counter()
+    for loc in picks:
+        provider.forecast(loc)
+    wall = time.perf_counter() - started
+    print(
+        f"forecast(): {len(picks) / wall:,.0f} req/s (40 rows shifted each); "
+        f"{archive.stats['decoded']} payloads decoded for {archive.stats['lookups']} lookups"
+    )
+    provider.close()
+
+
+def main():
+    n_locations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        record_and_replay(Path(tmp))
+        load_test(Path(tmp), n_locations)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
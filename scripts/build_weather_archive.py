@@ -0,0 +1,42 @@
+"""
+Pack weather recordings into a replay archive.
+
+Reads every weather-*.jsonl.gz written by WeatherRecorder
+(`weather.record.enabled`) in the given directories or files and writes
+one archive for the "replay" provider (`weather.replay.archive`).
+
+    python scripts/build_weather_archive.py data/weather_recordings data/weather.wxa
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from weather_providers import ReplayArchive, build_archive, read_recordings  # noqa: E402
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(2)
+    *sources, target = sys.argv[1:]
+    paths = []
+    for source in map(Path, sources):
+        paths.extend(sorted(source.glob("weather-*.jsonl.gz")) if source.is_dir() else [source])
+    if not paths:
+        sys.exit(f"no recordings in {', '.join(sources)}")
+
+    started = time.perf_counter()
+    n = build_archive(read_recordings(paths), target)
+    archive = ReplayArchive(target)
+    span = (archive.end - archive.start) / 3600
+    print(
+        f"{n} records from {len(paths)} file(s), {len(archive.locations)} locations, {span:.1f}h recorded -> "
+        f"{target} ({Path(target).stat().st_size / 1e6:.1f} MB) in {time.perf_counter() - started:.1f}s"
+    )
+    archive.close()
+
+
+if __name__ == "__main__":
+    main()
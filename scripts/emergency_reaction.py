@@ -0,0 +1,197 @@
+"""
+Prove the emergency shutdown bound under load (simulation mode).
+
+Builds an IrrigationController on the fake relay backend (with a
+simulated bus write latency) and an EmergencyBus wired to its
+emergency_stop, then loads the process with:
+
+- valve churn: worker threads starting, extending and cancelling jobs
+  across every pin
+- log pressure: threads emitting INFO records through the queued logger
+- CPU burners: pure-Python loops competing for the GIL
+
+While that runs, emergencies are published at random moments. For each
+one the script checks, on the handler thread right after shutdown, that
+no relay is energized and no job is active, then clears the latch and
+lets the load resume. It fails if any reaction exceeds the bound or
+any relay was left on.
+
+    python scripts/emergency_reaction.py [emergencies] [bound_ms]
+"""
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.app_context import AppContext  # noqa: E402
+from core.logger import configure_root_logger, logging_stats, shutdown_logging  # noqa: E402
+from irrigation.controller import IrrigationController  # noqa: E402
+from irrigation.emergency_shutdown import EmergencyActiveError, EmergencyBus  # noqa: E402
+from irrigation.relay_backends import FakeRelayBackend  # noqa: E402
+from irrigation.valve_jobs import ZoneBusyError  # noqa: E402
+
+N_PINS = 32
+WRITE_LATENCY_SECONDS = 0.001
+
+
+def build(tmpdir: Path, bound_seconds: float):
+    config = {
+        "system": {"simulation_mode": True, "log_level": "INFO"},
+        "hardware": {
+            "relay": {
+                "backend": "fake",
+                "fake_write_latency_ms": WRITE_LATENCY_SECONDS * 1000,
+                "in_pins": {f"zone_{z}": 100 + z for z in range(N_PINS)},
+            }
+        },
+        "logging": {
+            "directory": str(tmpdir),
+            "queue": {"enabled": True, "max_size": 10000, "overflow": "drop"},
+            "rate_limit": {"enabled": False},
+        },
+    }
+    ctx = AppContext()
+    ctx.config = config
+    # Console output goes to /dev/null (picked up by the StreamHandler);
+    # records still travel through the queue to the file
+    real_stderr = sys.stderr
+    sys.stderr = open(os.devnull, "w")
+    try:
+        ctx.logger = configure_root_logger(config)
+    finally:
+        sys.stderr = real_stderr
+
+    controller = IrrigationController(ctx)
+    # Same settings as SystemOrchestrator with the shipped config
+    bus = EmergencyBus(
+        controller.emergency_stop,
+        max_reaction_seconds=bound_seconds,
+        logger=ctx.logger,
+    )
+    bus.on_emergency(controller.cancel_jobs_after_emergency)
+    return ctx, controller, bus
+
+
+def valve_churn(controller: IrrigationController, stop: threading.Event, seed: int):
+    rng = random.Random(seed)
+    zones = list(range(N_PINS))
+    while not stop.is_set():
+        zone = rng.choice(zones)
+        try:
+            op = rng.random()
+            if op < 0.6:
+                controller.water_zone(zone, rng.uniform(0.05, 2.0))
+            elif op < 0.8:
+                controller.stop_zone(zone)
+            else:
+                for job in controller.watering_jobs()[:1]:
+                    controller.extend_watering(job["job_id"], 0.1)
+        except (ZoneBusyError, EmergencyActiveError):
+            pass
+        time.sleep(rng.uniform(0, 0.002))
+
+
+def log_spam(logger: logging.Logger, stop: threading.Event, seed: int):
+    i = 0
+    while not stop.is_set():
+        logger.info("load record %d from spammer %d", i, seed, extra={"zone_id": i % N_PINS})
+        i += 1
+        if i % 200 == 0:
+            time.sleep(0.001)
+
+
+def cpu_burn(stop: threading.Event):
+    x = 0
+    while not stop.is_set():
+        for i in range(10000):
+            x = (x * 31 + i) % 1000003
+
+
+def main():
+    n_events = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    bound_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 50.0
+    bound = bound_ms / 1000.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx, controller, bus = build(Path(tmp), bound)
+        backend = controller.relay
+        assert isinstance(backend, FakeRelayBackend) and backend.write_latency_seconds > 0
+
+        violations = []
+        handled = threading.Semaphore(0)
+
+        def verify(event):
+            on = [p for p in controller.zone_pin_map.values() if backend.energized(p)]
+            if on or controller.jobs.active_count():
+                violations.append((event.event_id, on, controller.jobs.active_count()))
+            handled.release()
+
+        bus.on_emergency(verify)
+        # As App does with safety.emergency.switch_interval_ms = 1
+        previous_switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(0.001)
+        bus.start()
+
+        stop = threading.Event()
+        threads = (
+            [threading.Thread(target=valve_churn, args=(controller, stop, s)) for s in range(8)]
+            + [threading.Thread(target=log_spam, args=(ctx.logger, stop, s)) for s in range(4)]
+            + [threading.Thread(target=cpu_burn, args=(stop,)) for _ in range(4)]
+        )
+        for t in threads:
+            t.start()
+
+        rng = random.Random(3)
+        time.sleep(0.5)  # let the load build up
+        peak_energized = 0
+        started = time.perf_counter()
+        for i in range(n_events):
+            time.sleep(rng.uniform(0.005, 0.03))
+            peak_energized = max(
+                peak_energized, sum(backend.energized(p) for p in controller.zone_pin_map.values())
+            )
+            bus.publish("pressure" if i % 2 else "vision", f"simulated leak #{i}", zone_id=i % N_PINS)
+            if not handled.acquire(timeout=5):
+                violations.append((f"#{i}", "not handled within 5s", None))
+                break
+            controller.clear_emergency()
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        for t in threads:
+            t.join()
+        bus.stop()
+        sys.setswitchinterval(previous_switch_interval)
+        controller.shutdown()
+        stats = bus.stats.to_dict()
+        log_stats = logging_stats()
+        ctx.stop()
+        shutdown_logging()
+
+    print(
+        f"{stats['handled']} emergencies over {elapsed:.1f}s under load "
+        f"(8 valve threads, 4 log threads, 4 CPU burners; {N_PINS} relays, "
+        f"{WRITE_LATENCY_SECONDS * 1000:.0f} ms writes; up to {peak_energized} energized)"
+    )
+    print(f"handler priority: {bus.priority}")
+    print(
+        f"reaction ms: p50 {stats['reaction_ms_p50']:.2f}  p99 {stats['reaction_ms_p99']:.2f}  "
+        f"worst {stats['reaction_ms_worst']:.2f}  (bound {bound_ms:.0f})"
+    )
+    print(f"log records enqueued {log_stats.get('enqueued')} dropped {log_stats.get('dropped')}")
+
+    assert stats["handled"] == n_events, f"handled {stats['handled']} of {n_events}"
+    assert not violations, f"relays or jobs left active after shutdown: {violations[:5]}"
+    assert stats["failures"] == 0, f"{stats['failures']} shutdowns failed"
+    assert stats["deadline_misses"] == 0, f"{stats['deadline_misses']} reactions exceeded {bound_ms} ms"
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Fake-clock harness for the asyncio valve API.
+
+Runs thousands of simulated valves through ValveController.open_for and
+ZoneManager.run_many on a FakeClockEventLoop and checks:
+
+- every run lasts exactly its requested time on the loop clock
+- max_concurrent caps the number of open valves
+- shutdown() mid-run cancels everything and leaves every valve closed
+- cancelling one open_for closes that valve immediately
+
+Hours of watering finish in well under a second of real time.
+
+    python scripts/sim_async_valves.py [valves]
+"""
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from irrigation.valve_controller import ValveController  # noqa: E402
+from irrigation.zone_manager import ZoneManager  # noqa: E402
+from utils.fake_clock import FakeClockEventLoop  # noqa: E402
+
+
+class RelayBoard:
+    """Fake actuator that tracks open valves and write counts."""
+
+    def __init__(self):
+        self.open_pins = set()
+        self.peak_open = 0
+        self.writes = 0
+
+    def __call__(self, pin: int, open_: bool):
+        self.writes += 1
+        if open_:
+            assert pin not in self.open_pins, f"pin {pin} opened twice"
+            self.open_pins.add(pin)
+            self.peak_open = max(self.peak_open, len(self.open_pins))
+        else:
+            self.open_pins.discard(pin)
+
+
+def build_site(n_valves: int):
+    board = RelayBoard()
+    manager = ZoneManager()
+    for zone_id in range(n_valves):
+        manager.register_zone(zone_id, ValveController(gpio_pin=zone_id, actuator=board))
+    return board, manager
+
+
+def check_all_complete(n_valves: int):
+    board, manager = build_site(n_valves)
+    rng = random.Random(1)
+    runs = {z: rng.choice([5, 10, 15, 20, 30, 45, 60]) for z in range(n_valves)}
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        results = await manager.run_many(runs)
+        return loop.time(), results
+
+    loop = FakeClockEventLoop()
+    started = time.perf_counter()
+    elapsed, results = loop.run_until_complete(scenario())
+    real = time.perf_counter() - started
+    loop.close()
+
+    assert elapsed == max(runs.values()) * 60
+    assert all(r.completed and r.open_seconds == runs[z] * 60 for z, r in results.items())
+    assert not board.open_pins and board.writes == 2 * n_valves
+    print(f"all complete: {n_valves} valves, {elapsed / 3600:.1f}h simulated in {real * 1000:.0f} ms real")
+
+
+def check_max_concurrent(n_valves: int, limit: int):
+    board, manager = build_site(n_valves)
+    runs = [(z, 10) for z in range(n_valves)]
+
+    loop = FakeClockEventLoop()
+    results = loop.run_until_complete(manager.run_many(runs, max_concurrent=limit))
+    elapsed = loop.time()
+    loop.close()
+
+    assert board.peak_open == limit
+    assert all(r.completed for r in results.values())
+    batches = -(-n_valves // limit)
+    assert elapsed == batches * 10 * 60
+    print(f"max_concurrent: {n_valves} valves, peak open {board.peak_open}/{limit}, {batches} waves")
+
+
+def check_shutdown(n_valves: int):
+    board, manager = build_site(n_valves)
+    runs = {z: 30 for z in range(n_valves)}
+
+    async def scenario():
+        runner = asyncio.ensure_future(manager.run_many(runs, max_concurrent=n_valves // 2))
+        await asyncio.sleep(10 * 60)
+        open_before = len(board.open_pins)
+        was_open = await manager.shutdown()
+        try:
+            await runner
+        except asyncio.CancelledError:
+            pass
+        else:
+            raise AssertionError("run_many swallowed the cancellation")
+        return open_before, was_open
+
+    loop = FakeClockEventLoop()
+    open_before, was_open = loop.run_until_complete(scenario())
+    loop.close()
+    results = manager.last_results
+
+    assert open_before == len(was_open) == n_valves // 2
+    assert not board.open_pins, "valves left open after shutdown"
+    assert all(not r.completed and r.error == "cancelled" for r in results.values())
+    ran = [r for r in results.values() if r.open_seconds > 0]
+    assert len(ran) == n_valves // 2 and all(r.open_seconds == 600 for r in ran)
+    print(f"shutdown: {open_before} open valves closed at t=10min, {n_valves - len(ran)} queued runs never opened")
+
+
+def check_cancel_one():
+    board = RelayBoard()
+    valve = ValveController(gpio_pin=7, actuator=board)
+
+    async def scenario():
+        task = asyncio.ensure_future(valve.open_for(60))
+        await asyncio.sleep(90)
+        assert valve.is_open and board.open_pins == {7}
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return asyncio.get_running_loop().time()
+
+    loop = FakeClockEventLoop()
+    now = loop.run_until_complete(scenario())
+    loop.close()
+
+    assert not valve.is_open and not board.open_pins and now == 90
+    print("cancel: valve closed immediately on cancellation")
+
+
+def main():
+    n_valves = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    check_all_complete(n_valves)
+    check_max_concurrent(n_valves, limit=64)
+    check_shutdown(n_valves)
+    check_cancel_one()
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Local stand-in for the OpenWeather current-weather endpoint.
+
+A small asyncio HTTP/1.1 server with keep-alive that answers
+GET /data/2.5/weather with an OpenWeather-shaped body. Latency, the
+share of 503 answers and a hard "down" mode (connections reset) can be
+changed while it runs; it counts connections and requests, so pooling
+is visible from the outside.
+
+    python scripts/weather_standin.py [--port 8765] [--latency-ms 30] [--error-rate 0.1]
+
+then point `weather.base_url` at http://127.0.0.1:8765.
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Optional
+
+
+class StandinServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0, error_rate: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.down = False
+        self.connections = 0
+        self.requests = 0
+        self._rng = random.Random(1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def reset_counts(self):
+        self.connections = self.requests = 0
+
+    def _body(self, query: str) -> bytes:
+        t = time.time()
+        return json.dumps({
+            "name": query or "Standin",
+            "dt": int(t),
+            "main": {"temp": round(24 + 6 * ((t / 60) % 1), 2), "humidity": 55},
+            "weather": [{"main": "Clouds"}],
+            "wind": {"speed": 2.5},
+        }).encode()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                if self.down:
+                    writer.transport.abort()
+                    return
+                self.requests += 1
+                request_line = head.split(b"\r\n", 1)[0].decode()
+                _, target, _ = request_line.split(" ", 2)
+                path, _, query = target.partition("?")
+                if self.latency_ms:
+                    await asyncio.sleep(self.latency_ms / 1000.0)
+                if path != "/data/2.5/weather":
+                    status, body = "404 Not Found", b'{"message": "not found"}'
+                elif self._rng.random() < self.error_rate:
+                    status, body = "503 Service Unavailable", b'{"message": "busy"}'
+                else:
+                    q = dict(p.split("=", 1) for p in query.split("&") if "=" in p).get("q", "")
+                    status, body = "200 OK", self._body(q)
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def start(self) -> "StandinServer":
+        """Serve from a background thread; returns once the port is bound."""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, backlog=1024)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="WeatherStandin", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._server.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server = StandinServer(port=args.port, latency_ms=args.latency_ms, error_rate=args.error_rate).start()
+    print(f"serving {server.url}/data/2.5/weather (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"{server.connections} connections, {server.requests} requests")
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
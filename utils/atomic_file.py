@@ -0,0 +1,37 @@
+"""
+Crash-safe file replacement: write a temp file next to the target, fsync
+it, rename it over the target, then fsync the directory. Readers see the
+old file or the new one, never a torn mix.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Union
+
+
+def atomic_write_json(path: Union[str, Path], payload: Any, indent: int = 2, fsync: bool = True) -> None:
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=indent)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if fsync:
+        fsync_dir(path.parent)
+
+
+def fsync_dir(path: Union[str, Path]) -> None:
+    """Make a rename or unlink in `path` durable (a no-op where unsupported)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
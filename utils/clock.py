@@ -0,0 +1,69 @@
+"""
+Clocks for the timer-driven services.
+
+The controller, scheduler, health monitor and weather cache read time
+only through a Clock, so the same code runs against the real clock or a
+VirtualClock driven by utils.event_runner.DiscreteEventRunner (season
+replays that finish in seconds).
+
+- time():      epoch seconds (what logs and schedules use)
+- monotonic(): for durations and deadlines
+- now():       local naive datetime, like datetime.now()
+"""
+
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Union
+
+
+class Clock(ABC):
+    virtual = False
+
+    @abstractmethod
+    def time(self) -> float:
+        ...
+
+    @abstractmethod
+    def monotonic(self) -> float:
+        ...
+
+    def now(self) -> datetime:
+        return datetime.fromtimestamp(self.time())
+
+
+class SystemClock(Clock):
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+
+class VirtualClock(Clock):
+    """
+    Stands still until advanced. monotonic() and time() are the same
+    number, so deadlines computed from either line up.
+    """
+
+    virtual = True
+
+    def __init__(self, start: Union[float, datetime] = 0.0):
+        self._now = start.timestamp() if isinstance(start, datetime) else float(start)
+
+    def time(self) -> float:
+        return self._now
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def advance_to(self, when: float) -> None:
+        if when < self._now:
+            raise ValueError(f"VirtualClock cannot go back ({when} < {self._now})")
+        self._now = when
+
+    def advance(self, seconds: float) -> None:
+        self.advance_to(self._now + seconds)
+
+
+SYSTEM_CLOCK = SystemClock()
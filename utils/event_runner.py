@@ -0,0 +1,98 @@
+"""
+Discrete-event runner for VirtualClock simulations.
+
+Timer-driven services (ValveJobRunner, ScheduleEngine, SystemHealthMonitor)
+expose two methods instead of running their own threads:
+
+- next_wakeup(): clock time of their next due work, or None
+- run_due():     do everything due at the current clock time
+
+DiscreteEventRunner jumps the clock straight from one wakeup to the next
+and runs whoever is due, so idle time costs nothing. Ad-hoc events
+(weather changes, injected sensor readings, ...) go through call_at().
+Everything runs on the calling thread in a fixed order, so a run is
+reproducible.
+
+    clock = VirtualClock(datetime(2025, 6, 1))
+    runner = DiscreteEventRunner(clock)
+    orchestrator.attach_to(runner)
+    runner.run_for(90 * 86400)
+"""
+
+import heapq
+import itertools
+from typing import Any, Callable, List, Optional, Protocol, Tuple
+
+from utils.clock import VirtualClock
+
+
+class TimerDriven(Protocol):
+    def next_wakeup(self) -> Optional[float]:
+        ...
+
+    def run_due(self) -> None:
+        ...
+
+
+class DiscreteEventRunner:
+    # Rounds at one instant before a participant that never makes progress is reported
+    MAX_ROUNDS_PER_INSTANT = 10000
+
+    def __init__(self, clock: VirtualClock):
+        self.clock = clock
+        self._participants: List[TimerDriven] = []
+        self._events: List[Tuple[float, int, Callable[[], Any]]] = []
+        self._seq = itertools.count()
+        self.steps = 0
+
+    def add(self, *participants: TimerDriven) -> None:
+        """Participants run in the order added when due at the same time."""
+        self._participants.extend(participants)
+
+    def call_at(self, when: float, callback: Callable[[], Any]) -> None:
+        heapq.heappush(self._events, (when, next(self._seq), callback))
+
+    def call_later(self, delay_seconds: float, callback: Callable[[], Any]) -> None:
+        self.call_at(self.clock.time() + delay_seconds, callback)
+
+    def _next_time(self) -> Optional[float]:
+        times = [w for w in (p.next_wakeup() for p in self._participants) if w is not None]
+        if self._events:
+            times.append(self._events[0][0])
+        return min(times) if times else None
+
+    def run_until(self, end: float) -> int:
+        """
+        Process every event up to and including `end`, then leave the
+        clock at `end`. Returns the number of steps taken.
+        """
+        steps = 0
+        rounds_at_instant = 0
+        while True:
+            when = self._next_time()
+            if when is None or when > end:
+                break
+            if when > self.clock.time():
+                self.clock.advance_to(when)
+                rounds_at_instant = 0
+            rounds_at_instant += 1
+            if rounds_at_instant > self.MAX_ROUNDS_PER_INSTANT:
+                raise RuntimeError(f"simulation stalled at t={self.clock.time()}")
+
+            now = self.clock.time()
+            while self._events and self._events[0][0] <= now:
+                _, _, callback = heapq.heappop(self._events)
+                callback()
+            for participant in self._participants:
+                wakeup = participant.next_wakeup()
+                if wakeup is not None and wakeup <= now:
+                    participant.run_due()
+            steps += 1
+
+        if end > self.clock.time():
+            self.clock.advance_to(end)
+        self.steps += steps
+        return steps
+
+    def run_for(self, seconds: float) -> int:
+        return self.run_until(self.clock.time() + seconds)
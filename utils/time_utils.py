@@ -1,4 +1,5 @@
 from datetime import datetime, time as dtime
+from typing import List, Tuple
 
 
 def parse_hhmm(value: str) -> dtime:
@@ -16,3 +17,33 @@ def is_time_in_past_today(target: dtime, now: datetime) -> bool:
     target_dt = now.replace(hour=target.hour, minute=target.minute, second=0, microsecond=0)
     return target_dt <= now
 
+
+def minutes_of_day(value: str) -> int:
+    """
+    "HH:MM" -> minutes since midnight. "24:00" is accepted as the end of
+    the day.
+    """
+    if value == "24:00":
+        return 1440
+    t = parse_hhmm(value)
+    return t.hour * 60 + t.minute
+
+
+def format_hhmm(minutes: float) -> str:
+    """Minutes since midnight -> "HH:MM" (rounded down to the minute)."""
+    minutes = int(minutes) % 1440
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def parse_window(value: str) -> List[Tuple[int, int]]:
+    """
+    "HH:MM-HH:MM" -> [(start, end)] in minutes since midnight. A window
+    that wraps past midnight ("21:00-02:00") is split in two.
+    """
+    start_s, end_s = (part.strip() for part in value.split("-"))
+    start, end = minutes_of_day(start_s), minutes_of_day(end_s)
+    if start == end:
+        raise ValueError(f"Empty time window: {value!r}")
+    if start < end:
+        return [(start, end)]
+    return [(start, 1440), (0, end)] if end else [(start, 1440)]
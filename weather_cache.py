@@ -0,0 +1,226 @@
+"""
+Weather snapshot cache: in memory, mirrored to a JSON file so the last
+snapshot survives a restart.
+
+Entries are keyed by provider + location. get() serves:
+- fresh entries (younger than the TTL) as they are;
+- stale entries immediately, while one background refresh runs
+  (stale-while-revalidate), until they pass `max_stale_seconds`;
+- nothing / too-stale entries by fetching, with concurrent callers for
+  the same key sharing one in-flight fetch (single-flight).
+
+A failed background refresh keeps the stale entry and is logged; a
+failed foreground fetch raises to every caller waiting on it.
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+from utils.atomic_file import atomic_write_json
+from utils.clock import SYSTEM_CLOCK, Clock
+
+CACHE_FORMAT = 1
+
+Fetcher = Callable[[], Dict[str, Any]]
+
+
+class _Flight:
+    """One fetch in progress; waiters block on `done`."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class WeatherCache:
+    """
+    `path` None keeps the cache in memory only. With `background` False
+    (virtual clocks) stale entries are refreshed inline, so replays do
+    not depend on thread timing.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path, None],
+        ttl_seconds: float,
+        max_stale_seconds: float,
+        clock: Clock = SYSTEM_CLOCK,
+        background: bool = True,
+        on_update: Optional[Callable[[str, Dict[str, Any]], Any]] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.path = Path(path) if path is not None else None
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_stale_seconds = max(float(max_stale_seconds), self.ttl_seconds)
+        self.clock = clock
+        self.background = background
+        self.on_update = on_update
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}  # key -> {"snapshot", "fetched_at"}
+        self._flights: Dict[str, _Flight] = {}
+        # File writes (with their fsyncs) happen outside _lock; the newest
+        # copy of the entries wins, older ones are dropped unwritten
+        self._save_lock = threading.Lock()
+        self._version = 0
+        self._saved_version = 0
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "fetches": 0, "fetch_errors": 0}
+        self._load()
+
+    @classmethod
+    def from_config(
+        cls,
+        weather_cfg: Dict[str, Any],
+        default_path: Union[str, Path, None] = None,
+        default_ttl_minutes: float = 30,
+        clock: Clock = SYSTEM_CLOCK,
+        on_update: Optional[Callable[[str, Dict[str, Any]], Any]] = None,
+        logger: Optional[logging.Logger] = None,
+    ) -> "WeatherCache":
+        ttl = float(weather_cfg.get("cache_ttl_minutes", default_ttl_minutes)) * 60.0
+        path = weather_cfg.get("cache_path", default_path)
+        if clock.virtual:
+            path = None  # a replay must not read or overwrite the real cache
+        return cls(
+            path,
+            ttl_seconds=ttl,
+            max_stale_seconds=float(weather_cfg.get("cache_max_stale_minutes", 360)) * 60.0,
+            clock=clock,
+            background=not clock.virtual,
+            on_update=on_update,
+            logger=logger,
+        )
+
+    def _log(self, level: int, msg: str, *args):
+        self.logger.log(level, "[weather-cache] " + msg, *args)
+
+    # ---------- persistence ----------
+
+    def _load(self):
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self._log(logging.WARNING, "Ignoring unreadable cache file %s: %s", self.path, e)
+            return
+        if data.get("format") != CACHE_FORMAT:
+            return
+        for key, entry in data.get("entries", {}).items():
+            if isinstance(entry.get("snapshot"), dict) and isinstance(entry.get("fetched_at"), (int, float)):
+                self._entries[key] = {"snapshot": entry["snapshot"], "fetched_at": float(entry["fetched_at"])}
+        self._log(logging.INFO, "Loaded %d entries from %s", len(self._entries), self.path)
+
+    def _save(self, version: int, entries: Dict[str, Dict[str, Any]]):
+        """Write `entries` (a copy taken as `version`) unless a newer copy got there first."""
+        if self.path is None:
+            return
+        with self._save_lock:
+            if version <= self._saved_version:
+                return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                atomic_write_json(self.path, {"format": CACHE_FORMAT, "entries": entries})
+            except OSError as e:
+                self._log(logging.WARNING, "Could not write %s: %s", self.path, e)
+            self._saved_version = version
+
+    # ---------- lookups ----------
+
+    def peek(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached snapshot for `key`, however old, without fetching."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry["snapshot"] if entry else None
+
+    def age(self, key: str) -> Optional[float]:
+        with self._lock:
+            entry = self._entries.get(key)
+            return self.clock.time() - entry["fetched_at"] if entry else None
+
+    def get(self, key: str, fetch: Fetcher, max_age_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Snapshot for `key`, see the module docstring. An explicit
+        `max_age_seconds` is a hard requirement: an older entry is
+        refetched before returning instead of being served stale.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            age = self.clock.time() - entry["fetched_at"] if entry else None
+            if entry is not None:
+                if age < (self.ttl_seconds if max_age_seconds is None else max_age_seconds):
+                    self.stats["hits"] += 1
+                    return entry["snapshot"]
+                if max_age_seconds is None and age < self.max_stale_seconds and self.background:
+                    self.stats["stale_hits"] += 1
+                    self._start_flight_locked(key, fetch, background=True)
+                    return entry["snapshot"]
+            self.stats["misses"] += 1
+            flight, owner = self._start_flight_locked(key, fetch, background=False)
+        if owner:
+            self._run_flight(key, fetch, flight)
+        flight.done.wait()
+        if flight.error is not None:
+            if entry is not None and max_age_seconds is None and age < self.max_stale_seconds:
+                return entry["snapshot"]  # inline refresh (virtual clock) failed; stale beats nothing
+            raise flight.error
+        return flight.snapshot
+
+    def refresh(self, key: str, fetch: Fetcher) -> Dict[str, Any]:
+        """Fetch now (joining a fetch already in flight) and return the result."""
+        with self._lock:
+            flight, owner = self._start_flight_locked(key, fetch, background=False)
+        if owner:
+            self._run_flight(key, fetch, flight)
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.snapshot
+
+    # ---------- single-flight ----------
+
+    def _start_flight_locked(self, key: str, fetch: Fetcher, background: bool):
+        """(flight, True if the caller must run it)."""
+        flight = self._flights.get(key)
+        if flight is not None:
+            return flight, False
+        flight = self._flights[key] = _Flight()
+        if background:
+            threading.Thread(
+                target=self._run_flight, args=(key, fetch, flight), name="WeatherCacheRefresh", daemon=True
+            ).start()
+            return flight, False
+        return flight, True
+
+    def _run_flight(self, key: str, fetch: Fetcher, flight: _Flight):
+        try:
+            snapshot = fetch()
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self.stats["fetch_errors"] += 1
+                self._flights.pop(key, None)
+            self._log(logging.WARNING, "Refreshing %s failed: %s", key, e)
+            flight.done.set()
+            return
+
+        with self._lock:
+            self.stats["fetches"] += 1
+            self._entries[key] = {"snapshot": snapshot, "fetched_at": self.clock.time()}
+            self._version += 1
+            version, entries = self._version, dict(self._entries)
+            self._flights.pop(key, None)
+        flight.snapshot = snapshot
+        flight.done.set()
+        self._save(version, entries)
+        if self.on_update is not None:
+            try:
+                self.on_update(key, snapshot)
+            except Exception:
+                self.logger.exception("[weather-cache] on_update listener failed for %s", key)
@@ -0,0 +1,323 @@
+"""
+HTTP client for weather providers.
+
+One pooled httpx.AsyncClient (keep-alive, bounded connections) runs on
+a private event loop thread, so synchronous callers (the health monitor,
+the scheduler, API handlers) share connections instead of paying DNS,
+TCP and TLS setup on every call; async code can await get_json()
+directly on that loop via submit().
+
+Each call gets bounded retries with exponential backoff and full jitter
+on transport errors, 429 and 5xx, inside an overall deadline. A circuit
+breaker opens after repeated failed calls and short-circuits further
+calls until its reset timeout, then lets one probe through. Failures
+surface as WeatherUnavailable so the service can fall back to cached
+or default data.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Coroutine, Dict, Optional, Tuple
+
+import httpx
+
+from utils.clock import SYSTEM_CLOCK, Clock
+
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class WeatherUnavailable(RuntimeError):
+    """The provider could not be reached or kept failing."""
+
+
+class CircuitOpenError(WeatherUnavailable):
+    """Short-circuited: the provider failed recently, not calling it."""
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failed calls;
+    open -> half_open once `reset_timeout_seconds` have passed, letting a
+    single probe through; the probe closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_seconds: float = 60.0, clock: Clock = SYSTEM_CLOCK):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout_seconds = float(reset_timeout_seconds)
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self.opened = 0  # times the circuit has opened
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked()
+
+    def _state_locked(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self.clock.monotonic() - self._opened_at >= self.reset_timeout_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        return self.admit()[0]
+
+    def admit(self) -> Tuple[bool, bool]:
+        """(allowed, is_probe); a probe must end in record_* or abandon_probe()."""
+        with self._lock:
+            state = self._state_locked()
+            if state == "closed":
+                return True, False
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True, True
+            return False, False
+
+    def abandon_probe(self):
+        """The probe ended without an answer (cancelled); let the next call probe."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._probing:
+                    self.opened += 1
+                self._opened_at = self.clock.monotonic()
+                self._probing = False
+
+
+class LatencyStats:
+    """Counters plus a rolling window of per-call latencies (ms)."""
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.counts = {"calls": 0, "ok": 0, "failed": 0, "attempts": 0, "retries": 0, "short_circuited": 0}
+
+    def add(self, **increments: int):
+        with self._lock:
+            for key, n in increments.items():
+                self.counts[key] += n
+
+    def observe(self, latency_ms: float):
+        with self._lock:
+            self._latencies.append(latency_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            result: Dict[str, Any] = dict(self.counts)
+        if latencies:
+            pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]  # noqa: E731
+            result.update(
+                latency_ms_p50=round(pick(0.50), 2),
+                latency_ms_p95=round(pick(0.95), 2),
+                latency_ms_p99=round(pick(0.99), 2),
+                latency_ms_max=round(latencies[-1], 2),
+            )
+        return result
+
+
+class WeatherHttpClient:
+    def __init__(
+        self,
+        base_url: str,
+        timeout_seconds: float = 5.0,
+        connect_timeout_seconds: float = 2.0,
+        deadline_seconds: float = 8.0,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 5,
+        keepalive_expiry_seconds: float = 30.0,
+        retries: int = 2,
+        backoff_base_seconds: float = 0.25,
+        backoff_max_seconds: float = 2.0,
+        breaker: Optional[CircuitBreaker] = None,
+        clock: Clock = SYSTEM_CLOCK,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(timeout_seconds, connect=connect_timeout_seconds)
+        self.deadline_seconds = deadline_seconds
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_seconds,
+        )
+        self.retries = max(0, int(retries))
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        self.clock = clock
+        self.logger = logger or logging.getLogger(__name__)
+        self.stats = LatencyStats()
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._max_in_flight = max_connections
+
+    @classmethod
+    def from_config(
+        cls, base_url: str, client_cfg: Dict[str, Any], clock: Clock = SYSTEM_CLOCK, logger: Optional[logging.Logger] = None
+    ) -> "WeatherHttpClient":
+        return cls(
+            base_url,
+            timeout_seconds=client_cfg.get("timeout_seconds", 5.0),
+            connect_timeout_seconds=client_cfg.get("connect_timeout_seconds", 2.0),
+            deadline_seconds=client_cfg.get("deadline_seconds", 8.0),
+            max_connections=client_cfg.get("max_connections", 10),
+            max_keepalive_connections=client_cfg.get("max_keepalive_connections", 5),
+            keepalive_expiry_seconds=client_cfg.get("keepalive_expiry_seconds", 30.0),
+            retries=client_cfg.get("retries", 2),
+            backoff_base_seconds=client_cfg.get("backoff_base_seconds", 0.25),
+            backoff_max_seconds=client_cfg.get("backoff_max_seconds", 2.0),
+            breaker=CircuitBreaker(
+                client_cfg.get("breaker_failure_threshold", 5),
+                client_cfg.get("breaker_reset_seconds", 60.0),
+                clock=clock,
+            ),
+            clock=clock,
+            logger=logger,
+        )
+
+    def _log(self, level: int, msg: str, *args):
+        self.logger.log(level, "[weather-client] " + msg, *args)
+
+    # ---------- event loop ----------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run, name="WeatherClientLoop", daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Run `coro` on the client's loop; returns a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def _http(self) -> httpx.AsyncClient:
+        # Created on (and only used from) the client's loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+            # Queue callers here rather than in the connection pool, whose
+            # waiter handling degrades badly with hundreds of waiters
+            self._slots = asyncio.Semaphore(self._max_in_flight)
+        return self._client
+
+    async def _get(self, path: str, params: Optional[Dict[str, Any]]) -> httpx.Response:
+        http = self._http()
+        async with self._slots:
+            return await http.get(path, params=params)
+
+    # ---------- requests ----------
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Blocking GET returning decoded JSON; raises WeatherUnavailable."""
+        future = self.submit(self.get_json_async(path, params))
+        try:
+            return future.result(self.deadline_seconds + 1.0)
+        except TimeoutError as e:
+            future.cancel()
+            raise WeatherUnavailable(f"{path}: no answer within {self.deadline_seconds}s") from e
+
+    async def get_json_async(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        self.stats.add(calls=1)
+        allowed, probe = self.breaker.admit()
+        if not allowed:
+            self.stats.add(short_circuited=1, failed=1)
+            raise CircuitOpenError(f"{self.base_url} circuit open")
+        try:
+            return await self._get_json_attempts(path, params)
+        except BaseException:
+            # Cancellation (or a bug) skipped record_success/record_failure;
+            # a probe left hanging would keep the circuit shut for good
+            if probe:
+                self.breaker.abandon_probe()
+            raise
+
+    async def _get_json_attempts(self, path: str, params: Optional[Dict[str, Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + self.deadline_seconds
+        last_error: Optional[BaseException] = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                delay = random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** (attempt - 1)))
+                if loop.time() + delay >= deadline:
+                    break
+                self.stats.add(retries=1)
+                await asyncio.sleep(delay)
+            self.stats.add(attempts=1)
+            try:
+                resp = await asyncio.wait_for(self._get(path, params), max(0.0, deadline - loop.time()))
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                last_error = e
+                continue
+            if resp.status_code in RETRY_STATUS:
+                last_error = httpx.HTTPStatusError(f"HTTP {resp.status_code}", request=resp.request, response=resp)
+                continue
+            try:
+                resp.raise_for_status()
+                data = resp.json()
+            except (httpx.HTTPStatusError, ValueError) as e:
+                # 4xx / garbage: retrying won't help, but the provider is up
+                self.breaker.record_success()
+                self.stats.add(failed=1)
+                raise WeatherUnavailable(f"{path}: {e}") from e
+            self.breaker.record_success()
+            self.stats.add(ok=1)
+            self.stats.observe((loop.time() - started) * 1000.0)
+            return data
+
+        self.breaker.record_failure()
+        self.stats.add(failed=1)
+        self._log(logging.WARNING, "GET %s failed after %d attempt(s): %s", path, attempt + 1, last_error)
+        raise WeatherUnavailable(f"{path}: {last_error!r}") from last_error
+
+    def report(self) -> Dict[str, Any]:
+        report = self.stats.snapshot()
+        report["circuit"] = self.breaker.state
+        report["circuit_opened"] = self.breaker.opened
+        return report
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result(5.0)
+            self._client = None
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+        loop.close()
@@ -0,0 +1,309 @@
+"""
+Hourly / daily weather forecasts as compact NumPy arrays, and the
+rain-skip and duration-scale decisions derived from them.
+
+A Forecast holds one location's hourly rows in a structured array
+(HOURLY_DTYPE, 28 bytes an hour) on a contiguous hourly grid, plus daily
+rows (DAILY_DTYPE). OpenWeather's One Call ("hourly"/"daily") and 5-day
+3-hour ("list") payloads are both accepted; 3-hour blocks are spread
+over their hours (temperature, humidity and wind interpolated, rain
+probability held, rain amount divided). `version` is a digest of the
+arrays, so an unchanged forecast keeps its version across refetches.
+
+compute_decisions() evaluates every hour of the forecast for every zone
+in one vectorized pass, from `weather.adjustment`:
+- skip for rain when the highest rain probability over the next
+  `rain_lookahead_hours` reaches `rain_probability_threshold`
+  (if `rain_skip_enabled`)
+- skip for cold when the hour is below `low_temp_threshold_c`
+- otherwise scale the duration by `rain_scale` when rain is half as
+  likely as the threshold, and up by `heat_scale` (weighted by the
+  zone's sun modifier) when the next 24 hours peak above
+  `high_temp_threshold_c`
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ai.hydration_profiles import HydrationProfileRegistry
+
+HOUR = 3600
+
+HOURLY_DTYPE = np.dtype([
+    ("time", "<i8"),        # epoch seconds, start of the hour
+    ("temp_c", "<f4"),
+    ("humidity", "<f4"),    # 0-1
+    ("pop", "<f4"),         # probability of precipitation, 0-1
+    ("rain_mm", "<f4"),
+    ("wind_mps", "<f4"),
+])
+
+DAILY_DTYPE = np.dtype([
+    ("time", "<i8"),        # epoch seconds, local midnight
+    ("temp_min_c", "<f4"),
+    ("temp_max_c", "<f4"),
+    ("pop", "<f4"),
+    ("rain_mm", "<f4"),
+])
+
+SKIP_NONE, SKIP_RAIN, SKIP_COLD = 0, 1, 2
+SKIP_REASONS = {SKIP_RAIN: "rain", SKIP_COLD: "cold"}
+
+
+@dataclass(frozen=True)
+class Forecast:
+    location: str
+    hourly: np.ndarray  # HOURLY_DTYPE, consecutive hours
+    daily: np.ndarray   # DAILY_DTYPE
+    version: str
+
+    @classmethod
+    def from_arrays(cls, location: str, hourly: np.ndarray, daily: Optional[np.ndarray] = None) -> "Forecast":
+        hourly = np.ascontiguousarray(hourly, dtype=HOURLY_DTYPE)
+        if daily is None:
+            daily = daily_from_hourly(hourly)
+        daily = np.ascontiguousarray(daily, dtype=DAILY_DTYPE)
+        digest = hashlib.sha1(location.encode())
+        digest.update(hourly.tobytes())
+        digest.update(daily.tobytes())
+        hourly.flags.writeable = False
+        daily.flags.writeable = False
+        return cls(location, hourly, daily, digest.hexdigest()[:16])
+
+    @classmethod
+    def from_openweather(cls, location: str, data: Mapping[str, Any]) -> "Forecast":
+        """Parse a One Call ("hourly"/"daily") or 5-day/3-hour ("list") payload."""
+        if "hourly" in data:
+            rows = data["hourly"]
+            hourly = _resample_hourly(
+                np.array([r["dt"] for r in rows], dtype=np.int64),
+                np.array([r["temp"] for r in rows], dtype=np.float64),
+                np.array([r.get("humidity", 50) for r in rows], dtype=np.float64) / 100.0,
+                np.array([r.get("pop", 0.0) for r in rows], dtype=np.float64),
+                np.array([(r.get("rain") or {}).get("1h", 0.0) for r in rows], dtype=np.float64),
+                np.array([r.get("wind_speed", 0.0) for r in rows], dtype=np.float64),
+            )
+        elif "list" in data:
+            rows = data["list"]
+            hourly = _resample_hourly(
+                np.array([r["dt"] for r in rows], dtype=np.int64),
+                np.array([r["main"]["temp"] for r in rows], dtype=np.float64),
+                np.array([r["main"].get("humidity", 50) for r in rows], dtype=np.float64) / 100.0,
+                np.array([r.get("pop", 0.0) for r in rows], dtype=np.float64),
+                np.array([(r.get("rain") or {}).get("3h", 0.0) for r in rows], dtype=np.float64),
+                np.array([(r.get("wind") or {}).get("speed", 0.0) for r in rows], dtype=np.float64),
+            )
+        else:
+            raise ValueError("Forecast payload has neither 'hourly' nor 'list'")
+
+        daily = None
+        if data.get("daily"):
+            rows = data["daily"]
+            daily = np.zeros(len(rows), dtype=DAILY_DTYPE)
+            daily["time"] = [_local_midnight(r["dt"]) for r in rows]
+            daily["temp_min_c"] = [r["temp"]["min"] for r in rows]
+            daily["temp_max_c"] = [r["temp"]["max"] for r in rows]
+            daily["pop"] = [r.get("pop", 0.0) for r in rows]
+            daily["rain_mm"] = [r.get("rain", 0.0) or 0.0 for r in rows]
+        return cls.from_arrays(location, hourly, daily)
+
+    @property
+    def start(self) -> Optional[float]:
+        return float(self.hourly["time"][0]) if len(self.hourly) else None
+
+    def hour_index(self, when: float) -> Optional[int]:
+        if not len(self.hourly):
+            return None
+        i = int((when - self.hourly["time"][0]) // HOUR)
+        return i if 0 <= i < len(self.hourly) else None
+
+    def to_dict(self, hours: Optional[int] = None) -> Dict[str, Any]:
+        hourly = self.hourly if hours is None else self.hourly[:hours]
+        return {
+            "location": self.location,
+            "version": self.version,
+            "hourly": {name: hourly[name].astype(float).round(3).tolist() for name in HOURLY_DTYPE.names},
+            "daily": {name: self.daily[name].astype(float).round(3).tolist() for name in DAILY_DTYPE.names},
+        }
+
+
+def _local_midnight(ts: float) -> int:
+    return int(datetime.combine(date.fromtimestamp(ts), datetime.min.time()).timestamp())
+
+
+def _resample_hourly(t, temp, humidity, pop, rain, wind) -> np.ndarray:
+    """Rows at arbitrary steps (1 h, 3 h) onto a consecutive hourly grid."""
+    order = np.argsort(t, kind="stable")
+    t, temp, humidity, pop, rain, wind = (a[order] for a in (t, temp, humidity, pop, rain, wind))
+    if len(t) == 0:
+        return np.zeros(0, dtype=HOURLY_DTYPE)
+    step = np.diff(t, append=t[-1] + (t[-1] - t[-2] if len(t) > 1 else HOUR))
+    start = t[0] - t[0] % HOUR
+    grid = np.arange(start, t[-1] + step[-1], HOUR, dtype=np.int64)
+    block = np.clip(np.searchsorted(t, grid, side="right") - 1, 0, len(t) - 1)
+    hours_in_block = np.maximum(step[block] / HOUR, 1.0)
+
+    out = np.zeros(len(grid), dtype=HOURLY_DTYPE)
+    out["time"] = grid
+    out["temp_c"] = np.interp(grid, t, temp)
+    out["humidity"] = np.clip(np.interp(grid, t, humidity), 0.0, 1.0)
+    out["pop"] = np.clip(pop[block], 0.0, 1.0)
+    out["rain_mm"] = rain[block] / hours_in_block
+    out["wind_mps"] = np.interp(grid, t, wind)
+    return out
+
+
+def daily_from_hourly(hourly: np.ndarray) -> np.ndarray:
+    """Aggregate hourly rows into local calendar days."""
+    if not len(hourly):
+        return np.zeros(0, dtype=DAILY_DTYPE)
+    # One UTC offset for the whole forecast; a DST change inside it
+    # shifts that day's boundary by an hour
+    t0 = int(hourly["time"][0])
+    offset = int(datetime.fromtimestamp(t0).astimezone().utcoffset().total_seconds())
+    day = (hourly["time"] + offset) // 86400
+    starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+    daily = np.zeros(len(starts), dtype=DAILY_DTYPE)
+    daily["time"] = day[starts] * 86400 - offset
+    daily["temp_min_c"] = np.minimum.reduceat(hourly["temp_c"], starts)
+    daily["temp_max_c"] = np.maximum.reduceat(hourly["temp_c"], starts)
+    daily["pop"] = np.maximum.reduceat(hourly["pop"], starts)
+    daily["rain_mm"] = np.add.reduceat(hourly["rain_mm"], starts)
+    return daily
+
+
+@dataclass(frozen=True)
+class AdjustmentSettings:
+    rain_skip_enabled: bool = True
+    rain_probability_threshold: float = 0.6
+    high_temp_threshold_c: float = 35.0
+    low_temp_threshold_c: float = 5.0
+    rain_lookahead_hours: int = 12
+    rain_scale: float = 0.7
+    heat_scale: float = 1.2
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "AdjustmentSettings":
+        cfg = config.get("weather", {}).get("adjustment", {})
+        return cls(
+            rain_skip_enabled=bool(cfg.get("rain_skip_enabled", True)),
+            rain_probability_threshold=float(cfg.get("rain_probability_threshold", 0.6)),
+            high_temp_threshold_c=float(cfg.get("high_temp_threshold_c", 35.0)),
+            low_temp_threshold_c=float(cfg.get("low_temp_threshold_c", 5.0)),
+            rain_lookahead_hours=max(1, int(cfg.get("rain_lookahead_hours", 12))),
+            rain_scale=float(cfg.get("rain_scale", 0.7)),
+            heat_scale=float(cfg.get("heat_scale", 1.2)),
+        )
+
+
+def zone_factors_from_config(config: Mapping[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """(zone_ids, sun modifiers) for every configured zone."""
+    profiles = HydrationProfileRegistry.from_config(config)
+    zones = config.get("zones", [])
+    ids = np.array([z["id"] for z in zones], dtype=np.int64)
+    sun = np.array(
+        [
+            profiles.sun_modifiers.get(
+                str(z.get("sun_exposure", profiles.default_sun_exposure)).lower(), profiles.default_sun_modifier
+            )
+            for z in zones
+        ],
+        dtype=np.float32,
+    )
+    return ids, sun
+
+
+@dataclass(frozen=True)
+class ForecastDecisions:
+    """Per zone (rows) and forecast hour (columns): skip reason and duration scale."""
+    location: str
+    version: str
+    times: np.ndarray      # (hours,) epoch seconds
+    zone_ids: np.ndarray   # (zones,)
+    reason: np.ndarray     # (zones, hours) uint8, SKIP_*
+    scale: np.ndarray      # (zones, hours) float32, 0 where skipped
+    pop_ahead: np.ndarray  # (hours,) highest rain probability over the lookahead
+
+    def __post_init__(self):
+        object.__setattr__(self, "_rows", {int(z): i for i, z in enumerate(self.zone_ids)})
+
+    def at(self, zone_id: int, when: float) -> Optional[Tuple[Optional[str], float, float]]:
+        """(skip reason or None, duration scale, rain probability ahead), or None outside the forecast."""
+        row = self._rows.get(int(zone_id))
+        if row is None or not len(self.times):
+            return None
+        col = int((when - self.times[0]) // HOUR)
+        if not 0 <= col < len(self.times):
+            return None
+        return (
+            SKIP_REASONS.get(int(self.reason[row, col])),
+            float(self.scale[row, col]),
+            float(self.pop_ahead[col]),
+        )
+
+    def to_dict(self, start: Optional[float] = None, hours: int = 48) -> Dict[str, Any]:
+        first = 0
+        if start is not None and len(self.times):
+            first = max(0, int((start - self.times[0]) // HOUR))
+        cols = slice(first, first + hours)
+        return {
+            "location": self.location,
+            "version": self.version,
+            "times": self.times[cols].tolist(),
+            "pop_ahead": self.pop_ahead[cols].astype(float).round(3).tolist(),
+            "zones": {
+                int(z): {
+                    "skip": [SKIP_REASONS.get(int(r)) for r in self.reason[i, cols]],
+                    "scale": self.scale[i, cols].astype(float).round(3).tolist(),
+                }
+                for i, z in enumerate(self.zone_ids)
+            },
+        }
+
+
+def _window(values: np.ndarray, width: int, fill: float) -> np.ndarray:
+    """(len(values), width) view of each element and the ones after it."""
+    padded = np.concatenate([values, np.full(width - 1, fill, dtype=values.dtype)])
+    return sliding_window_view(padded, width)
+
+
+def compute_decisions(
+    forecast: Forecast,
+    zone_ids: Iterable[int],
+    sun_modifiers: Iterable[float],
+    settings: AdjustmentSettings,
+) -> ForecastDecisions:
+    hourly = forecast.hourly
+    zone_ids = np.asarray(zone_ids, dtype=np.int64)
+    sun = np.asarray(sun_modifiers, dtype=np.float32)
+
+    pop = np.nan_to_num(hourly["pop"], nan=0.0)
+    temp = hourly["temp_c"]
+    pop_ahead = _window(pop, settings.rain_lookahead_hours, 0.0).max(axis=1)
+    peak_ahead = _window(np.nan_to_num(temp, nan=-np.inf), 24, -np.inf).max(axis=1)
+
+    rain_skip = (pop_ahead >= settings.rain_probability_threshold) & settings.rain_skip_enabled
+    cold_skip = temp < settings.low_temp_threshold_c
+    hour_reason = np.where(rain_skip, SKIP_RAIN, np.where(cold_skip, SKIP_COLD, SKIP_NONE)).astype(np.uint8)
+    rain_factor = np.where(pop_ahead >= settings.rain_probability_threshold / 2, settings.rain_scale, 1.0)
+    hot = (peak_ahead > settings.high_temp_threshold_c).astype(np.float32)
+
+    # (zones, hours) in one broadcast
+    scale = rain_factor[None, :] * (1.0 + (settings.heat_scale - 1.0) * sun[:, None] * hot[None, :])
+    scale = np.where(hour_reason[None, :] != SKIP_NONE, 0.0, scale).astype(np.float32)
+    reason = np.broadcast_to(hour_reason, scale.shape)
+
+    return ForecastDecisions(
+        location=forecast.location,
+        version=forecast.version,
+        times=hourly["time"],
+        zone_ids=zone_ids,
+        reason=reason,
+        scale=scale,
+        pop_ahead=pop_ahead.astype(np.float32),
+    )
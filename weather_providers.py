@@ -0,0 +1,437 @@
+"""
+Weather providers, and recording / replaying what they return.
+
+A WeatherProvider answers two questions for a location:
+- current(location): a snapshot {"temp_c", "humidity", "rain_probability", ...}
+- forecast(location): an OpenWeather-shaped forecast payload
+  (see weather_forecast.Forecast.from_openweather)
+
+OpenWeatherProvider and SimulatedProvider talk to the API or make
+weather up. RecordingProvider wraps either and appends every answer to
+gzip-compressed JSON-lines files (WeatherRecorder). build_archive()
+packs recordings into one ReplayArchive file: an index of
+(location, kind, time) plus individually zlib-compressed payloads,
+opened with mmap so thousands of locations cost neither load time nor
+memory. ReplayProvider serves an archive back on any Clock, optionally
+sped up, with payload timestamps shifted to the replay time.
+"""
+
+import gzip
+import hashlib
+import json
+import math
+import mmap
+import struct
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+from utils.clock import SYSTEM_CLOCK, Clock
+from weather_client import WeatherHttpClient, WeatherUnavailable
+
+KINDS = ("current", "forecast")
+OPENWEATHER_URL = "https://api.openweathermap.org"
+
+
+def location_key(location: Mapping[str, Any]) -> str:
+    return f"{location.get('city')},{location.get('state')},{location.get('country', 'US')}"
+
+
+class WeatherProvider(ABC):
+    name = "base"
+
+    @abstractmethod
+    def current(self, location: Mapping[str, Any]) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def forecast(self, location: Mapping[str, Any]) -> Dict[str, Any]:
+        ...
+
+    def close(self):
+        pass
+
+
+class OpenWeatherProvider(WeatherProvider):
+    name = "openweather"
+
+    def __init__(self, client: WeatherHttpClient, api_key: Optional[str]):
+        self.client = client
+        self.api_key = api_key
+
+    def _params(self, location: Mapping[str, Any]) -> Dict[str, str]:
+        city = location.get("city")
+        state = location.get("state")
+        country = location.get("country", "US")
+
+        if not self.api_key:
+            raise RuntimeError("Weather API key not configured")
+
+        if not city:
+            raise RuntimeError("Weather location city not configured")
+
+        q = f"{city},{state},{country}" if state else f"{city},{country}"
+        return {"q": q, "appid": self.api_key, "units": "metric"}
+
+    def current(self, location: Mapping[str, Any]) -> Dict[str, Any]:
+        data = self.client.get_json("/data/2.5/weather", params=self._params(location))
+        return {
+            "temp_c": data["main"]["temp"],
+            "humidity": data["main"]["humidity"] / 100.0,
+            "rain_probability": self._estimate_rain_probability(data),
+            "raw": data,
+        }
+
+    def forecast(self, location: Mapping[str, Any]) -> Dict[str, Any]:
+        return self.client.get_json("/data/2.5/forecast", params=self._params(location))
+
+    @staticmethod
+    def _estimate_rain_probability(data: Dict[str, Any]) -> float:
+        weather_list = data.get("weather", [])
+        if not weather_list:
+            return 0.0
+
+        main = weather_list[0].get("main", "").lower()
+        if "rain" in main or "drizzle" in main or "thunderstorm" in main:
+            return 0.8
+        if "cloud" in main:
+            return 0.3
+        return 0.05
+
+    def close(self):
+        self.client.close()
+
+
+class SimulatedProvider(WeatherProvider):
+    """
+    Seasonal + daily temperature curve and a per-day rain chance
+    derived from the date alone, so replays see the same weather. The
+    location is ignored.
+    """
+
+    name = "simulated"
+    FORECAST_HOURS = 72
+
+    def __init__(self, clock: Clock = SYSTEM_CLOCK):
+        self.clock = clock
+
+    def current(self, location: Mapping[str, Any]) -> Dict[str, Any]:
+        return self.at(self.clock.now())
+
+    def forecast(self, location: Mapping[str, Any]) -> Dict[str, Any]:
+        """The coming hours, shaped like One Call's "hourly"."""
+        start = self.clock.now().replace(minute=0, second=0, microsecond=0)
+        hourly = []
+        for h in range(self.FORECAST_HOURS):
+            when = start + timedelta(hours=h)
+            w = self.at(when)
+            pop = w["rain_probability"]
+            hourly.append({
+                "dt": int(when.timestamp()),
+                "temp": w["temp_c"],
+                "humidity": round(w["humidity"] * 100),
+                "pop": pop,
+                "rain": {"1h": round(pop, 2) if pop >= 0.5 else 0.0},
+                "wind_speed": 2.0,
+            })
+        return {"hourly": hourly}
+
+    @staticmethod
+    def at(when: datetime) -> Dict[str, Any]:
+        day_of_year = when.timetuple().tm_yday
+        hour = when.hour + when.minute / 60.0
+        seasonal = -math.cos(2 * math.pi * (day_of_year - 15) / 365.0)  # coldest mid-January
+        diurnal = -math.cos(2 * math.pi * (hour - 3) / 24.0)  # coldest around 03:00
+        day_hash = hashlib.sha1(when.strftime("%Y-%m-%d").encode()).digest()
+        rain_probability = round((day_hash[0] / 255.0) ** 2, 2)
+        return {
+            "temp_c": round(20.0 + 10.0 * seasonal + 6.0 * diurnal, 1),
+            "humidity": round(0.45 + 0.5 * rain_probability, 2),
+            "rain_probability": rain_probability,
+        }
+
+
+# ---------- recording ----------
+
+class WeatherRecorder:
+    """
+    Appends {"t", "kind", "location", "payload"} lines to
+    `directory/weather-<start>.jsonl.gz`, one file per recorder. The
+    gzip stream is sync-flushed after every record, so a file cut short
+    by a crash still reads back up to its last whole record.
+    """
+
+    def __init__(self, directory: Union[str, Path], clock: Clock = SYSTEM_CLOCK):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.clock = clock
+        stamp = datetime.fromtimestamp(clock.time()).strftime("%Y%m%dT%H%M%S")
+        self.path = self.directory / f"weather-{stamp}.jsonl.gz"
+        self._lock = threading.Lock()
+        self._file: Optional[gzip.GzipFile] = gzip.GzipFile(self.path, "ab")
+        self.records = 0
+
+    def record(self, kind: str, location: str, payload: Dict[str, Any]):
+        line = json.dumps({"t": self.clock.time(), "kind": kind, "location": location, "payload": payload})
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line.encode("utf-8") + b"\n")
+            self._file.flush()
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_recordings(paths: Iterable[Union[str, Path]]) -> Iterator[Dict[str, Any]]:
+    """Records from recorder files, skipping a torn last record."""
+    for path in paths:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        break
+            except (EOFError, OSError):
+                continue
+
+
+class RecordingProvider(WeatherProvider):
+    def __init__(self, inner: WeatherProvider, recorder: WeatherRecorder):
+        self.inner = inner
+        self.recorder = recorder
+        self.name = inner.name
+
+    def current(self, location: Mapping[str, Any]) -> Dict[str, Any]:
+        payload = self.inner.current(location)
+        self.recorder.record("current", location_key(location), payload)
+        return payload
+
+    def forecast(self, location: Mapping[str, Any]) -> Dict[str, Any]:
+        payload = self.inner.forecast(location)
+        self.recorder.record("forecast", location_key(location), payload)
+        return payload
+
+    def close(self):
+        self.recorder.close()
+        self.inner.close()
+
+
+# ---------- replay archive ----------
+
+ARCHIVE_MAGIC = b"WXARCH1\0"
+_HEADER = struct.Struct("<8sQQQQ")  # magic, records, index offset, locations offset, locations length
+INDEX_DTYPE = np.dtype([
+    ("group", "<i8"),    # location id * len(KINDS) + kind
+    ("t", "<f8"),
+    ("offset", "<u8"),
+    ("length", "<u8"),
+])
+
+
+def build_archive(records: Iterable[Mapping[str, Any]], path: Union[str, Path]) -> int:
+    """
+    Write `records` (as read_recordings yields them) to a replay archive
+    at `path`; returns the number of records. Payloads are streamed to
+    disk as they come; only the 32-byte index rows are kept in memory.
+    """
+    path = Path(path)
+    locations: Dict[str, int] = {}
+    rows: List[Tuple[int, float, int, int]] = []
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+        offset = _HEADER.size
+        for rec in records:
+            loc = locations.setdefault(rec["location"], len(locations))
+            blob = zlib.compress(json.dumps(rec["payload"], separators=(",", ":")).encode("utf-8"), 6)
+            f.write(blob)
+            rows.append((loc * len(KINDS) + KINDS.index(rec["kind"]), float(rec["t"]), offset, len(blob)))
+            offset += len(blob)
+
+        index = np.array(rows, dtype=INDEX_DTYPE)
+        index = index[np.lexsort((index["t"], index["group"]))]
+        index_offset = offset + (-offset % 8)
+        f.write(b"\0" * (index_offset - offset))
+        f.write(index.tobytes())
+        names = zlib.compress(json.dumps(sorted(locations, key=locations.get)).encode("utf-8"))
+        locations_offset = index_offset + index.nbytes
+        f.write(names)
+        f.seek(0)
+        f.write(_HEADER.pack(ARCHIVE_MAGIC, len(index), index_offset, locations_offset, len(names)))
+    tmp.replace(path)
+    return len(rows)
+
+
+class ReplayArchive:
+    """
+    Read side of build_archive(). The index and payloads stay in the
+    page cache via mmap; lookups are two binary searches, and the most
+    recently decoded payloads are kept in a small LRU.
+    """
+
+    def __init__(self, path: Union[str, Path], decoded_cache_size: int = 4096):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n, index_offset, locations_offset, locations_length = _HEADER.unpack_from(self._mm, 0)
+        if magic != ARCHIVE_MAGIC:
+            raise ValueError(f"{self.path} is not a weather replay archive")
+        self.index = np.frombuffer(self._mm, dtype=INDEX_DTYPE, count=n, offset=index_offset)
+        names = json.loads(zlib.decompress(self._mm[locations_offset:locations_offset + locations_length]))
+        self.locations = {name: i for i, name in enumerate(names)}
+        self._groups = self.index["group"]
+        self._times = self.index["t"]
+        self.start = float(self._times.min()) if n else 0.0
+        self.end = float(self._times.max()) if n else 0.0
+
+        self._lock = threading.Lock()
+        self._decoded: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._decoded_cache_size = decoded_cache_size
+        self.stats = {"lookups": 0, "decoded": 0}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def find(self, location: str, kind: str, t: float) -> Optional[Tuple[int, float]]:
+        """(record number, recorded time) of the latest record at or before `t`
+        (the first one if `t` precedes them all); None if never recorded."""
+        loc = self.locations.get(location)
+        if loc is None:
+            return None
+        group = loc * len(KINDS) + KINDS.index(kind)
+        lo = int(np.searchsorted(self._groups, group, "left"))
+        hi = int(np.searchsorted(self._groups, group, "right"))
+        if lo == hi:
+            return None
+        i = lo + int(np.searchsorted(self._times[lo:hi], t, "right")) - 1
+        i = max(i, lo)
+        return i, float(self._times[i])
+
+    def payload(self, i: int) -> Dict[str, Any]:
+        """Decoded payload of record `i` (shared; treat as read-only)."""
+        with self._lock:
+            self.stats["lookups"] += 1
+            cached = self._decoded.get(i)
+            if cached is not None:
+                self._decoded.move_to_end(i)
+                return cached
+        row = self.index[i]
+        start = int(row["offset"])
+        payload = json.loads(zlib.decompress(self._mm[start:start + int(row["length"])]))
+        with self._lock:
+            self.stats["decoded"] += 1
+            self._decoded[i] = payload
+            while len(self._decoded) > self._decoded_cache_size:
+                self._decoded.popitem(last=False)
+        return payload
+
+    def close(self):
+        self.index = self._groups = self._times = None
+        self._mm.close()
+        self._file.close()
+
+
+class ReplayProvider(WeatherProvider):
+    """
+    Serves an archive as if it were live. Replay time maps to recorded
+    time as `start_at + (clock.time() - origin) * speed`, origin being
+    the clock time at construction. With `shift_timestamps`, forecast
+    "dt" values move by (now - recorded time) so forecasts start now.
+    """
+
+    name = "replay"
+
+    def __init__(
+        self,
+        archive: ReplayArchive,
+        clock: Clock = SYSTEM_CLOCK,
+        speed: float = 1.0,
+        start_at: Optional[float] = None,
+        shift_timestamps: bool = True,
+    ):
+        self.archive = archive
+        self.clock = clock
+        self.speed = float(speed)
+        self.origin = clock.time()
+        self.start_at = archive.start if start_at is None else float(start_at)
+        self.shift_timestamps = shift_timestamps
+
+    @classmethod
+    def from_config(cls, replay_cfg: Mapping[str, Any], clock: Clock = SYSTEM_CLOCK) -> "ReplayProvider":
+        start_at = replay_cfg.get("start_at")
+        if isinstance(start_at, str):
+            start_at = datetime.fromisoformat(start_at).timestamp()
+        return cls(
+            ReplayArchive(replay_cfg["archive"]),
+            clock=clock,
+            speed=replay_cfg.get("speed", 1.0),
+            start_at=start_at,
+            shift_timestamps=replay_cfg.get("shift_timestamps", True),
+        )
+
+    def recorded_time(self) -> float:
+        return self.start_at + (self.clock.time() - self.origin) * self.speed
+
+    def _lookup(self, location: Mapping[str, Any], kind: str) -> Tuple[Dict[str, Any], float]:
+        key = location_key(location)
+        found = self.archive.find(key, kind, self.recorded_time())
+        if found is None:
+            raise WeatherUnavailable(f"No {kind} recording for {key}")
+        i, recorded_at = found
+        return self.archive.payload(i), recorded_at
+
+    def current(self, location: Mapping[str, Any]) -> Dict[str, Any]:
+        payload, _ = self._lookup(location, "current")
+        return dict(payload)
+
+    def forecast(self, location: Mapping[str, Any]) -> Dict[str, Any]:
+        payload, recorded_at = self._lookup(location, "forecast")
+        if not self.shift_timestamps:
+            return payload
+        shift = int(round(self.clock.time() - recorded_at))
+        shifted = dict(payload)
+        for rows_key in ("hourly", "daily", "list"):
+            if rows_key in payload:
+                shifted[rows_key] = [dict(row, dt=row["dt"] + shift) for row in payload[rows_key]]
+        return shifted
+
+    def close(self):
+        self.archive.close()
+
+
+def build_provider(weather_cfg: Mapping[str, Any], clock: Clock = SYSTEM_CLOCK, logger=None) -> WeatherProvider:
+    """
+    The provider named by `weather.provider`, wrapped in a recorder when
+    `weather.record.enabled`.
+    """
+    name = weather_cfg.get("provider", "openweather")
+    if name == "openweather":
+        provider: WeatherProvider = OpenWeatherProvider(
+            WeatherHttpClient.from_config(
+                weather_cfg.get("base_url", OPENWEATHER_URL), weather_cfg.get("client", {}), clock=clock, logger=logger
+            ),
+            weather_cfg.get("api_key"),
+        )
+    elif name == "simulated":
+        provider = SimulatedProvider(clock)
+    elif name == "replay":
+        provider = ReplayProvider.from_config(weather_cfg.get("replay", {}), clock=clock)
+    else:
+        raise ValueError(f"Unknown weather provider '{name}'")
+
+    record_cfg = weather_cfg.get("record", {})
+    if record_cfg.get("enabled"):
+        provider = RecordingProvider(provider, WeatherRecorder(record_cfg.get("directory", "data/weather_recordings"), clock))
+    return provider
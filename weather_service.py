@@ -1,28 +1,84 @@
 import logging
-from typing import Dict, Any, Optional
-
-import requests
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Mapping, Optional
 
+from Config import WEATHER_CACHE, WEATHER_TTL_MIN
 from core.app_context import AppContext
+from utils.clock import SYSTEM_CLOCK, Clock
+from weather_cache import WeatherCache
+from weather_client import WeatherHttpClient, WeatherUnavailable
+from weather_forecast import (
+    AdjustmentSettings,
+    Forecast,
+    ForecastDecisions,
+    compute_decisions,
+    zone_factors_from_config,
+)
+from weather_providers import WeatherProvider, build_provider, location_key
 
 
 class WeatherService:
     """
     Wraps external weather provider (e.g. OpenWeather) and exposes
     a clean, cacheable interface for the rest of the system.
+
+    Snapshots go through a WeatherCache (`weather.cache_path`, TTL
+    `weather.cache_ttl_minutes`; Config.WEATHER_CACHE/WEATHER_TTL_MIN
+    when unset). Once the TTL passes, get_weather() keeps returning the
+    old snapshot while one background refresh runs; the cache file lets
+    the last snapshot survive a restart. Under a virtual clock the cache
+    stays in memory and refreshes inline.
+
+    Fetching is delegated to a WeatherProvider (weather_providers):
+    `weather.provider` is "openweather", "simulated" (deterministic
+    weather from the clock's date, for offline runs and season
+    simulations) or "replay" (a recorded archive, `weather.replay`).
+    `weather.record.enabled` records every answer for later replay.
+
+    OpenWeather is reached through a pooled WeatherHttpClient (retries,
+    circuit breaker; `weather.client`). When it is down and nothing is
+    cached, get_weather() returns `weather.fallback` (flagged
+    "fallback": true) instead of raising, if that is configured.
+
+    get_forecast() returns the hourly/daily Forecast (cached like the
+    snapshot, under its own key). forecast_decisions() turns it into
+    skip/scale decisions for every zone and forecast hour, memoized per
+    forecast version, zones and `weather.adjustment`.
     """
 
-    def __init__(self, ctx: AppContext):
+    DECISIONS_CACHE_SIZE = 8
+
+    def __init__(self, ctx: AppContext, clock: Clock = SYSTEM_CLOCK):
         self.ctx = ctx
+        self.clock = clock
         self.logger: logging.Logger = getattr(ctx, "logger", logging.getLogger(__name__))
 
         weather_cfg = ctx.get("weather", default={})
         self.provider = weather_cfg.get("provider", "openweather")
-        self.api_key = weather_cfg.get("api_key")
         self.location = weather_cfg.get("location", {})
         self.adjustment_cfg = weather_cfg.get("adjustment", {})
-
-        self._last_snapshot: Optional[Dict[str, Any]] = None
+        self.cache_ttl_seconds = weather_cfg.get("cache_ttl_minutes", WEATHER_TTL_MIN) * 60.0
+        self.fallback = weather_cfg.get("fallback")
+        self.weather_provider: WeatherProvider = build_provider(weather_cfg, clock=clock, logger=self.logger)
+        # The HTTP client behind the provider (also behind a recorder), for stats
+        base = getattr(self.weather_provider, "inner", self.weather_provider)
+        self.client: Optional[WeatherHttpClient] = getattr(base, "client", None)
+
+        self._snapshot_listeners: List[Callable[[Dict[str, Any]], Any]] = []
+        self._forecast_lock = threading.Lock()
+        self._forecast: Optional[tuple] = None  # (raw payload, parsed Forecast)
+        self._zone_factors: Optional[tuple] = None  # (config, zone_ids, sun modifiers, hashable key)
+        self._decisions: "OrderedDict[tuple, ForecastDecisions]" = OrderedDict()
+        self.decision_stats = {"hits": 0, "misses": 0}
+        self.cache = WeatherCache.from_config(
+            weather_cfg,
+            default_path=WEATHER_CACHE,
+            default_ttl_minutes=WEATHER_TTL_MIN,
+            clock=clock,
+            on_update=self._on_fetched,
+            logger=self.logger,
+        )
 
         self.logger.info(
             "WeatherService initialized. provider=%s location=%s",
@@ -30,58 +86,107 @@ class WeatherService:
             self.location,
         )
 
-    def _build_openweather_url(self) -> str:
-        city = self.location.get("city")
-        state = self.location.get("state")
-        country = self.location.get("country", "US")
-
-        if not self.api_key:
-            raise RuntimeError("Weather API key not configured")
-
-        if not city:
-            raise RuntimeError("Weather location city not configured")
-
-        q = f"{city},{state},{country}" if state else f"{city},{country}"
-        return f"https://api.openweathermap.org/data/2.5/weather?q={q}&appid={self.api_key}&units=metric"
+    @property
+    def cache_key(self) -> str:
+        return f"{self.provider}:{location_key(self.location)}"
+
+    @property
+    def forecast_key(self) -> str:
+        return self.cache_key + "|forecast"
+
+    def get_weather(self, max_age_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        The cached snapshot while it is younger than the cache TTL; a
+        stale one while it is being refreshed in the background. With
+        `max_age_seconds`, anything older is refetched before returning.
+        """
+        try:
+            return self.cache.get(self.cache_key, self._fetch, max_age_seconds)
+        except WeatherUnavailable as e:
+            if self.fallback is None:
+                raise
+            self.logger.warning("Weather unavailable (%s); using fallback values", e)
+            return dict(self.fallback, fallback=True)
 
     def fetch_current_weather(self) -> Dict[str, Any]:
-        if self.provider != "openweather":
-            raise NotImplementedError(f"Weather provider '{self.provider}' not supported yet")
-
-        url = self._build_openweather_url()
-        self.logger.debug("Fetching weather from %s", url)
-
-        resp = requests.get(url, timeout=5)
-        resp.raise_for_status()
-        data = resp.json()
-
-        snapshot = {
-            "temp_c": data["main"]["temp"],
-            "humidity": data["main"]["humidity"] / 100.0,
-            "rain_probability": self._estimate_rain_probability(data),
-            "raw": data,
-        }
-
-        self._last_snapshot = snapshot
+        """Bypass the TTL and fetch now (sharing a fetch already in flight)."""
+        return self.cache.refresh(self.cache_key, self._fetch)
+
+    def _fetch(self) -> Dict[str, Any]:
+        self.logger.debug("Fetching weather for %s from %s", self.location, self.provider)
+        return self.weather_provider.current(self.location)
+
+    def get_forecast(self) -> Forecast:
+        """The location's forecast; raises WeatherUnavailable if none can be had."""
+        raw = self.cache.get(self.forecast_key, self._fetch_forecast)
+        with self._forecast_lock:
+            if self._forecast is None or self._forecast[0] is not raw:
+                self._forecast = (raw, Forecast.from_openweather(self.cache_key, raw))
+            return self._forecast[1]
+
+    def forecast_decisions(self, config: Optional[Mapping[str, Any]] = None) -> ForecastDecisions:
+        """
+        Skip/scale decisions for every configured zone over the forecast
+        (see weather_forecast.compute_decisions). Recomputed only when
+        the forecast version, the zones or the adjustment settings change.
+        """
+        forecast = self.get_forecast()
+        if config is None:
+            config = self.ctx.snapshot().data
+        with self._forecast_lock:
+            if self._zone_factors is None or self._zone_factors[0] is not config:
+                zone_ids, sun = zone_factors_from_config(config)
+                self._zone_factors = (config, zone_ids, sun, (zone_ids.tobytes(), sun.tobytes()))
+            _, zone_ids, sun, zones_key = self._zone_factors
+            settings = AdjustmentSettings.from_config(config)
+            key = (forecast.version, zones_key, settings)
+            decisions = self._decisions.get(key)
+            if decisions is not None:
+                self._decisions.move_to_end(key)
+                self.decision_stats["hits"] += 1
+                return decisions
+            self.decision_stats["misses"] += 1
+        decisions = compute_decisions(forecast, zone_ids, sun, settings)
+        with self._forecast_lock:
+            self._decisions[key] = decisions
+            while len(self._decisions) > self.DECISIONS_CACHE_SIZE:
+                self._decisions.popitem(last=False)
+        return decisions
+
+    def _fetch_forecast(self) -> Dict[str, Any]:
+        self.logger.debug("Fetching forecast for %s from %s", self.location, self.provider)
+        return self.weather_provider.forecast(self.location)
+
+    def _on_fetched(self, key: str, snapshot: Dict[str, Any]):
+        if key != self.cache_key:
+            return  # a forecast, not a current-conditions snapshot
         self.logger.info(
             "Weather snapshot: temp=%.1fC humidity=%.2f rain_prob=%.2f",
             snapshot["temp_c"],
             snapshot["humidity"],
             snapshot["rain_probability"],
         )
-        return snapshot
-
-    def _estimate_rain_probability(self, data: Dict[str, Any]) -> float:
-        weather_list = data.get("weather", [])
-        if not weather_list:
-            return 0.0
-
-        main = weather_list[0].get("main", "").lower()
-        if "rain" in main or "drizzle" in main or "thunderstorm" in main:
-            return 0.8
-        if "cloud" in main:
-            return 0.3
-        return 0.05
+        for listener in list(self._snapshot_listeners):
+            listener(snapshot)
+
+    def on_snapshot(self, listener: Callable[[Dict[str, Any]], Any]):
+        """
+        Register a callback invoked with every newly fetched snapshot.
+        It is called once right away with the cached snapshot, if any
+        (e.g. the one loaded from disk after a restart).
+        """
+        self._snapshot_listeners.append(listener)
+        snapshot = self.get_last_snapshot()
+        if snapshot is not None:
+            listener(snapshot)
+
+    def client_stats(self) -> Optional[Dict[str, Any]]:
+        """Call counts, latency percentiles and circuit state of the HTTP client."""
+        return self.client.report() if self.client is not None else None
+
+    def close(self):
+        self.weather_provider.close()
 
     def get_last_snapshot(self) -> Optional[Dict[str, Any]]:
-        return self._last_snapshot
+        """The newest snapshot, however old (loaded from disk after a restart)."""
+        return self.cache.peek(self.cache_key)